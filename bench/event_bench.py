@@ -0,0 +1,161 @@
+#! /usr/bin/env python
+# coding=utf-8
+# wxPython media, audio/visual player -- thread event benchmark
+#
+# Copyright (C) 2019 Ed Hynan
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+"""
+Thread event benchmark: the cost of wxmav_main.AThreadEvent made with
+deep = True (a deep copy of tag and payload, as every event was made
+before) and deep = False (posted as given), under a flood of helper
+output lines.
+
+A forked child writes COUNT lines to a pipe as fast as it can, as a
+helper flooding its stderr would. This process reads them with the
+helper reader's FramedReader, and makes an event either per line or
+per wakeup with a tuple of the lines read, as the reader thread does.
+Reported are the events made, the time in the event constructor per
+event, and the whole time per line. Then COUNT MPRIS events are made
+with the (line, IODescriptorPair, fd) payload the poll thread posts.
+
+    python bench/event_bench.py [-n COUNT] [--line TEXT]
+
+Events are only made, not posted: posting needs a running wx.App,
+and its cost is the same either way. wxPython must be installed
+(wxmav_main imports it, and AThreadEvent is a wx.PyEvent) and
+DISPLAY set (IODescriptorPair is defined only for X).
+"""
+
+from __future__ import print_function
+import sys, os, time
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+try:
+    _clock = time.perf_counter
+except AttributeError:
+    _clock = time.time
+
+
+def import_wxmav():
+    if 'DISPLAY' not in os.environ:
+        sys.exit("DISPLAY must be set: IODescriptorPair is X only")
+    import wxmav_main
+    return wxmav_main
+
+
+def flood(count, line):
+    """Fork a child writing count lines; return (pid, read fd)"""
+    rd, wr = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(rd)
+        b = (line + "\n").encode("utf-8")
+        chunk = b * 256
+        n = count
+        try:
+            while n > 0:
+                k = min(n, 256)
+                d = chunk if k == 256 else b * k
+                while d:
+                    d = d[os.write(wr, d):]
+                n -= k
+        finally:
+            os._exit(0)
+    os.close(wr)
+    return pid, rd
+
+
+def run_flood(wxm, count, line, deep, batch):
+    """(events made, lines, secs in constructor, secs in all)"""
+    T = wxm._T("2")
+    pid, fd = flood(count, line)
+    r = wxm.FramedReader(fd)
+    nev = nln = 0
+    t_ev = 0.0
+    t0 = _clock()
+    while r.fill():
+        lines = list(r.lines())
+        if not lines:
+            continue
+        nln += len(lines)
+        t1 = _clock()
+        if batch:
+            wxm.AThreadEvent(T, tuple(lines), deep = deep)
+            nev += 1
+        else:
+            for l in lines:
+                wxm.AThreadEvent(T, l, deep = deep)
+            nev += len(lines)
+        t_ev += _clock() - t1
+    t_all = _clock() - t0
+    os.close(fd)
+    os.waitpid(pid, 0)
+    return nev, nln, t_ev, t_all
+
+
+def run_mpris(wxm, count, deep):
+    """secs per MPRIS event made"""
+    T = wxm._T("M")
+    io = wxm.IODescriptorPair(7, 8)
+    p = (wxm._T(""), io, 9)
+    t0 = _clock()
+    for i in range(count):
+        wxm.AThreadEvent(T, p, deep = deep)
+    return (_clock() - t0) / count
+
+
+def main(av):
+    import argparse
+    ap = argparse.ArgumentParser(description = __doc__.split("\n")[1],
+        formatter_class = argparse.RawDescriptionHelpFormatter,
+        epilog = __doc__[__doc__.index("\n\n") + 2:])
+    ap.add_argument("-n", "--count", type = int, default = 200000,
+                    help = "lines, and MPRIS events (default 200000)")
+    ap.add_argument("--line", default = "wxmav-x-helper: "
+                    "XGetWindowProperty failed for window 0x3a00007",
+                    help = "the line flooded")
+    opts = ap.parse_args(av[1:])
+
+    wxm = import_wxmav()
+
+    print("{} lines of {} bytes".format(opts.count, len(opts.line) + 1))
+    print("{:<10} {:<9} {:>9} {:>12} {:>12}".format(
+          "events", "payload", "made", "ns/event", "ns/line all"))
+    for batch in (False, True):
+        for deep in (True, False):
+            nev, nln, t_ev, t_all = run_flood(wxm, opts.count,
+                                              opts.line, deep, batch)
+            if nln != opts.count:
+                sys.exit("read {} lines of {}".format(nln, opts.count))
+            print("{:<10} {:<9} {:>9} {:>12.0f} {:>12.0f}".format(
+                  "per wakeup" if batch else "per line",
+                  "deepcopy" if deep else "as given",
+                  nev, t_ev / nev * 1e9, t_all / nln * 1e9))
+
+    for deep in (True, False):
+        print("{:<10} {:<9} {:>9} {:>12.0f}".format(
+              "MPRIS", "deepcopy" if deep else "as given", opts.count,
+              run_mpris(wxm, opts.count, deep) * 1e9))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
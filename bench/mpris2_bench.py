@@ -0,0 +1,694 @@
+#! /usr/bin/env python
+# coding=utf-8
+# wxPython media, audio/visual player -- MPRIS2 protocol benchmark
+#
+# Copyright (C) 2019 Ed Hynan
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+"""
+Round trip benchmark of the MPRIS2 helper protocol.
+
+wxmav_main.MPRIS2Handler serves requests for a window stand-in with
+fixed player state, as the App does on the helper pipes; the handler's
+write calls are counted per request. Each request is made many times
+and the round trips are timed, in the text protocol, in the framed
+protocol 2, or both (the default) -- and then the values got with
+each protocol must be the same.
+
+Fake helper (the default): the handler serves one end of a socketpair,
+and a forked child on the other plays the X helper's part, with its
+own decoders of text and frame replies.
+
+    python bench/mpris2_bench.py [-n COUNT] [--proto 1|2|both]
+                                 [--unbuffered] [-v]
+
+--unbuffered writes each line of a reply with its own write call,
+as the handler did for array replies before replies were coalesced,
+for comparison.
+
+Real helper: with --helper PATH the built wxmav-x-helper is started
+on the MPRIS2 pipes (once per protocol), and this script run as a
+D-Bus client gets the properties through it -- so the helper's C code
+for each protocol is in the loop. This needs an X display and a
+session bus, and PyGObject for the client, e.g.:
+
+    dbus-run-session -- python3 bench/mpris2_bench.py \\
+        --helper ./wxmav-x-helper -n 500
+
+wxPython must be installed (wxmav_main imports it) and DISPLAY set
+(the MPRIS2 code is defined only for X), but no wx.App is made and
+nothing is drawn.
+"""
+
+from __future__ import print_function
+import sys, os, errno, json, select, socket, struct, time
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+try:
+    _clock = time.perf_counter
+except AttributeError:
+    _clock = time.time
+
+# (request prefix, property) in the order requested
+props = (
+    [("base", p) for p in (
+        "CanQuit", "Fullscreen", "CanSetFullscreen", "CanRaise",
+        "HasTrackList", "Identity", "DesktopEntry",
+        "SupportedUriSchemes", "SupportedMimeTypes")] +
+    [("player", p) for p in (
+        "PlaybackStatus", "LoopStatus", "Rate", "Shuffle", "Metadata",
+        "Volume", "Position", "MinimumRate", "MaximumRate",
+        "CanGoNext", "CanGoPrevious", "CanPlay", "CanPause",
+        "CanSeek", "CanControl")] +
+    [("tracklist", p) for p in ("Tracks", "CanEditTracks")]
+)
+
+# further requests, each made like a property: (kind, prefix, name)
+extra = [
+    ("method", "player", "Pause"),
+    ("signal", "send", "PropertiesChanged"),
+]
+
+mpris_ifaces = {
+    "base"      : "org.mpris.MediaPlayer2",
+    "player"    : "org.mpris.MediaPlayer2.Player",
+    "tracklist" : "org.mpris.MediaPlayer2.TrackList",
+}
+
+
+def import_wxmav():
+    if 'DISPLAY' not in os.environ:
+        sys.exit("DISPLAY must be set: the MPRIS2 code is X only")
+    import wxmav_main
+    return wxmav_main
+
+
+"""
+wxmav side: the handler and the window stand-in it serves for
+"""
+
+class FakeSnap:
+    """Fixed player state in place of wxmav_main.PlayerSnapshot"""
+    fullscreen = False
+    loop_track = False
+    shuffle    = True
+    volume     = 0.5
+    load_ok    = True
+    length     = 215000
+    can_next   = True
+    can_prev   = False
+    has_items  = True
+
+    def __init__(self, meta):
+        self.meta = meta
+
+    def position(self):
+        return 61500
+
+    def playback_state_string(self):
+        return "Paused"
+
+    def metadata(self, w):
+        return self.meta
+
+
+class FakeWnd:
+    """What MPRIS2Handler uses of the top window"""
+    def __init__(self, wxm, verbose = False, accept_proto = True,
+                 signals = True):
+        _T = wxm._T
+        self.wxm = wxm
+        self.mpris = True
+        self.mpris_fd_rd = self.mpris_fd_wr = -1
+        self.mpris2_proto = 1
+        self.block_mpris_signals = False
+        self.verbose = verbose
+        # refuse the helper's offer of protocol 2?
+        self.accept_proto = accept_proto
+        # a signal batch queued for every 'send:signal'?
+        self.signals = signals
+        # write calls of each served request, in order
+        self.writes = []
+        self.meta = [
+            (_T("mpris:trackid"), _T("o:/org/wxmav/bench/track/1")),
+            (_T("mpris:length"), _T("x:215000000")),
+            (_T("xesam:title"), _T("s:A Bench Track")),
+            (_T("xesam:album"), _T("s:Benchmarks")),
+            (_T("xesam:artist"), _T("as:Someone")),
+            (_T("xesam:url"), _T("s:file:///tmp/bench/track-1.ogg")),
+            (_T("xesam:useCount"), _T("i:3")),
+        ]
+        self.tracks = [_T("/org/wxmav/bench/track/{}").format(i)
+                       for i in range(1, 21)]
+
+    def prdbg(self, *args):
+        if self.verbose:
+            print(*args, file = sys.stderr)
+
+    def err_msg(self, msg):
+        self.prdbg(msg)
+
+    def get_mpris_snap(self):
+        return FakeSnap(self.meta)
+
+    def get_identity(self):
+        return "wxmav"
+
+    def get_tracklist(self):
+        return self.tracks
+
+    def get_medi_state(self):
+        return self.wxm.wx.media.MEDIASTATE_PAUSED
+
+    def coproc_queue_get(self):
+        if not self.signals:
+            return None
+        return ("PropertiesChanged",
+                (mpris_ifaces["player"],
+                 ("PlaybackStatus", "Metadata", "Volume")))
+
+
+def mk_handler_class(wxm, unbuffered):
+    class BenchHandler(wxm.MPRIS2Handler):
+        def wr_raw(self, fd, v):
+            # only text replies are split: a frame is one write
+            if (not unbuffered or
+                getattr(self.w, "mpris2_proto", 1) != 1):
+                return wxm.MPRIS2Handler.wr_raw(self, fd, v)
+            for l in v.splitlines(True):
+                wxm.MPRIS2Handler.wr_raw(self, fd, l)
+                self.flush()
+
+        def done(self):
+            wxm.MPRIS2Handler.done(self)
+            self.w.writes.append(self.wr_calls)
+
+        def mpris2_dispatch(self, cmd, fd_rd, fd_wr):
+            if (not self.w.accept_proto and
+                wxm.s_eq(cmd[:6], "proto:")):
+                self.wr(fd_wr, wxm._T("UNSUPPORTED\n"))
+                return False
+            return wxm.MPRIS2Handler.mpris2_dispatch(self, cmd,
+                                                     fd_rd, fd_wr)
+
+    return BenchHandler
+
+
+def serve(wxm, w, hcls, io, stop_fd = -1):
+    """Serve requests on io until the peer closes it, or
+    stop_fd is readable"""
+    fd = io.get_fds()[0]
+    pl = select.poll()
+    pl.register(fd, select.POLLIN)
+    if stop_fd >= 0:
+        pl.register(stop_fd, select.POLLIN)
+    while True:
+        r = getattr(w, "mpris2_reader", None)
+        if not (r and r.fd == fd and r.pending()):
+            if stop_fd in [e[0] for e in pl.poll()]:
+                break
+        try:
+            hcls(w, (wxm._T(""), io, -1)).go()
+        except (IOError, OSError) as e:
+            if e.errno in (errno.EPIPE, errno.ECONNRESET):
+                break
+            raise
+
+
+"""
+helper side: requests in either protocol, with decoders of the
+replies written from the helper's code, not wxmav_main's
+"""
+
+_fixed = {
+    'b' : '>B', 'y' : '>B', 'n' : '>h', 'q' : '>H',
+    'i' : '>i', 'u' : '>I', 'h' : '>i',
+    'x' : '>q', 't' : '>Q', 'd' : '>d'
+}
+
+def frame_str(s):
+    b = s.encode("utf-8")
+    return b"s" + struct.pack(">I", len(b)) + b
+
+def frame_value(b, i):
+    """Python value of the typed value at b[i:], and its end"""
+    c = b[i:i + 1].decode("ascii")
+    i += 1
+    if c in _fixed:
+        n = struct.calcsize(_fixed[c])
+        v = struct.unpack(_fixed[c], b[i:i + n])[0]
+        return (bool(v) if c == 'b' else v), i + n
+    elif c in "sog":
+        n = struct.unpack(">I", b[i:i + 4])[0]
+        return b[i + 4:i + 4 + n].decode("utf-8"), i + 4 + n
+    elif c == 'v':
+        return frame_value(b, i)
+    elif c == 'a':
+        n = struct.unpack(">B", b[i:i + 1])[0]
+        et = b[i + 1:i + 1 + n].decode("ascii")
+        i += 1 + n
+        n = struct.unpack(">I", b[i:i + 4])[0]
+        i += 4
+        l = []
+        for k in range(n):
+            v, i = frame_value(b, i)
+            l.append(v)
+        return (dict(l) if et[:1] == '{' else l), i
+    elif c == '(':
+        n = struct.unpack(">I", b[i:i + 4])[0]
+        i += 4
+        l = []
+        for k in range(n):
+            v, i = frame_value(b, i)
+            l.append(v)
+        return l, i
+    elif c == '{':
+        k, i = frame_value(b, i)
+        v, i = frame_value(b, i)
+        return (k, v), i
+    raise ValueError("no frame decoder for type '{}'".format(c))
+
+
+class FakeHelper:
+    def __init__(self, sock):
+        self.sock = sock
+        self.buf = b""
+
+    def send(self, b):
+        self.sock.sendall(b)
+
+    def fill(self):
+        b = self.sock.recv(65536)
+        if not b:
+            raise IOError(errno.EPIPE, "reply short")
+        self.buf += b
+
+    def readline(self):
+        while True:
+            i = self.buf.find(b"\n")
+            if i >= 0:
+                r, self.buf = self.buf[:i], self.buf[i + 1:]
+                return r.decode("utf-8")
+            self.fill()
+
+    def readframe(self):
+        while len(self.buf) < 4:
+            self.fill()
+        n = struct.unpack(">I", self.buf[:4])[0] + 4
+        while len(self.buf) < n:
+            self.fill()
+        r, self.buf = self.buf[4:n], self.buf[n:]
+        l = []
+        i = 0
+        while i < len(r):
+            v, i = frame_value(r, i)
+            l.append(v)
+        return l
+
+    def text_value(self, line):
+        """Python value of the typed line and those it takes"""
+        t, v = line.split(":", 1)
+        if t == "b":
+            return v == "true"
+        elif t in ("s", "o", "g"):
+            return v
+        elif t == "d":
+            return float(v)
+        elif t in ("y", "n", "q", "i", "u", "x", "t", "h"):
+            return int(v)
+        elif t in ("as", "ao"):
+            l = [v] if v else []
+            while True:
+                e = self.readline()
+                if e == ":END ARRAY:":
+                    return l
+                l.append(e)
+        elif t == "a{sv}":
+            d = {}
+            while True:
+                k = self.readline()
+                if k == ":END ARRAY:":
+                    return d
+                d[k] = self.text_value(self.readline())
+        raise ValueError("no text decoder for type '{}'".format(t))
+
+    def text_ack(self, ini, ack, name):
+        self.send("{}\n".format(ini).encode("utf-8"))
+        r = self.readline()
+        if r != ack:
+            raise ValueError("ack '{}' for {}".format(r, ini))
+        self.send("{}\n".format(name).encode("utf-8"))
+
+    def frame_ack(self, ini, ack, name):
+        b = frame_str(ini) + frame_str(name)
+        self.send(struct.pack(">I", len(b)) + b)
+        r = self.readframe()
+        if r[0] != ack:
+            raise ValueError("ack '{}' for {}".format(r[0], ini))
+        return r[1:]
+
+    def request(self, proto, kind, level, name):
+        """Value got by a request in the protocol"""
+        if kind == "get":
+            ini, ack = level + ":getproperty", "getproperty"
+        elif kind == "method":
+            ini, ack = level + ":method", "method"
+        else:
+            ini, ack, name = "send:signal", "signal", "signaldata"
+
+        if proto == 2:
+            r = self.frame_ack(ini, ack, name)
+            return r[0] if kind != "signal" else r
+
+        self.text_ack(ini, ack, name)
+        if kind == "get":
+            return self.text_value(self.readline())
+        elif kind == "method":
+            return self.readline().split(":", 1)[0]
+        r = [self.readline() for i in range(4)]
+        return r + [self.text_value(self.readline())]
+
+    def negotiate(self):
+        """Offer protocol 2 as the helper does"""
+        self.send(b"proto:2\n")
+        return self.readline() == "proto:2"
+
+
+def run_client(sock, count, protos):
+    """Time count round trips of each request in each protocol;
+    result as [(proto, name, [secs, ...], value), ...] in request
+    order, with the offer of protocol 2 as a request"""
+    h = FakeHelper(sock)
+    reqs = [("get", l, p) for l, p in props] + extra
+    res = []
+    for proto in protos:
+        if proto == 2:
+            t0 = _clock()
+            if not h.negotiate():
+                raise ValueError("protocol 2 refused")
+            res.append((0, "proto:2", [_clock() - t0], None))
+        for kind, level, name in reqs:
+            tms = []
+            for i in range(count):
+                t0 = _clock()
+                v = h.request(proto, kind, level, name)
+                tms.append(_clock() - t0)
+            res.append((proto, name, tms, v))
+    return res
+
+
+def run_fake(wxm, opts, protos):
+    s_wx, s_hl = socket.socketpair()
+    res_rd, res_wr = os.pipe()
+
+    pid = os.fork()
+    if pid == 0:
+        s_wx.close()
+        os.close(res_rd)
+        r = 1
+        try:
+            res = run_client(s_hl, opts.count, protos)
+            # the server stops at EOF, then reads the results
+            s_hl.close()
+            b = json.dumps(res).encode("utf-8")
+            while b:
+                b = b[os.write(res_wr, b):]
+            r = 0
+        finally:
+            os._exit(r)
+
+    s_hl.close()
+    os.close(res_wr)
+
+    w = FakeWnd(wxm, opts.verbose)
+    fd = s_wx.fileno()
+    serve(wxm, w, mk_handler_class(wxm, opts.unbuffered),
+          wxm.IODescriptorPair(fd, fd))
+
+    b = read_all(res_rd)
+    os.close(res_rd)
+    pid, st = os.waitpid(pid, 0)
+    if st or not b:
+        sys.exit("client failed, status {}".format(st))
+    res = json.loads(b.decode("utf-8"))
+
+    n = sum([len(r[2]) for r in res])
+    if len(w.writes) != n:
+        sys.exit("served {} requests, expected {}".format(
+                 len(w.writes), n))
+
+    # writes of each result's requests
+    i = 0
+    out = []
+    for proto, name, tms, v in res:
+        out.append((proto, name, tms, v, w.writes[i:i + len(tms)]))
+        i += len(tms)
+    return out
+
+
+"""
+real helper: the helper serves the session bus, and this script
+run with --dbus-client gets properties from it with Gio
+"""
+
+def dbus_client(name, count):
+    from gi.repository import Gio, GLib
+
+    bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+
+    def _call(dest, path, iface, meth, args, rtype, tmo = 5000):
+        return bus.call_sync(dest, path, iface, meth, args,
+                             GLib.VariantType(rtype),
+                             Gio.DBusCallFlags.NONE, tmo, None)
+
+    t = time.time() + 10.0
+    while True:
+        r = _call("org.freedesktop.DBus", "/org/freedesktop/DBus",
+                  "org.freedesktop.DBus", "NameHasOwner",
+                  GLib.Variant("(s)", (name,)), "(b)")
+        if r.unpack()[0]:
+            break
+        if time.time() > t:
+            sys.exit("helper did not take bus name '{}'".format(name))
+        time.sleep(0.05)
+
+    res = []
+    path = "/org/mpris/MediaPlayer2"
+    for level, prop in props:
+        args = GLib.Variant("(ss)", (mpris_ifaces[level], prop))
+        tms = []
+        for i in range(count):
+            t0 = _clock()
+            r = _call(name, path, "org.freedesktop.DBus.Properties",
+                      "Get", args, "(v)")
+            tms.append(_clock() - t0)
+        res.append((prop, tms, r.unpack()[0]))
+
+    tms = []
+    for i in range(count):
+        t0 = _clock()
+        _call(name, path, mpris_ifaces["player"], "Pause", None, "()")
+        tms.append(_clock() - t0)
+    res.append(("Pause", tms, "VOID"))
+
+    json.dump(res, sys.stdout)
+    return 0
+
+
+def run_helper(wxm, opts, proto):
+    import subprocess, threading
+
+    # as XWSHelperProcClass.mpris2_setup(): requests and replies,
+    # and signals, each a pair of pipes
+    ch_rd, par_wr = os.pipe()
+    par_rd, ch_wr = os.pipe()
+    chsig_rd, parsig_wr = os.pipe()
+    parsig_rd, chsig_wr = os.pipe()
+    chfds = (ch_rd, ch_wr, chsig_rd, chsig_wr)
+
+    appname = "wxmavbench{}".format(os.getpid())
+    args = [opts.helper, "--appname={}".format(appname),
+            "--mpris2-fd-read={},{}".format(ch_rd, chsig_rd),
+            "--mpris2-fd-write={},{}".format(ch_wr, chsig_wr)]
+    dnull = open(os.devnull, "w")
+    hp = subprocess.Popen(args, stdin = subprocess.PIPE,
+                          stdout = dnull,
+                          stderr = None if opts.verbose else dnull,
+                          pass_fds = chfds)
+    for fd in chfds:
+        os.close(fd)
+
+    def _drain(fd):
+        while os.read(fd, 4096):
+            pass
+    t = threading.Thread(target = _drain, args = (parsig_rd,))
+    t.daemon = True
+    t.start()
+
+    os.write(parsig_wr, b"mpris:on\n")
+
+    cp = subprocess.Popen([sys.executable, os.path.abspath(__file__),
+                           "--dbus-client",
+                           "org.mpris.MediaPlayer2." + appname,
+                           str(opts.count)],
+                          stdout = subprocess.PIPE)
+
+    w = FakeWnd(wxm, opts.verbose, accept_proto = (proto == 2),
+                signals = False)
+    serve(wxm, w, mk_handler_class(wxm, opts.unbuffered),
+          wxm.IODescriptorPair(par_rd, par_wr), cp.stdout.fileno())
+
+    b = read_all(cp.stdout.fileno())
+    st = cp.wait()
+
+    hp.terminate()
+    hp.wait()
+    for fd in (par_rd, par_wr, parsig_wr):
+        os.close(fd)
+    dnull.close()
+
+    if st or not b:
+        sys.exit("D-Bus client failed, status {}".format(st))
+    if w.mpris2_proto != proto:
+        sys.exit("helper protocol is {}, wanted {}".format(
+                 w.mpris2_proto, proto))
+
+    return [(proto, name, tms, v, None)
+            for name, tms, v in json.loads(b.decode("utf-8"))], w.writes
+
+
+"""
+results
+"""
+
+def read_all(fd):
+    b = b""
+    while True:
+        r = os.read(fd, 65536)
+        if not r:
+            return b
+        b += r
+
+def stats(tms):
+    s = sorted(tms)
+    return (s[len(s) // 2] * 1e6, sum(s) / len(s) * 1e6)
+
+def norm(v):
+    """Value for comparison: float text has 6 decimal places"""
+    if isinstance(v, float):
+        return round(v, 6)
+    if isinstance(v, dict):
+        return dict([(k, norm(e)) for k, e in v.items()])
+    if isinstance(v, (list, tuple)):
+        return [norm(e) for e in v]
+    return v
+
+def report(res, protos):
+    """Print a row per request, with each protocol's median
+    round trip and writes; return count of rows where the
+    protocols gave different values"""
+    rows = []
+    by = {}
+    for proto, name, tms, v, wr in res:
+        if proto == 0:
+            continue
+        if name not in by:
+            rows.append(name)
+            by[name] = {}
+        by[name][proto] = (tms, v, wr)
+
+    hdr = "{:<20}".format("request")
+    for p in protos:
+        hdr += " {:>10} {:>6}".format(
+               "text us" if p == 1 else "proto2 us", "writes")
+    if len(protos) > 1:
+        hdr += "  same"
+    print(hdr)
+
+    bad = 0
+    for name in rows:
+        l = "{:<20}".format(name)
+        vals = []
+        for p in protos:
+            tms, v, wr = by[name][p]
+            vals.append(norm(v))
+            w = "-"
+            if wr:
+                w = "{:.2f}".format(float(sum(wr)) / len(wr))
+            l += " {:>10.1f} {:>6}".format(stats(tms)[0], w)
+        if len(protos) > 1:
+            same = all([v == vals[0] for v in vals[1:]])
+            bad += 0 if same else 1
+            l += "  {}".format("yes" if same else "NO")
+        print(l)
+
+    return bad
+
+
+def main(av):
+    if len(av) == 4 and av[1] == "--dbus-client":
+        return dbus_client(av[2], int(av[3]))
+
+    import argparse
+    ap = argparse.ArgumentParser(description = __doc__.split("\n")[1],
+        formatter_class = argparse.RawDescriptionHelpFormatter,
+        epilog = __doc__[__doc__.index("\n\n") + 2:])
+    ap.add_argument("-n", "--count", type = int, default = 2000,
+                    help = "requests of each kind (default 2000)")
+    ap.add_argument("--proto", choices = ("1", "2", "both"),
+                    default = "both",
+                    help = "1 text, 2 framed, or both (default)")
+    ap.add_argument("--unbuffered", action = "store_true",
+                    help = "one write per reply line, as before")
+    ap.add_argument("--helper", metavar = "PATH",
+                    help = "start this helper and go through D-Bus")
+    ap.add_argument("-v", "--verbose", action = "store_true",
+                    help = "show the handler's debug messages")
+    opts = ap.parse_args(av[1:])
+
+    protos = [1, 2] if opts.proto == "both" else [int(opts.proto)]
+
+    wxm = import_wxmav()
+
+    print("{} round trips per request{}{}".format(opts.count,
+          ", unbuffered writes" if opts.unbuffered else "",
+          ", through {}".format(opts.helper) if opts.helper else ""))
+
+    if opts.helper:
+        res = []
+        for p in protos:
+            r, wr = run_helper(wxm, opts, p)
+            res += r
+            print("protocol {}: {} requests served, {:.2f} writes "
+                  "each".format(p, len(wr),
+                                float(sum(wr)) / max(1, len(wr))))
+    else:
+        res = run_fake(wxm, opts, protos)
+
+    bad = report(res, protos)
+    if bad:
+        print("{} requests gave different values in the two "
+              "protocols".format(bad))
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
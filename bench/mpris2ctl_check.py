@@ -0,0 +1,353 @@
+#! /usr/bin/env python
+# coding=utf-8
+# wxPython media, audio/visual player -- wxmav_control check
+#
+# Copyright (C) 2019 Ed Hynan
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+"""
+Check of wxmav_mpris2ctl.py (wxmav_control) on a private bus.
+
+A private "dbus-daemon --session --print-address" is started, and on
+it a stand-in MPRIS2 player (this script with --serve) with fixed
+properties, which logs the methods called on it. wxmav_mpris2ctl.py
+is then run with -A and that address -- its own environment has a
+session bus address that does not exist, so only -A can work -- for:
+
+    -q              all properties, with one GetAll per interface
+    -B "get ..."    names in any case; an unknown name fails
+    -B "set ..."    then "get", a method, and a seek
+    -W              property changes and Seeked, as signalled
+
+Each check prints "ok" or "FAIL" with what was wrong; the exit status
+is the count of failures.
+
+    python bench/mpris2ctl_check.py [-v]
+
+Needs dbus-daemon, and the Python packages wxmav_control needs:
+dbus (with its GLib main loop) and mpris2.
+"""
+
+from __future__ import print_function
+import sys, os, time, signal, subprocess
+
+_tree = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                     os.pardir)
+_ctl = os.path.join(_tree, "wxmav_mpris2ctl.py")
+
+_name = "wxmavcheck"
+_path = "/org/mpris/MediaPlayer2"
+_iface = "org.mpris.MediaPlayer2"
+_iface_player = "org.mpris.MediaPlayer2.Player"
+_iface_props = "org.freedesktop.DBus.Properties"
+
+
+def serve():
+    """Stand-in player: run on DBUS_SESSION_BUS_ADDRESS until killed"""
+    import dbus, dbus.service
+    from dbus.mainloop.glib import DBusGMainLoop
+    try:
+        from gi.repository import GLib
+        loop = GLib.MainLoop()
+    except ImportError:
+        import gobject
+        loop = gobject.MainLoop()
+
+    DBusGMainLoop(set_as_default = True)
+    bus = dbus.SessionBus()
+
+    def _log(*a):
+        print(" ".join(str(i) for i in a))
+        sys.stdout.flush()
+
+    class Player(dbus.service.Object):
+        def __init__(self):
+            dbus.service.Object.__init__(self, bus, _path)
+            S = lambda l: dbus.Array(l, signature = 's')
+            self.props = {
+                _iface : {
+                    "CanQuit" : True,
+                    "Fullscreen" : False,
+                    "CanSetFullscreen" : True,
+                    "CanRaise" : True,
+                    "HasTrackList" : False,
+                    "Identity" : "check player",
+                    "DesktopEntry" : "wxmav",
+                    "SupportedUriSchemes" : S(["file", "http"]),
+                    "SupportedMimeTypes" : S(["audio/x-wav"]),
+                },
+                _iface_player : {
+                    "PlaybackStatus" : "Paused",
+                    "LoopStatus" : "None",
+                    "Rate" : 1.0,
+                    "Shuffle" : False,
+                    "Metadata" : dbus.Dictionary({
+                        "mpris:trackid" :
+                            dbus.ObjectPath(_path + "/track/1"),
+                        "xesam:title" : "check track",
+                        "mpris:length" : dbus.Int64(180000000),
+                    }, signature = 'sv'),
+                    "Volume" : 0.5,
+                    "Position" : dbus.Int64(61500000),
+                    "MinimumRate" : 1.0,
+                    "MaximumRate" : 1.0,
+                    "CanGoNext" : True,
+                    "CanGoPrevious" : True,
+                    "CanPlay" : True,
+                    "CanPause" : True,
+                    "CanSeek" : True,
+                    "CanControl" : True,
+                },
+            }
+
+        @dbus.service.method(_iface_props, in_signature = 'ss',
+                             out_signature = 'v')
+        def Get(self, iface, name):
+            _log("Get", name)
+            return self.props[iface][name]
+
+        @dbus.service.method(_iface_props, in_signature = 's',
+                             out_signature = 'a{sv}')
+        def GetAll(self, iface):
+            _log("GetAll", iface)
+            return self.props[iface]
+
+        @dbus.service.method(_iface_props, in_signature = 'ssv')
+        def Set(self, iface, name, val):
+            _log("Set", name, val)
+            self.props[iface][name] = val
+            self.PropertiesChanged(iface, {name : val}, [])
+
+        @dbus.service.signal(_iface_props, signature = 'sa{sv}as')
+        def PropertiesChanged(self, iface, changed, invalidated):
+            pass
+
+        @dbus.service.signal(_iface_player, signature = 'x')
+        def Seeked(self, pos):
+            pass
+
+        @dbus.service.method(_iface)
+        def Raise(self):
+            _log("Raise")
+
+        @dbus.service.method(_iface)
+        def Quit(self):
+            _log("Quit")
+
+        @dbus.service.method(_iface_player)
+        def Play(self):
+            _log("Play")
+
+        @dbus.service.method(_iface_player)
+        def Pause(self):
+            _log("Pause")
+
+        @dbus.service.method(_iface_player)
+        def PlayPause(self):
+            _log("PlayPause")
+
+        @dbus.service.method(_iface_player)
+        def Stop(self):
+            _log("Stop")
+
+        @dbus.service.method(_iface_player)
+        def Next(self):
+            _log("Next")
+
+        @dbus.service.method(_iface_player)
+        def Previous(self):
+            _log("Previous")
+
+        @dbus.service.method(_iface_player, in_signature = 'x')
+        def Seek(self, off):
+            _log("Seek", int(off))
+            p = self.props[_iface_player]
+            p["Position"] = dbus.Int64(max(0, p["Position"] + off))
+            self.Seeked(p["Position"])
+
+        @dbus.service.method(_iface_player, in_signature = 'ox')
+        def SetPosition(self, tid, pos):
+            _log("SetPosition", tid, int(pos))
+
+        @dbus.service.method(_iface_player, in_signature = 's')
+        def OpenUri(self, uri):
+            _log("OpenUri", uri)
+
+    p = Player()
+    bus.request_name(_iface + "." + _name)
+    _log("READY")
+    loop.run()
+
+
+class Checker(object):
+    def __init__(self, verbose = False):
+        self.verbose = verbose
+        self.nfail = 0
+        self.daemon = self.player = None
+        self.addr = None
+
+    def start(self):
+        self.daemon = subprocess.Popen(
+            ["dbus-daemon", "--session", "--nofork", "--print-address"],
+            stdout = subprocess.PIPE, universal_newlines = True)
+        self.addr = self.daemon.stdout.readline().strip()
+        if not self.addr:
+            sys.exit("dbus-daemon gave no address")
+        if self.verbose:
+            print("bus: " + self.addr)
+
+        env = dict(os.environ, DBUS_SESSION_BUS_ADDRESS = self.addr)
+        self.player = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve"],
+            env = env, stdout = subprocess.PIPE,
+            universal_newlines = True)
+        if self.player.stdout.readline().strip() != "READY":
+            self.stop()
+            sys.exit("stand-in player did not start")
+
+    def stop(self):
+        for p in (self.player, self.daemon):
+            if p and p.poll() is None:
+                p.terminate()
+                p.wait()
+
+    def player_log(self):
+        """Lines the stand-in player logged since last call"""
+        import select
+        l = []
+        fd = self.player.stdout
+        while select.select([fd], [], [], 0.2)[0]:
+            ln = fd.readline()
+            if not ln:
+                break
+            l.append(ln.strip())
+        return l
+
+    def ctl(self, args, stdin = None, wait = True):
+        # a session bus that cannot be: only -A can connect
+        env = dict(os.environ,
+                   DBUS_SESSION_BUS_ADDRESS = "unix:path=/nonexistent")
+        p = subprocess.Popen(
+            [sys.executable, _ctl, "-A", self.addr, "-P", _name] + args,
+            env = env, stdin = subprocess.PIPE, stdout = subprocess.PIPE,
+            stderr = subprocess.PIPE, universal_newlines = True)
+        if not wait:
+            return p
+        out, err = p.communicate(stdin)
+        if self.verbose:
+            for ln in (out + err).splitlines():
+                print("  | " + ln)
+        return p.returncode, out, err
+
+    def check(self, what, problems):
+        problems = [m for m in problems if m]
+        print("{:<40} {}".format(what, "FAIL" if problems else "ok"))
+        for m in problems:
+            print("    " + m)
+        self.nfail += bool(problems)
+
+    @staticmethod
+    def want(out, line):
+        if line not in out.splitlines():
+            return "no line '{}'".format(line)
+
+    def run(self):
+        self.player_log()
+
+        st, out, err = self.ctl(["-q"])
+        log = self.player_log()
+        self.check("-q: all properties", [
+            st and "exit status {}".format(st),
+            self.want(out, "Player: Volume == 0.5"),
+            self.want(out, "MediaPlayer2: Identity == check player"),
+            self.want(out, "Player: PlaybackStatus == Paused"),
+            [l for l in log if l.startswith("Get ")] and
+                "single Get calls: {}".format(
+                [l for l in log if l.startswith("Get ")]),
+            len([l for l in log if l.startswith("GetAll ")]) != 2 and
+                "not 2 GetAll calls: {}".format(log)])
+
+        st, out, err = self.ctl(["-B"], "get volume PLAYBACKSTATUS\n")
+        self.check("-B get, names in any case", [
+            st and "exit status {}".format(st),
+            self.want(out, "Player: Volume == 0.5"),
+            self.want(out, "Player: PlaybackStatus == Paused")])
+
+        st, out, err = self.ctl(["-B"], "get Volume NoSuchProp\n")
+        self.check("-B get, unknown name fails", [
+            st != 1 and "exit status {}, not 1".format(st),
+            self.want(out, "Player: Volume == 0.5"),
+            "NoSuchProp" not in err and
+                "no error for NoSuchProp: '{}'".format(err.strip())])
+
+        self.player_log()
+        st, out, err = self.ctl(["-B"],
+                                "set volume 0.25\n"
+                                "get volume\n"
+                                "# a comment\n"
+                                "play\n"
+                                "seek=-5000000\n")
+        log = self.player_log()
+        self.check("-B set, get, methods", [
+            st and "exit status {}".format(st),
+            self.want(out, "Player: Volume == 0.25"),
+            "Play" not in log and "no Play call: {}".format(log),
+            "Seek -5000000" not in log and
+                "no Seek call: {}".format(log)])
+
+        w = self.ctl(["-W"], wait = False)
+        time.sleep(1.0)
+        self.ctl(["-B"], "set Volume 0.75\nseek=1000000\n")
+        time.sleep(1.0)
+        w.send_signal(signal.SIGINT)
+        out, err = w.communicate()
+        if self.verbose:
+            for ln in (out + err).splitlines():
+                print("  | " + ln)
+        self.check("-W property change and Seeked", [
+            w.returncode and "exit status {}".format(w.returncode),
+            self.want(out, "Player: Volume == 0.75"),
+            self.want(out, "Player: Seeked == 57500000")])
+
+        return self.nfail
+
+
+def main(av):
+    import argparse
+    ap = argparse.ArgumentParser(description = __doc__.split("\n")[1],
+        formatter_class = argparse.RawDescriptionHelpFormatter,
+        epilog = __doc__[__doc__.index("\n\n") + 2:])
+    ap.add_argument("-v", "--verbose", action = "store_true",
+                    help = "show the control program's output")
+    ap.add_argument("--serve", action = "store_true",
+                    help = argparse.SUPPRESS)
+    opts = ap.parse_args(av[1:])
+
+    if opts.serve:
+        serve()
+        return 0
+
+    c = Checker(opts.verbose)
+    c.start()
+    try:
+        return c.run()
+    finally:
+        c.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
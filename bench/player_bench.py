@@ -0,0 +1,295 @@
+#! /usr/bin/env python
+# coding=utf-8
+# wxPython media, audio/visual player -- whole player timing
+#
+# Copyright (C) 2019 Ed Hynan
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+"""
+Whole player timing: runs the player, with its GUI and media backend,
+and collects the times it writes to stderr.
+
+startup: launch to first audio. The player is run COUNT times with
+-startup-profile and no file arguments, so that it resumes the saved
+state, and each time is killed once it reports the "playback started"
+phase (at its first EVT_MEDIA_PLAY). Reported are the median, least
+and greatest time of each phase from module start, and the time from
+exec to that line as seen here, which adds interpreter start. The
+saved state must be set to resume play: quit the player while it is
+playing. It is killed, not quit, so that state is not changed.
+
+    python bench/player_bench.py [--cmd CMD] startup [-n COUNT]
+                                                     [--timeout SECS]
+
+gap: the inter-track gap, from EVT_MEDIA_FINISHED to the next
+EVT_MEDIA_PLAY, as the player logs it with -debug ("Track gap: N ms").
+TRACKS tone WAV files of SECS seconds are written to a new directory,
+and the player is run on them with a new HOME holding a config that
+sets auto advance, first with gapless_preload off (unload, then load
+the next) and then on (the next preloaded and swapped in). Reported
+are the median, least and greatest gap of each mode.
+
+    python bench/player_bench.py [--cmd CMD] gap [--tracks TRACKS]
+                                                 [--secs SECS]
+
+CMD is the player command, default this tree's wxmav_main.py run by
+this Python; e.g. give a tree at another revision to compare. Its
+last word must be the player program or script: the config file name
+comes from it. The display and audio output in use are the player's.
+"""
+
+from __future__ import print_function
+import sys, os, time, re, select, shlex, signal, subprocess
+import math, struct, wave, tempfile, shutil
+
+try:
+    _clock = time.perf_counter
+except AttributeError:
+    _clock = time.time
+
+_tree = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                     os.pardir)
+
+
+class Player(object):
+    """The player run in a new session, with stderr read here"""
+    def __init__(self, cmd, args, env = None, verbose = False):
+        self.verbose = verbose
+        self.buf = b''
+        self.t0 = _clock()
+        self.proc = subprocess.Popen(cmd + args, env = env,
+                                     stdin = open(os.devnull),
+                                     stdout = open(os.devnull, "w"),
+                                     stderr = subprocess.PIPE,
+                                     preexec_fn = os.setsid)
+
+    def lines(self, timeout):
+        """Yield (secs from launch, line) until EOF or timeout"""
+        fd = self.proc.stderr.fileno()
+        tend = _clock() + timeout
+        while True:
+            tmo = tend - _clock()
+            if tmo <= 0:
+                return
+            r, w, x = select.select([fd], [], [], tmo)
+            if not r:
+                return
+            d = os.read(fd, 4096)
+            tm = _clock() - self.t0
+            if not d:
+                return
+            self.buf += d
+            while b'\n' in self.buf:
+                l, self.buf = self.buf.split(b'\n', 1)
+                l = l.decode("utf-8", "replace")
+                if self.verbose:
+                    print("  | " + l, file = sys.stderr)
+                yield tm, l
+
+    def kill(self):
+        """Kill the player and its helper"""
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self.proc.wait()
+        self.proc.stderr.close()
+
+
+def stats(vals):
+    s = sorted(vals)
+    return s[len(s) // 2], s[0], s[-1]
+
+
+_re_phase = re.compile(r'^startup: (.*\S)\s+(-?[0-9.]+) ms \(\+')
+
+def run_startup(cmd, opts):
+    """one run: [(phase, ms from module start)], ms exec to play"""
+    p = Player(cmd, ["-startup-profile"], verbose = opts.verbose)
+    ph = []
+    try:
+        for tm, l in p.lines(opts.timeout):
+            m = _re_phase.match(l)
+            if not m:
+                continue
+            ph.append((m.group(1), float(m.group(2))))
+            if m.group(1) == "playback started":
+                return ph, tm * 1000.0
+    finally:
+        p.kill()
+    if ph:
+        sys.exit("no \"playback started\" phase: the saved state "
+                 "must be set to resume play")
+    sys.exit("no startup report in {} seconds".format(opts.timeout))
+
+
+def do_startup(cmd, opts):
+    names = []
+    tms = {}
+    for i in range(opts.count):
+        ph, ext = run_startup(cmd, opts)
+        for nm, ms in ph + [("exec to playback (here)", ext)]:
+            if nm not in tms:
+                names.append(nm)
+                tms[nm] = []
+            tms[nm].append(ms)
+
+    print("{}: {} launches".format(" ".join(cmd), opts.count))
+    print("{:<28} {:>9} {:>9} {:>9}".format(
+          "phase", "median ms", "least", "greatest"))
+    for nm in names:
+        print("{:<28} {:>9.1f} {:>9.1f} {:>9.1f}{}".format(
+              nm, *(stats(tms[nm]) + (
+              "" if len(tms[nm]) == opts.count else
+              "  ({} runs)".format(len(tms[nm])),))))
+
+
+def mk_tracks(dname, tracks, secs):
+    """Write tone WAV files; return their paths"""
+    rate = 44100
+    l = []
+    for i in range(tracks):
+        fn = os.path.join(dname, "track{:02d}.wav".format(i + 1))
+        f = 2.0 * math.pi * (220.0 * (i + 2)) / rate
+        d = b''.join(struct.pack('<hh', v, v) for v in
+                     (int(8000 * math.sin(f * k))
+                      for k in range(int(rate * secs))))
+        w = wave.open(fn, "wb")
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(d)
+        w.close()
+        l.append(fn)
+    return l
+
+
+def mk_home(dname, cmd, gapless):
+    """A HOME with a player config for the gap run; return env"""
+    prog = os.path.splitext(os.path.basename(cmd[-1]))[0]
+    home = os.path.join(dname, "home-{}".format(int(gapless)))
+    os.makedirs(os.path.join(home, "." + prog))
+    with open(os.path.join(home, "." + prog, "config"), "w") as f:
+        f.write("[main]\n"
+                "auto_advance=1\n"
+                "loop_play=0\n"
+                "shuffle=0\n"
+                "use_trayicon=0\n"
+                "gapless_preload={}\n".format(int(gapless)))
+
+    env = dict(os.environ)
+    # keep backend caches and sound server cookies of the real HOME
+    rhome = os.path.expanduser("~")
+    env.setdefault("XDG_CACHE_HOME", os.path.join(rhome, ".cache"))
+    env.setdefault("XDG_CONFIG_HOME", os.path.join(rhome, ".config"))
+    env["HOME"] = home
+    return env
+
+
+_re_gap = re.compile(r'Track gap: ([0-9.]+) ms')
+
+def run_gap(cmd, opts, dname, tracks, gapless):
+    """one run: [gap ms]"""
+    env = mk_home(dname, cmd, gapless)
+    p = Player(cmd, ["-debug"] + tracks, env = env,
+               verbose = opts.verbose)
+    gaps = []
+    try:
+        for tm, l in p.lines(len(tracks) * opts.secs + opts.timeout):
+            m = _re_gap.search(l)
+            if m:
+                gaps.append(float(m.group(1)))
+                if len(gaps) == len(tracks) - 1:
+                    break
+    finally:
+        p.kill()
+    if len(gaps) < len(tracks) - 1:
+        sys.exit("{} of {} track gaps logged".format(
+                 len(gaps), len(tracks) - 1))
+    return gaps
+
+
+def do_gap(cmd, opts):
+    dname = tempfile.mkdtemp(prefix = "wxmavbench")
+    try:
+        tracks = mk_tracks(dname, opts.tracks, opts.secs)
+        res = [(nm, run_gap(cmd, opts, dname, tracks, gl))
+               for nm, gl in (("unload, load", False),
+                              ("preloaded", True))]
+    finally:
+        shutil.rmtree(dname)
+
+    print("{}: {} tracks of {} s".format(" ".join(cmd),
+                                         opts.tracks, opts.secs))
+    print("{:<14} {:>5} {:>9} {:>9} {:>9}".format(
+          "mode", "gaps", "median ms", "least", "greatest"))
+    for nm, gaps in res:
+        print("{:<14} {:>5} {:>9.1f} {:>9.1f} {:>9.1f}".format(
+              nm, len(gaps), *stats(gaps)))
+
+
+def main(av):
+    import argparse
+    ap = argparse.ArgumentParser(description = __doc__.split("\n")[1],
+        formatter_class = argparse.RawDescriptionHelpFormatter,
+        epilog = __doc__[__doc__.index("\n\n") + 2:])
+    ap.add_argument("--cmd", default = None,
+                    help = "player command (default: wxmav_main.py "
+                           "of this tree)")
+    ap.add_argument("-v", "--verbose", action = "store_true",
+                    help = "echo the player's stderr")
+    sp = ap.add_subparsers(dest = "what")
+
+    st = sp.add_parser("startup", help = "launch to first audio")
+    st.add_argument("-n", "--count", type = int, default = 10,
+                    help = "launches (default 10)")
+    st.add_argument("--timeout", type = float, default = 30.0,
+                    help = "seconds to wait for playback (default 30)")
+
+    gp = sp.add_parser("gap", help = "inter-track gap")
+    gp.add_argument("--tracks", type = int, default = 5,
+                    help = "tracks played through (default 5)")
+    gp.add_argument("--secs", type = float, default = 6.0,
+                    help = "track length in seconds (default 6)")
+    gp.add_argument("--timeout", type = float, default = 30.0,
+                    help = "seconds to wait beyond the tracks' length "
+                           "(default 30)")
+
+    opts = ap.parse_args(av[1:])
+
+    if 'DISPLAY' not in os.environ:
+        sys.exit("DISPLAY must be set")
+
+    if opts.cmd:
+        cmd = shlex.split(opts.cmd)
+    else:
+        cmd = [sys.executable, os.path.join(_tree, "wxmav_main.py")]
+
+    if opts.what == "startup":
+        do_startup(cmd, opts)
+    elif opts.what == "gap":
+        if opts.tracks < 2:
+            ap.error("--tracks must be 2 or more")
+        do_gap(cmd, opts)
+    else:
+        ap.error("give a measurement: startup or gap")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
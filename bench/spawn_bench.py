@@ -0,0 +1,138 @@
+#! /usr/bin/env python
+# coding=utf-8
+# wxPython media, audio/visual player -- helper launch benchmark
+#
+# Copyright (C) 2019 Ed Hynan
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+"""
+Child launch benchmark: wxmav_main.ch_proc, as used to start the X
+helper, by fork and exec and by posix_spawn, with resident heaps of
+some sizes in this process -- as wx, GTK and a media backend make
+the player's heap large, and fork() must copy its page tables.
+
+For each heap size and method, COUNT children are launched as
+XWSHelperProcClass.do_keystart() does (go() in a new process group,
+then exec_check()), and reaped. Reported are the mean and median
+time to launch, and to launch and reap.
+
+    python bench/spawn_bench.py [-n COUNT] [--heap MB[,MB...]]
+                                [--cmd PATH]
+
+posix_spawn needs Python 3.8 or later; with an older Python only
+fork and exec is run. wxPython must be installed (wxmav_main imports
+it) and DISPLAY set (ch_proc is defined only for X), but no wx.App
+is made.
+"""
+
+from __future__ import print_function
+import sys, os, time
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+try:
+    _clock = time.perf_counter
+except AttributeError:
+    _clock = time.time
+
+
+def import_wxmav():
+    if 'DISPLAY' not in os.environ:
+        sys.exit("DISPLAY must be set: ch_proc is X only")
+    import wxmav_main
+    return wxmav_main
+
+
+def mk_heap(mb):
+    """mb MB of resident, written pages"""
+    return [bytearray(b'\x01') * (1 << 20) for i in range(mb)]
+
+
+def launch(wxm, cmd, spawn):
+    """Seconds to launch, and to launch and reap, one child"""
+    t0 = _clock()
+    p = wxm.ch_proc(cmd = cmd, arglist = [cmd], mk_pgrp = True,
+                    spawn = spawn)
+    pid, rfd, efd = p.go()
+    if pid <= 0:
+        sys.exit("launch failed: {}".format(p.error))
+    if p.exec_check() is not None:
+        sys.exit("exec failed: {}".format(p.error))
+    t1 = _clock()
+    p.wait()
+    t2 = _clock()
+    os.close(rfd)
+    os.close(efd)
+    p.close_fd()
+    return t1 - t0, t2 - t0
+
+
+def stats(tms):
+    s = sorted(tms)
+    return (sum(s) / len(s) * 1e3, s[len(s) // 2] * 1e3)
+
+
+def main(av):
+    import argparse
+    ap = argparse.ArgumentParser(description = __doc__.split("\n")[1],
+        formatter_class = argparse.RawDescriptionHelpFormatter,
+        epilog = __doc__[__doc__.index("\n\n") + 2:])
+    ap.add_argument("-n", "--count", type = int, default = 50,
+                    help = "launches per heap size and method "
+                           "(default 50)")
+    ap.add_argument("--heap", default = "16,256,1024",
+                    help = "resident heap sizes in MB "
+                           "(default 16,256,1024)")
+    ap.add_argument("--cmd", default = "/bin/true",
+                    help = "child program (default /bin/true)")
+    opts = ap.parse_args(av[1:])
+
+    wxm = import_wxmav()
+
+    methods = [("fork+exec", False)]
+    if hasattr(os, "posix_spawn"):
+        methods.append(("posix_spawn", True))
+
+    print("{}, {} launches each".format(opts.cmd, opts.count))
+    print("{:>8} {:<12} {:>10} {:>10} {:>10} {:>10}".format(
+          "heap MB", "method", "launch ms", "median", "+reap ms",
+          "median"))
+
+    heap = []
+    have = 0
+    for mb in [int(v) for v in opts.heap.split(",")]:
+        if mb > have:
+            heap += mk_heap(mb - have)
+        else:
+            del heap[mb:]
+        have = mb
+        for name, spawn in methods:
+            l = []
+            lr = []
+            for i in range(opts.count):
+                a, b = launch(wxm, opts.cmd, spawn)
+                l.append(a)
+                lr.append(b)
+            print("{:>8} {:<12} {:>10.2f} {:>10.2f} {:>10.2f} "
+                  "{:>10.2f}".format(mb, name, *(stats(l) + stats(lr))))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
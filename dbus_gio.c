@@ -185,6 +185,7 @@ typedef struct _mpris_data_struct {
     size_t            bufsz;
     FILE              *fprd;
     FILE              *fpwr;
+    int               proto; /* MPRIS_PROTO_*, 0 until negotiated */
 } mpris_data_struct;
 
 /* data for time event callbacks: idle event, timer, etc.. */
@@ -1446,6 +1447,572 @@ _exchange_handshake(mpris_data_struct *dat,
     return _EXCHGHS_ALL_OK;
 }
 
+/*
+ * binary protocol (version 2) with the client, offered by
+ * negotiate_mpris_proto() -- each exchange is one frame
+ * each way: a 4 byte big-endian length, then typed values,
+ * each of which is the type char, then:
+ *     b y            -- 1 byte
+ *     n q            -- 2 bytes
+ *     i u h          -- 4 bytes
+ *     x t d          -- 8 bytes (d as IEEE double)
+ *     s o g          -- 4 byte length, then utf-8
+ *     v              -- one typed value
+ *     a              -- 1 byte length and element type string,
+ *                       4 byte count, then typed values
+ *     (              -- 4 byte count, then typed values
+ *     {              -- 2 typed values
+ * a request is s:ini, s:name, then args (method parameters,
+ * or setter value); the reply is s:ack, then per ack --
+ * see mpris2_proto_version in wxmav_main.py
+ */
+#define MPRIS_PROTO_TEXT 1
+#define MPRIS_PROTO_BIN  2
+/* sanity limit on a frame from client */
+#define MPRIS_FRAME_MAX  (16u * 1024u * 1024u)
+
+static void
+bin_put_u32(GByteArray *ba, guint32 v)
+{
+    guint8 b[4];
+
+    b[0] = (guint8)(v >> 24);
+    b[1] = (guint8)(v >> 16);
+    b[2] = (guint8)(v >> 8);
+    b[3] = (guint8)v;
+    g_byte_array_append(ba, b, sizeof(b));
+}
+
+static void
+bin_put_u16(GByteArray *ba, guint16 v)
+{
+    guint8 b[2];
+
+    b[0] = (guint8)(v >> 8);
+    b[1] = (guint8)v;
+    g_byte_array_append(ba, b, sizeof(b));
+}
+
+static void
+bin_put_u64(GByteArray *ba, guint64 v)
+{
+    bin_put_u32(ba, (guint32)(v >> 32));
+    bin_put_u32(ba, (guint32)v);
+}
+
+static void
+bin_put_str(GByteArray *ba, int tag, const char *s)
+{
+    guint8 t   = (guint8)tag;
+    size_t len = strlen(s);
+
+    g_byte_array_append(ba, &t, 1);
+    bin_put_u32(ba, (guint32)len);
+    g_byte_array_append(ba, (const guint8 *)s, len);
+}
+
+/* append variant v in the tagged form above */
+static void
+bin_put_gvar(GByteArray *ba, GVariant *v)
+{
+    const gchar *type = g_variant_get_type_string(v);
+    guint8      tag   = (guint8)*type;
+    gsize       ix, n;
+    union { gdouble d; guint64 u; } dbl;
+
+    switch ( g_variant_classify(v) ) {
+    case G_VARIANT_CLASS_STRING:
+    case G_VARIANT_CLASS_OBJECT_PATH:
+    case G_VARIANT_CLASS_SIGNATURE:
+        bin_put_str(ba, tag, g_variant_get_string(v, NULL));
+        return;
+    default:
+        break;
+    }
+
+    g_byte_array_append(ba, &tag, 1);
+
+    switch ( g_variant_classify(v) ) {
+    case G_VARIANT_CLASS_BOOLEAN:
+        tag = g_variant_get_boolean(v) ? 1 : 0;
+        g_byte_array_append(ba, &tag, 1);
+        break;
+    case G_VARIANT_CLASS_BYTE:
+        tag = g_variant_get_byte(v);
+        g_byte_array_append(ba, &tag, 1);
+        break;
+    case G_VARIANT_CLASS_INT16:
+        bin_put_u16(ba, (guint16)g_variant_get_int16(v));
+        break;
+    case G_VARIANT_CLASS_UINT16:
+        bin_put_u16(ba, g_variant_get_uint16(v));
+        break;
+    case G_VARIANT_CLASS_INT32:
+        bin_put_u32(ba, (guint32)g_variant_get_int32(v));
+        break;
+    case G_VARIANT_CLASS_UINT32:
+        bin_put_u32(ba, g_variant_get_uint32(v));
+        break;
+    case G_VARIANT_CLASS_HANDLE:
+        bin_put_u32(ba, (guint32)g_variant_get_handle(v));
+        break;
+    case G_VARIANT_CLASS_INT64:
+        bin_put_u64(ba, (guint64)g_variant_get_int64(v));
+        break;
+    case G_VARIANT_CLASS_UINT64:
+        bin_put_u64(ba, g_variant_get_uint64(v));
+        break;
+    case G_VARIANT_CLASS_DOUBLE:
+        dbl.d = g_variant_get_double(v);
+        bin_put_u64(ba, dbl.u);
+        break;
+    case G_VARIANT_CLASS_VARIANT: {
+        GVariant *c = g_variant_get_variant(v);
+        bin_put_gvar(ba, c);
+        g_variant_unref(c);
+        break;
+    }
+    case G_VARIANT_CLASS_ARRAY:
+        tag = (guint8)strlen(type + 1);
+        g_byte_array_append(ba, &tag, 1);
+        g_byte_array_append(ba, (const guint8 *)(type + 1), tag);
+        /* FALLTHROUGH */
+    case G_VARIANT_CLASS_TUPLE:
+        n = g_variant_n_children(v);
+        bin_put_u32(ba, (guint32)n);
+        /* FALLTHROUGH */
+    case G_VARIANT_CLASS_DICT_ENTRY:
+        n = g_variant_n_children(v);
+        for ( ix = 0; ix < n; ix++ ) {
+            GVariant *c = g_variant_get_child_value(v, ix);
+            bin_put_gvar(ba, c);
+            g_variant_unref(c);
+        }
+        break;
+    default:
+        fprintf(fpinfo, "%s: %s cannot put type '%s'\n",
+                prog, "bin_put_gvar", type);
+        break;
+    }
+}
+
+static guint32
+bin_get_u32(const guint8 *p)
+{
+    return ((guint32)p[0] << 24) | ((guint32)p[1] << 16) |
+           ((guint32)p[2] << 8)  |  (guint32)p[3];
+}
+
+static guint64
+bin_get_u64(const guint8 *p)
+{
+    return ((guint64)bin_get_u32(p) << 32) | (guint64)bin_get_u32(p + 4);
+}
+
+/* drop a variant that might be floating */
+static void
+bin_gvar_drop(GVariant *v)
+{
+    g_variant_unref(g_variant_ref_sink(v));
+}
+
+/* make a variant from tagged data at *pp, no further than end;
+ * *pp is advanced past the value -- returns floating reference,
+ * or NULL if the data are bad */
+static GVariant*
+bin_get_gvar(const guint8 **pp, const guint8 *end, int depth)
+{
+#   define _BIN_NEED(n) ((size_t)(end - p) >= (size_t)(n))
+    const guint8 *p      = *pp;
+    GVariant     *result = NULL;
+    int          tag;
+    union { gdouble d; guint64 u; } dbl;
+
+    /* dbus limits nesting to 64, so will we */
+    if ( depth > 64 || ! _BIN_NEED(1) ) {
+        return NULL;
+    }
+
+    tag = *p++;
+
+    switch ( tag ) {
+    case 'b':
+        if ( _BIN_NEED(1) ) {
+            result = g_variant_new_boolean(*p++ ? TRUE : FALSE);
+        }
+        break;
+    case 'y':
+        if ( _BIN_NEED(1) ) {
+            result = g_variant_new_byte(*p++);
+        }
+        break;
+    case 'n':
+    case 'q':
+        if ( _BIN_NEED(2) ) {
+            guint16 v = (guint16)(((guint16)p[0] << 8) | p[1]);
+            p += 2;
+            result = tag == 'n' ? g_variant_new_int16((gint16)v)
+                                : g_variant_new_uint16(v);
+        }
+        break;
+    case 'i':
+    case 'u':
+    case 'h':
+        if ( _BIN_NEED(4) ) {
+            guint32 v = bin_get_u32(p);
+            p += 4;
+            result = tag == 'u' ? g_variant_new_uint32(v) :
+                     tag == 'h' ? g_variant_new_handle((gint32)v)
+                                : g_variant_new_int32((gint32)v);
+        }
+        break;
+    case 'x':
+    case 't':
+    case 'd':
+        if ( _BIN_NEED(8) ) {
+            dbl.u = bin_get_u64(p);
+            p += 8;
+            result = tag == 'x' ? g_variant_new_int64((gint64)dbl.u) :
+                     tag == 't' ? g_variant_new_uint64(dbl.u)
+                                : g_variant_new_double(dbl.d);
+        }
+        break;
+    case 's':
+    case 'o':
+    case 'g': {
+        guint32 n;
+        gchar   *s;
+
+        if ( ! _BIN_NEED(4) ) {
+            break;
+        }
+        n = bin_get_u32(p);
+        p += 4;
+        if ( ! _BIN_NEED(n) ) {
+            break;
+        }
+        s = g_strndup((const gchar *)p, n);
+        p += n;
+        if ( strlen(s) != n || ! g_utf8_validate(s, -1, NULL) ) {
+            /* embedded nul, or bad utf-8 */
+        } else if ( tag == 's' ) {
+            result = g_variant_new_string(s);
+        } else if ( tag == 'o' && g_variant_is_object_path(s) ) {
+            result = g_variant_new_object_path(s);
+        } else if ( tag == 'g' && g_variant_is_signature(s) ) {
+            result = g_variant_new_signature(s);
+        }
+        g_free(s);
+        break;
+    }
+    case 'v': {
+        GVariant *c = bin_get_gvar(&p, end, depth + 1);
+        if ( c != NULL ) {
+            result = g_variant_new_variant(c);
+        }
+        break;
+    }
+    case '{': {
+        GVariant *k, *v;
+
+        if ( (k = bin_get_gvar(&p, end, depth + 1)) == NULL ) {
+            break;
+        }
+        if ( ! g_variant_is_of_type(k, G_VARIANT_TYPE_BASIC) ||
+             (v = bin_get_gvar(&p, end, depth + 1)) == NULL ) {
+            bin_gvar_drop(k);
+            break;
+        }
+        result = g_variant_new_dict_entry(k, v);
+        break;
+    }
+    case 'a':
+    case '(': {
+        char              sig[_DBUS_DATATYPE_MAXLEN + 1];
+        const GVariantType *etype = NULL;
+        GPtrArray         *ch;
+        guint32           n, ix;
+
+        if ( tag == 'a' ) {
+            if ( ! _BIN_NEED(1) || ! _BIN_NEED(1 + *p) ) {
+                break;
+            }
+            n = *p++;
+            memcpy(sig, p, n);
+            sig[n] = '\0';
+            p += n;
+            if ( ! g_variant_type_string_is_valid(sig) ||
+                 ! g_variant_type_is_definite(G_VARIANT_TYPE(sig)) ) {
+                break;
+            }
+            etype = G_VARIANT_TYPE(sig);
+        }
+
+        if ( ! _BIN_NEED(4) ) {
+            break;
+        }
+        n = bin_get_u32(p);
+        p += 4;
+        /* each element is at least one byte */
+        if ( ! _BIN_NEED(n) ) {
+            break;
+        }
+
+        ch = g_ptr_array_sized_new(n);
+        for ( ix = 0; ix < n; ix++ ) {
+            GVariant *c = bin_get_gvar(&p, end, depth + 1);
+            if ( c == NULL ) {
+                break;
+            }
+            g_ptr_array_add(ch, c);
+            if ( etype != NULL && ! g_variant_is_of_type(c, etype) ) {
+                break;
+            }
+        }
+
+        if ( ix < n ) {
+            g_ptr_array_foreach(ch, (GFunc)bin_gvar_drop, NULL);
+        } else if ( tag == 'a' ) {
+            result = g_variant_new_array(etype,
+                                         (GVariant **)ch->pdata, n);
+        } else {
+            result = g_variant_new_tuple((GVariant **)ch->pdata, n);
+        }
+        g_ptr_array_free(ch, TRUE);
+        break;
+    }
+    default:
+        break;
+    }
+
+    if ( result == NULL ) {
+        fprintf(fpinfo, "%s: %s bad data, tag '%c'\n",
+                prog, "bin_get_gvar", tag);
+    }
+
+    *pp = p;
+    return result;
+#   undef _BIN_NEED
+}
+
+/* write whole frame with length prefix; 0 on success */
+static int
+bin_frame_write(mpris_data_struct *dat, GByteArray *ba)
+{
+    guint8 hdr[4];
+
+    hdr[0] = (guint8)(ba->len >> 24);
+    hdr[1] = (guint8)(ba->len >> 16);
+    hdr[2] = (guint8)(ba->len >> 8);
+    hdr[3] = (guint8)ba->len;
+
+    if ( fwrite(hdr, 1, sizeof(hdr), dat->fpwr) != sizeof(hdr) ||
+         fwrite(ba->data, 1, ba->len, dat->fpwr) != ba->len ) {
+        return -1;
+    }
+
+    fflush(dat->fpwr);
+    if ( ferror(dat->fpwr) || feof(dat->fpwr) ) {
+        return -1;
+    }
+
+    return 0;
+}
+
+/* read n bytes, with retry as in read_line(); 0 on success */
+static int
+_bin_fread(void *buf, size_t n, FILE *fptr)
+{
+    size_t got = 0;
+
+    errno = 0;
+    while ( got < n ) {
+        int e;
+
+        got += fread((char *)buf + got, 1, n - got, fptr);
+        if ( got == n ) {
+            break;
+        }
+
+        e = errno;
+        if ( got_common_signal ) {
+            return -1;
+        } else if ( ferror(fptr) && (e == EAGAIN || e == EINTR) ) {
+            clearerr(fptr);
+        } else {
+            return -1;
+        }
+        errno = 0;
+    }
+
+    return 0;
+}
+
+/* read a frame; return tuple of its values (not floating),
+ * or NULL on error */
+static GVariant*
+bin_frame_read(mpris_data_struct *dat)
+{
+    guint8       hdr[4];
+    guint8       *buf;
+    const guint8 *p;
+    guint32      len;
+    GPtrArray    *ch;
+    GVariant     *result = NULL;
+
+    if ( _bin_fread(hdr, sizeof(hdr), dat->fprd) ) {
+        fprintf(fpinfo, "%s unexpected mpris frame read end\n", prog);
+        return NULL;
+    }
+
+    len = bin_get_u32(hdr);
+    if ( len > MPRIS_FRAME_MAX ) {
+        fprintf(fpinfo, "%s mpris frame too large (%lu)\n",
+                prog, (unsigned long)len);
+        return NULL;
+    }
+
+    buf = g_malloc(len ? len : 1);
+    if ( _bin_fread(buf, len, dat->fprd) ) {
+        fprintf(fpinfo, "%s unexpected mpris frame read end\n", prog);
+        g_free(buf);
+        return NULL;
+    }
+
+    ch = g_ptr_array_new();
+    for ( p = buf; p < buf + len; ) {
+        GVariant *c = bin_get_gvar(&p, buf + len, 0);
+        if ( c == NULL ) {
+            break;
+        }
+        g_ptr_array_add(ch, c);
+    }
+
+    if ( p < buf + len ) {
+        g_ptr_array_foreach(ch, (GFunc)bin_gvar_drop, NULL);
+    } else {
+        result = g_variant_ref_sink(
+            g_variant_new_tuple((GVariant **)ch->pdata, ch->len));
+    }
+
+    g_ptr_array_free(ch, TRUE);
+    g_free(buf);
+
+    return result;
+}
+
+/* is frame value ix a string equal to s? */
+static int
+bin_resp_is(GVariant *resp, gsize ix, const char *s)
+{
+    GVariant *c;
+    int      r = 0;
+
+    if ( ix >= g_variant_n_children(resp) ) {
+        return 0;
+    }
+
+    c = g_variant_get_child_value(resp, ix);
+    if ( g_variant_is_of_type(c, G_VARIANT_TYPE_STRING) ) {
+        r = strcmp(g_variant_get_string(c, NULL), s) == 0;
+    }
+    g_variant_unref(c);
+
+    return r;
+}
+
+/* frame version of _exchange_handshake(): send ini, name and
+ * args, if not NULL (if spread, args is a tuple to be sent as
+ * its children) and put the reply in *resp, which caller must
+ * unref if not NULL -- return codes as _exchange_handshake() */
+static int
+_exchange_frame(mpris_data_struct *dat,
+                const char        *ini,
+                const char        *ack,
+                const char        *name,
+                GVariant          *args,
+                int               spread,
+                GVariant          **resp)
+{
+    GByteArray *ba = g_byte_array_sized_new(256);
+    int        r;
+
+    *resp = NULL;
+
+    bin_put_str(ba, 's', ini);
+    bin_put_str(ba, 's', name);
+
+    if ( args != NULL && spread ) {
+        gsize ix, n = g_variant_n_children(args);
+        for ( ix = 0; ix < n; ix++ ) {
+            GVariant *c = g_variant_get_child_value(args, ix);
+            bin_put_gvar(ba, c);
+            g_variant_unref(c);
+        }
+    } else if ( args != NULL ) {
+        bin_put_gvar(ba, args);
+    }
+
+    r = bin_frame_write(dat, ba);
+    g_byte_array_free(ba, TRUE);
+
+    if ( r ) {
+        fprintf(fpinfo, "%s error writing to mpris client (f)\n", prog);
+        return _EXCHGHS_WR_ERR;
+    }
+
+    if ( (*resp = bin_frame_read(dat)) == NULL ) {
+        return _EXCHGHS_RD_ERR;
+    }
+
+    if ( bin_resp_is(*resp, 0, "UNSUPPORTED") ) {
+        return _EXCHGHS_ACKREJ;
+    } else if ( bin_resp_is(*resp, 0, "ACK:NA") ) {
+        return _EXCHGHS_ACK_NA;
+    } else if ( ! bin_resp_is(*resp, 0, ack) ) {
+        fprintf(fpinfo, "%s unexpected mpris client frame for '%s'\n",
+                prog, ini);
+        return _EXCHGHS_ACK_NG;
+    }
+
+    return _EXCHGHS_ALL_OK;
+}
+
+/* offer the client protocol version 2; a client that does
+ * not know it replies UNSUPPORTED, and text lines are used */
+static int
+negotiate_mpris_proto(mpris_data_struct *dat)
+{
+    ssize_t rdlen;
+
+    dat->proto = MPRIS_PROTO_TEXT;
+
+    fprintf(dat->fpwr, "%s\n", "proto:2");
+    fflush(dat->fpwr);
+    if ( ferror(dat->fpwr) || feof(dat->fpwr) ) {
+        fprintf(fpinfo, "%s error writing to mpris client (p)\n", prog);
+        return dat->proto;
+    }
+
+    rdlen = read_line_dat(dat);
+    if ( rdlen < 1 ) {
+        fprintf(fpinfo, "%s unexpected mpris read end (%ld) (p)\n",
+                prog, (long int)rdlen);
+        return dat->proto;
+    }
+
+    unnl_len(dat->buf, rdlen);
+
+    if ( strcmp(dat->buf, "proto:2") == 0 ) {
+        dat->proto = MPRIS_PROTO_BIN;
+    }
+
+    fprintf(fpinfo, "%s mpris client protocol %d ('%s')\n",
+            prog, dat->proto, dat->buf);
+
+    return dat->proto;
+}
+
 /* convenience function: get from GVariant with g_variant_get
  * if type matches type (format) string; else, _assume_ the
  * variant is a container type and use g_variant_get_child --
@@ -1581,6 +2148,34 @@ put_args_from_gvar(const char *types,
                 if ( ok ) {
                     g_free(v);
                 }
+            } else if ( p[0] == 'a' && p[2] == '\0' &&
+                        (p[1] == 's' || p[1] == 'o' || p[1] == 'g') ) {
+                /* array of strings, e.g. TrackList 'ao' args:
+                 * one element per line, then the end marker
+                 * as with arrays from client (gvar_from_strings) */
+                GVariant     *arr;
+                GVariantIter iter;
+                gchar        *v;
+
+                if ( g_variant_is_of_type(parameters, G_VARIANT_TYPE(p)) ) {
+                    arr = g_variant_ref(parameters);
+                } else {
+                    arr = g_variant_get_child_value(parameters, ix);
+                }
+
+                g_variant_iter_init(&iter, arr);
+                while ( r >= 0 && g_variant_iter_next(&iter, p + 1, &v) ) {
+                    int r2 = fprintf(dat->fpwr, "%s\n", (const char *)v);
+                    g_free(v);
+                    r = r2 < 0 ? r2 : r + r2;
+                }
+
+                if ( r >= 0 ) {
+                    int r2 = fprintf(dat->fpwr, "%s\n", ":END ARRAY:");
+                    r = r2 < 0 ? r2 : r + r2;
+                }
+
+                g_variant_unref(arr);
             }
 
             if ( r < 0 ) {
@@ -1912,6 +2507,7 @@ gvar_from_strings(const char *type,
             GVariant        **ch_vec = NULL;
             gsize           ch_cnt   = 0;
             size_t          ch_asz   = 0, ch_ainc = 4;
+            const gchar     *tend    = NULL;
             int             ccl      = ')';
             int             br = 0;
 
@@ -1923,8 +2519,17 @@ gvar_from_strings(const char *type,
 
             *ep = '\0';
 
-            for ( ; *t != '\0'; t++ ) {
-                GVariant *var = NULL;
+            for ( ; *t != '\0'; t = (char *)tend ) {
+                GVariant    *var = NULL;
+                char        *et;
+                size_t      elen;
+
+                /* one complete type, e.g. 'a{sv}' in '(a{sv}o)' */
+                if ( ! g_variant_type_string_scan(t, NULL, &tend) ) {
+                    fprintf(fpinfo,
+                            "%s: internal error (D,6) '%s'\n", prog, t);
+                    br = 1; break;
+                }
 
                 if ( v == NULL ) {
                     rdlen = read_line_dat(dat);
@@ -1939,7 +2544,13 @@ gvar_from_strings(const char *type,
 
                 unnl(v);
 
-                var = gvar_from_strings(t, v, dat);
+                elen = (size_t)(tend - t);
+                et = LALLOC(elen + 1);
+                memcpy(et, t, elen);
+                et[elen] = '\0';
+
+                var = gvar_from_strings(et, v, dat);
+                LAFREE(et);
                 if ( var == NULL ) {
                     while ( ch_cnt > 0 ) {
                         g_free(ch_vec[--ch_cnt]);
@@ -1957,12 +2568,6 @@ gvar_from_strings(const char *type,
 
                 ch_vec[ch_cnt++] = var;
 
-                if ( *t == '(' || *t == '{' ) {
-                    int rtc = *t == '(' ? ')' : '}';
-                    /* gvar_from_strings() != NULL implies OK */
-                    t = strrchr(t, rtc);
-                }
-
                 v = NULL;
             }
 
@@ -1988,6 +2593,197 @@ gvar_from_strings(const char *type,
  * and signal emission
  */
 
+#define _ix_object_path 0
+#define _ix_iface_name  1
+#define _ix_signal_name 2
+#define _ix_signal_type 3 /* !!! "property" or "signal" */
+#define _ix_format_str  4
+#define _n_sigparams    5
+
+/* emit a signal fetched from client, as sigparams above (the
+ * format string is not used here) and the signal parameters,
+ * which are consumed if floating -- returns as below */
+static int
+_mpris_emit_sigparams(mpris_data_struct *dat,
+                      gchar             **sigparams,
+                      GVariant          *parameters)
+{
+    gboolean gret;
+    GError   *error = NULL;
+
+    /*
+     * Two signal types need handling:
+     *  1) a signal defined for the interface in question
+     *  2) a signal that a property of the interface changed
+     * type 2 is more complicated since it is raised through
+     * org.freedesktop.DBus.Properties interface with the
+     * PropertiesChanged changed signal, and the MPRIS2
+     * interface and its property and new data must be packed
+     * into a glib variant as the argument --
+     * the property case is handled in this 1st block,
+     * the simpler case in the next block.
+     * A client batch of changed properties is type "properties"
+     * and parameters are then the a{sv} of names and values.
+     */
+    if ( S_CS_EQ(sigparams[_ix_signal_type], "property") ||
+         S_CS_EQ(sigparams[_ix_signal_type], "properties") ) {
+        static const gchar *iface_properties =
+                            "org.freedesktop.DBus.Properties";
+        static const gchar *sname_properties =
+                            "PropertiesChanged";
+        GVariantBuilder *builder = NULL;
+        GVariant        *ptuple[3];
+
+        if ( S_CS_EQ(sigparams[_ix_signal_type], "properties") ) {
+            if ( ! g_variant_is_of_type(parameters,
+                                        G_VARIANT_TYPE_VARDICT) ) {
+                fprintf(fpinfo, "%s: properties signal type '%s'\n",
+                        prog, g_variant_get_type_string(parameters));
+                bin_gvar_drop(parameters);
+                return _n_sigparams + _EXCHGHS_ERRMAX + 2;
+            }
+            ptuple[1] = parameters;
+        } else {
+            builder = g_variant_builder_new(G_VARIANT_TYPE_ARRAY);
+            g_variant_builder_add(builder,
+                                  "{sv}",
+                                  sigparams[_ix_signal_name],
+                                  parameters);
+            ptuple[1] = g_variant_builder_end(builder);
+        }
+
+        ptuple[0] = g_variant_new_string(sigparams[_ix_iface_name]);
+        ptuple[2] = g_variant_new_strv(NULL, 0);
+
+        fprintf(fpinfo, "%s: calling %s(%p, %s, %s, %s, %s, %p)\n",
+                        prog,
+                        "g_dbus_connection_emit_signal",
+                        (void *)dat->connection,
+                        "[NULL]",
+                        (char *)sigparams[_ix_object_path],
+                        (char *)iface_properties,
+                        (char *)sigparams[_ix_signal_name],
+                        (void *)parameters);
+        gret = g_dbus_connection_emit_signal(dat->connection,
+                                     NULL,
+                                     sigparams[_ix_object_path],
+                                     iface_properties,
+                                     sname_properties,
+                                     g_variant_new_tuple(ptuple,
+                                                  A_SIZE(ptuple)),
+                                     &error);
+
+        if ( builder != NULL ) {
+            g_variant_builder_unref(builder);
+        }
+
+    } else if ( S_CS_EQ(sigparams[_ix_signal_type], "signal") ) {
+        fprintf(fpinfo, "%s: calling %s(%p, %s, %s, %s, %s, %p)\n",
+                        prog,
+                        "g_dbus_connection_emit_signal",
+                        (void *)dat->connection,
+                        "[NULL]",
+                        (char *)sigparams[_ix_object_path],
+                        (char *)sigparams[_ix_iface_name],
+                        (char *)sigparams[_ix_signal_name],
+                        (void *)parameters);
+        gret = g_dbus_connection_emit_signal(dat->connection,
+                                         NULL,
+                                         sigparams[_ix_object_path],
+                                         sigparams[_ix_iface_name],
+                                         sigparams[_ix_signal_name],
+                                         parameters,
+                                         &error);
+    } else {
+        fprintf(fpinfo, "%s: unknown signal type '%s' for '%s'\n",
+                        prog,
+                        (char *)sigparams[_ix_signal_type],
+                        (char *)sigparams[_ix_signal_name]);
+
+        bin_gvar_drop(parameters);
+        return _n_sigparams + _EXCHGHS_ERRMAX + 2;
+    }
+
+    if ( error != NULL ) {
+        fprintf(fpinfo,
+            "%s: error: g_dbus_connection_emit_signal (%d, '%s')\n",
+            prog, (int)error->code, (char *)error->message);
+        g_error_free(error);
+    }
+    if ( gret != TRUE ) {
+        return _n_sigparams + _EXCHGHS_ERRMAX + 1;
+    }
+
+    return _EXCHGHS_ALL_OK;
+}
+
+/* frame version of the signal fetch: the reply is
+ * s:signal, then sigparams but the format string, then value */
+static int
+_mpris_emit_signal_bin(const char        *ini,
+                       const char        *ack,
+                       mpris_data_struct *dat)
+{
+    int      ret;
+    size_t   sz;
+    gchar    *sigparams[_n_sigparams];
+    GVariant *resp;
+
+    ret = _exchange_frame(dat, ini, ack, "signaldata", NULL, 0, &resp);
+
+    memset(sigparams, 0, sizeof(sigparams));
+
+    do { /* breakable block */
+        GVariant *parameters;
+
+        if ( ret != _EXCHGHS_ALL_OK ) {
+            break;
+        }
+
+        if ( g_variant_n_children(resp) != _n_sigparams + 1 ) {
+            fprintf(fpinfo, "%s: %s frame has %lu values\n", prog,
+                    "_mpris_emit_signal_bin",
+                    (unsigned long)g_variant_n_children(resp));
+            ret = _n_sigparams + _EXCHGHS_ERRMAX;
+            break;
+        }
+
+        for ( sz = 0; sz < _ix_format_str; sz++ ) {
+            GVariant *c = g_variant_get_child_value(resp, sz + 1);
+
+            if ( g_variant_is_of_type(c, G_VARIANT_TYPE_STRING) ) {
+                sigparams[sz] = g_variant_dup_string(c, NULL);
+            }
+            g_variant_unref(c);
+
+            if ( sigparams[sz] == NULL ) {
+                ret = (int)sz + _EXCHGHS_ERRMAX + 1;
+                break;
+            }
+        }
+
+        if ( ret != _EXCHGHS_ALL_OK ) {
+            break;
+        }
+
+        parameters = g_variant_get_child_value(resp, _n_sigparams);
+        ret = _mpris_emit_sigparams(dat, sigparams, parameters);
+        g_variant_unref(parameters);
+    } while ( 0 );
+
+    for ( sz = 0; sz < A_SIZE(sigparams); sz++ ) {
+        if ( sigparams[sz] != 0 ) {
+            g_free(sigparams[sz]);
+        }
+    }
+
+    if ( resp != NULL ) {
+        g_variant_unref(resp);
+    }
+
+    return ret;
+}
+
 /* dore proc to *fetch* mpris signal -- this returns
  * 0 (_EXCHGHS_ALL_OK) on success, else greater than 0;
  * must only return < 0 when indicating IO error, as
@@ -1999,14 +2795,12 @@ _mpris_emit_signal(const char        *ini,
 {
     int    ret;
     size_t sz;
-#   define _ix_object_path 0
-#   define _ix_iface_name  1
-#   define _ix_signal_name 2
-#   define _ix_signal_type 3 /* !!! "property" or "signal" */
-#   define _ix_format_str  4
-#   define _n_sigparams    5
     gchar  *sigparams[_n_sigparams];
 
+    if ( dat->proto == MPRIS_PROTO_BIN ) {
+        return _mpris_emit_signal_bin(ini, ack, dat);
+    }
+
     ret = _exchange_handshake(dat, ini, ack, "signaldata");
 
     if ( ret != _EXCHGHS_ALL_OK ) {
@@ -2022,10 +2816,8 @@ _mpris_emit_signal(const char        *ini,
 
     do { /* breakable block */
         GVariant *parameters;
-        gboolean gret;
         ssize_t  rdlen;
         char     *p, *p2;
-        GError   *error = NULL;
         int      br = 0;
 
         /* get g_dbus_connection_emit_signal parameters
@@ -2070,93 +2862,7 @@ _mpris_emit_signal(const char        *ini,
             break;
         }
 
-        /*
-         * Two signal types need handling:
-         *  1) a signal defined for the interface in question
-         *  2) a signal that a property of the interface changed
-         * type 2 is more complicated since it is raised through
-         * org.freedesktop.DBus.Properties interface with the
-         * PropertiesChanged changed signal, and the MPRIS2
-         * interface and its property and new data must be packed
-         * into a glib variant as the argument --
-         * the property case is handled in this 1st block,
-         * the simpler case in the next block.
-         */
-        if ( S_CS_EQ(sigparams[_ix_signal_type], "property") ) {
-            static const gchar *iface_properties =
-                                "org.freedesktop.DBus.Properties";
-            static const gchar *sname_properties =
-                                "PropertiesChanged";
-            GVariantBuilder *builder;
-            GVariant        *ptuple[3];
-
-            builder = g_variant_builder_new(G_VARIANT_TYPE_ARRAY);
-            g_variant_builder_add(builder,
-                                  "{sv}",
-                                  sigparams[_ix_signal_name],
-                                  parameters);
-
-            ptuple[0] = g_variant_new_string(sigparams[_ix_iface_name]);
-            ptuple[1] = g_variant_builder_end(builder);
-            ptuple[2] = g_variant_new_strv(NULL, 0);
-
-            fprintf(fpinfo, "%s: calling %s(%p, %s, %s, %s, %s, %p)\n",
-                            prog,
-                            "g_dbus_connection_emit_signal",
-                            (void *)dat->connection,
-                            "[NULL]",
-                            (char *)sigparams[_ix_object_path],
-                            (char *)iface_properties,
-                            (char *)sigparams[_ix_signal_name],
-                            (void *)parameters);
-            gret = g_dbus_connection_emit_signal(dat->connection,
-                                         NULL,
-                                         sigparams[_ix_object_path],
-                                         iface_properties,
-                                         sname_properties,
-                                         g_variant_new_tuple(ptuple,
-                                                      A_SIZE(ptuple)),
-                                         &error);
-
-            g_variant_builder_unref(builder);
-
-        } else if ( S_CS_EQ(sigparams[_ix_signal_type], "signal") ) {
-            fprintf(fpinfo, "%s: calling %s(%p, %s, %s, %s, %s, %p)\n",
-                            prog,
-                            "g_dbus_connection_emit_signal",
-                            (void *)dat->connection,
-                            "[NULL]",
-                            (char *)sigparams[_ix_object_path],
-                            (char *)sigparams[_ix_iface_name],
-                            (char *)sigparams[_ix_signal_name],
-                            (void *)parameters);
-            gret = g_dbus_connection_emit_signal(dat->connection,
-                                             NULL,
-                                             sigparams[_ix_object_path],
-                                             sigparams[_ix_iface_name],
-                                             sigparams[_ix_signal_name],
-                                             parameters,
-                                             &error);
-        } else {
-            fprintf(fpinfo, "%s: unknown signal type '%s' for '%s'\n",
-                            prog,
-                            (char *)sigparams[_ix_signal_type],
-                            (char *)sigparams[_ix_signal_name]);
-
-            ret = _n_sigparams + _EXCHGHS_ERRMAX + 2;
-            break;
-        }
-
-        if ( error != NULL ) {
-            fprintf(fpinfo,
-                "%s: error: g_dbus_connection_emit_signal (%d, '%s')\n",
-                prog, (int)error->code, (char *)error->message);
-            g_error_free(error);
-        }
-        if ( gret != TRUE ) {
-            ret = _n_sigparams + _EXCHGHS_ERRMAX + 1;
-            break;
-        }
+        ret = _mpris_emit_sigparams(dat, sigparams, parameters);
     } while ( 0 );
 
     for ( sz = 0; sz < A_SIZE(sigparams); sz++ ) {
@@ -2168,6 +2874,50 @@ _mpris_emit_signal(const char        *ini,
     return ret;
 }
 
+/* frame version of the method call exchange: returns a reply
+ * string as the text version would have in _mpris_call_method(),
+ * with "RETURN" and *result set if the method returns a value */
+static const char *
+_mpris_call_method_bin(mpris_data_struct *dat,
+                       const char        *ini,
+                       const char        *ack,
+                       const gchar       *method_name,
+                       GVariant          *parameters,
+                       GVariant          **result)
+{
+    GVariant   *resp;
+    const char *p2;
+    int        r;
+
+    r = _exchange_frame(dat, ini, ack, method_name,
+                        parameters, 1, &resp);
+
+    if ( r < 0 ) {
+        fprintf(fpinfo, "%s mpris frame %s error (b1)\n",
+            prog, r == _EXCHGHS_WR_ERR ? "write" : "read");
+        p2 = r == _EXCHGHS_WR_ERR ? "IO ERROR: w" : "IO ERROR: r";
+    } else if ( r != _EXCHGHS_ALL_OK ) {
+        p2 = r & _EXCHGHS_ACKREJ ? "ERROR: handshake rejected"
+                                 : "ERROR: handshake incorrect";
+    } else if ( bin_resp_is(resp, 1, "VOID") ) {
+        p2 = "VOID";
+    } else if ( bin_resp_is(resp, 1, "UNSUPPORTED") ) {
+        p2 = "UNSUPPORTED";
+    } else if ( bin_resp_is(resp, 1, "RETURN") &&
+                g_variant_n_children(resp) == 3 ) {
+        *result = g_variant_get_child_value(resp, 2);
+        p2 = "RETURN";
+    } else {
+        p2 = "ERROR: type(f)";
+    }
+
+    if ( resp != NULL ) {
+        g_variant_unref(resp);
+    }
+
+    return p2;
+}
+
 static void
 _mpris_call_method(GDBusConnection *connection,
                    const gchar *sender,
@@ -2181,7 +2931,8 @@ _mpris_call_method(GDBusConnection *connection,
                    const char  *ack)
 {
     mpris_data_struct *dat = (mpris_data_struct *)user_data;
-    char *p, *p2;
+    char *p = NULL, *p2;
+    GVariant *result = NULL;
     ssize_t rdlen;
     int r;
 
@@ -2203,6 +2954,13 @@ _mpris_call_method(GDBusConnection *connection,
     }
 
     do { /* breakable block */
+        if ( dat->proto == MPRIS_PROTO_BIN ) {
+            p2 = (char *)_mpris_call_method_bin(dat, ini, ack,
+                                                method_name,
+                                                parameters, &result);
+            break;
+        }
+
         r = _exchange_handshake(dat, ini, ack, method_name);
         if ( r < 0 ) {
             fprintf(fpinfo, "%s mpris handshake %s error (b1)\n",
@@ -2283,9 +3041,17 @@ _mpris_call_method(GDBusConnection *connection,
             interface_name, method_name);
     } else if ( S_CI_EQ(p2, "VOID") ) {
         g_dbus_method_invocation_return_value(invocation, NULL);
-    /* TODO: handle return types - before TrackList or Playlists
-    } else if (  ) {
-    */
+    /* return value from frame (not floating) */
+    } else if ( S_CI_EQ(p2, "RETURN") && result != NULL ) {
+        g_dbus_method_invocation_return_value(invocation,
+                                    g_variant_new_tuple(&result, 1));
+        g_variant_unref(result);
+    /* return value, e.g. 'aa{sv}' for TrackList.GetTracksMetadata;
+     * the method reply wants the value(s) in a tuple */
+    } else if ( p != NULL &&
+                (result = gvar_from_strings(p2, p, dat)) != NULL ) {
+        g_dbus_method_invocation_return_value(invocation,
+                                    g_variant_new_tuple(&result, 1));
     } else {
         g_dbus_method_invocation_return_error(
             invocation, G_DBUS_ERROR, G_DBUS_ERROR_UNKNOWN_METHOD,
@@ -2323,6 +3089,26 @@ _mpris_get_property(GDBusConnection *connection,
         return NULL;
     }
 
+    if ( dat->proto == MPRIS_PROTO_BIN ) {
+        GVariant *resp;
+
+        if ( _exchange_frame(dat, ini, ack, property_name,
+                             NULL, 0, &resp) == _EXCHGHS_ALL_OK &&
+             g_variant_n_children(resp) == 2 ) {
+            result = g_variant_get_child_value(resp, 1);
+        } else {
+            fprintf(fpinfo, "%s mpris frame '%s' failure (b3)\n",
+                prog, ini);
+        }
+
+        if ( resp != NULL ) {
+            g_variant_unref(resp);
+        }
+
+        --reenter_guard;
+        return result;
+    }
+
     if ( _exchange_handshake(dat, ini, ack, property_name) ) {
         fprintf(fpinfo, "%s mpris handshake '%s' failure (b3)\n",
             prog, ini);
@@ -2376,6 +3162,26 @@ _mpris_set_property(GDBusConnection *connection,
         return 0;
     }
 
+    if ( dat->proto == MPRIS_PROTO_BIN ) {
+        GVariant *resp;
+
+        if ( _exchange_frame(dat, ini, ack, property_name,
+                             value, 0, &resp) == _EXCHGHS_ALL_OK &&
+             bin_resp_is(resp, 1, "ok") ) {
+            result = 1;
+        } else {
+            fprintf(fpinfo, "%s mpris frame '%s' failure (b2)\n",
+                prog, ini);
+        }
+
+        if ( resp != NULL ) {
+            g_variant_unref(resp);
+        }
+
+        --reenter_guard;
+        return result;
+    }
+
     if ( _exchange_handshake(dat, ini, ack, property_name) ) {
         fprintf(fpinfo, "%s mpris handshake '%s' failure (b2)\n",
             prog, ini);
@@ -2582,6 +3388,64 @@ static const GDBusInterfaceVTable player_interface_vtable = {
     cb_player_set_property
 };
 
+/*
+** org.mpris.MediaPlayer2.TrackList [tracklist]
+*/
+
+/* tracklist callbacks */
+static void
+cb_tracklist_methods(GDBusConnection *connection,
+                     const gchar *sender,
+                     const gchar *object_path,
+                     const gchar *interface_name,
+                     const gchar *method_name,
+                     GVariant    *parameters,
+                     GDBusMethodInvocation *invocation,
+                     gpointer    user_data)
+{
+    static const char *ini = "tracklist:method";
+    static const char *ack = "method";
+
+    _mpris_call_method(connection,
+                       sender,
+                       object_path,
+                       interface_name,
+                       method_name,
+                       parameters,
+                       invocation,
+                       user_data,
+                       ini, ack);
+}
+
+static GVariant*
+cb_tracklist_get_property(GDBusConnection *connection,
+                          const gchar *sender,
+                          const gchar *object_path,
+                          const gchar *interface_name,
+                          const char  *property_name,
+                          GError      **error,
+                          gpointer    user_data)
+{
+    static const char *ini = "tracklist:getproperty";
+    static const char *ack = "getproperty";
+
+    return _mpris_get_property(connection,
+                               sender,
+                               object_path,
+                               interface_name,
+                               property_name,
+                               error,
+                               user_data,
+                               ini, ack);
+}
+
+/* TrackList has no writable properties */
+static const GDBusInterfaceVTable tracklist_interface_vtable = {
+    cb_tracklist_methods,
+    cb_tracklist_get_property,
+    NULL
+};
+
 static void
 mp_bus_acquired(GDBusConnection *connection,
                 const gchar *name,
@@ -2609,6 +3473,14 @@ mp_bus_acquired(GDBusConnection *connection,
                                           user_data,
                                           NULL, NULL);
 
+    dat->reg_ids[2] =
+        g_dbus_connection_register_object(connection,
+                                          mpris_path,
+                                          interfaces[2],
+                                          &tracklist_interface_vtable,
+                                          user_data,
+                                          NULL, NULL);
+
     fprintf(fpinfo, "%s: Acquired data bus '%s' (%s)\n",
             prog, dat->bus_name, name);
 }
@@ -2636,9 +3508,9 @@ mp_name_lost(GDBusConnection *connection,
                                             dat->reg_ids[0]);
         g_dbus_connection_unregister_object(dat->connection,
                                             dat->reg_ids[1]);
-        /* as the TrackList and PlayLists interfaces are done:
         g_dbus_connection_unregister_object(dat->connection,
                                             dat->reg_ids[2]);
+        /* as the PlayLists interface is done:
         g_dbus_connection_unregister_object(dat->connection,
                                             dat->reg_ids[3]);
          */
@@ -2676,6 +3548,10 @@ signal_mpris_service(mpris_data_struct *dat)
 static int
 start_mpris_service(mpris_data_struct *dat)
 {
+    if ( dat->proto == 0 ) {
+        negotiate_mpris_proto(dat);
+    }
+
     put_mpris_bus_name(dat, appname, 0);
 
     dat->node_info = g_dbus_node_info_new_for_xml(mpris_node_xml, NULL);
@@ -2734,9 +3610,9 @@ stop_mpris_service(mpris_data_struct *dat)
                                             dat->reg_ids[0]);
         g_dbus_connection_unregister_object(dat->connection,
                                             dat->reg_ids[1]);
-        /* as the TrackList and PlayLists interfaces are done:
         g_dbus_connection_unregister_object(dat->connection,
                                             dat->reg_ids[2]);
+        /* as the PlayLists interface is done:
         g_dbus_connection_unregister_object(dat->connection,
                                             dat->reg_ids[3]);
          */
@@ -2828,5 +3704,41 @@ static const char *mpris_node_xml =
 "           <annotation name='org.freedesktop.DBus.Property.EmitsChangedSignal' value='false'/>"
 "       </property>"
 "   </interface>"
+"   <interface name='org.mpris.MediaPlayer2.TrackList'>"
+"       <method name='GetTracksMetadata'>"
+"           <arg name='TrackIds'     type='ao'     direction='in'/>"
+"           <arg name='Metadata'     type='aa{sv}' direction='out'/>"
+"       </method>"
+"       <method name='AddTrack'>"
+"           <arg name='Uri'          type='s'/>"
+"           <arg name='AfterTrack'   type='o'/>"
+"           <arg name='SetAsCurrent' type='b'/>"
+"       </method>"
+"       <method name='RemoveTrack'>"
+"           <arg name='TrackId'      type='o'/>"
+"       </method>"
+"       <method name='GoTo'>"
+"           <arg name='TrackId'      type='o'/>"
+"       </method>"
+"       <signal name='TrackListReplaced'>"
+"           <arg name='Tracks'       type='ao'     direction='out'/>"
+"           <arg name='CurrentTrack' type='o'      direction='out'/>"
+"       </signal>"
+"       <signal name='TrackAdded'>"
+"           <arg name='Metadata'     type='a{sv}'  direction='out'/>"
+"           <arg name='AfterTrack'   type='o'      direction='out'/>"
+"       </signal>"
+"       <signal name='TrackRemoved'>"
+"           <arg name='TrackId'      type='o'      direction='out'/>"
+"       </signal>"
+"       <signal name='TrackMetadataChanged'>"
+"           <arg name='TrackId'      type='o'      direction='out'/>"
+"           <arg name='Metadata'     type='a{sv}'  direction='out'/>"
+"       </signal>"
+"       <property access='read'      name='Tracks'        type='ao'>"
+"           <annotation name='org.freedesktop.DBus.Property.EmitsChangedSignal' value='invalidates'/>"
+"       </property>"
+"       <property access='read'      name='CanEditTracks' type='b'/>"
+"   </interface>"
 "</node>";
 
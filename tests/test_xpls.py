@@ -0,0 +1,89 @@
+# coding=utf-8
+# wxPython media, audio/visual player -- extended .pls round trip
+#
+# Copyright (C) 2019 Ed Hynan
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+
+"""
+wr_xpls_file() then AVGroupList.chew_dat(): the #Meta<n> comments
+(measured size, exact length, stable flag) must come back for every
+entry, the last one included.
+"""
+
+import io, os, sys
+
+import pytest
+
+pytest.importorskip("wx")
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import wxmav_main as wxm
+
+
+class _App(object):
+    def err_msg(self, msg):
+        pass
+
+    def prdbg(self, *args):
+        pass
+
+
+def _round_trip(monkeypatch, items):
+    monkeypatch.setattr(wxm.wx, "GetApp", lambda: _App())
+    out = io.StringIO()
+    grp = wxm.AVGroup(desc = wxm._T("test group"), data = items)
+    assert wxm.wr_xpls_file(out, grp, do_close = False)
+    lines = [l.strip() for l in out.getvalue().split("\n")]
+    dat, desc = wxm.AVGroupList.chew_dat([l for l in lines if l])
+    assert desc == wxm._T("test group")
+    return dat
+
+
+def _mk_item(n, size = None, length = -1, stable = False):
+    it = wxm.AVItem(resname = wxm._T("/tmp/track{}.mkv").format(n),
+                    length = length)
+    if size:
+        it.comment = wxm._T("{}x{}").format(*size)
+    it.len_stable = stable
+    return it
+
+
+def test_meta_every_entry(monkeypatch):
+    items = [_mk_item(n, (640, 480), 100000, True) for n in (1, 2, 3)]
+    dat = _round_trip(monkeypatch, items)
+    assert len(dat) == 3
+    for it in dat:
+        assert it.get_vsize() == (640, 480)
+        assert it.length == 100000
+        assert it.len_stable
+
+
+def test_meta_partial(monkeypatch):
+    items = [_mk_item(1, (320, 240)),
+             _mk_item(2),
+             _mk_item(3, length = 61234, stable = True)]
+    dat = _round_trip(monkeypatch, items)
+    assert len(dat) == 3
+    assert dat[0].get_vsize() == (320, 240)
+    assert not dat[0].len_stable
+    assert dat[1].get_vsize() is None
+    assert dat[1].length == -1
+    assert dat[2].get_vsize() is None
+    assert dat[2].length == 61234
+    assert dat[2].len_stable
@@ -21,6 +21,10 @@
 
 
 import os
+import time
+
+# for -startup-profile, see startup_mark()
+_startup_t0 = time.time()
 
 # Unix-like with GTK systems use gstreamer as media backend.
 # gstreamer leaves applications to invoke XInitThreads()
@@ -71,21 +75,26 @@ if os.name == 'posix' and ('DISPLAY' in os.environ):
 
 
 import codecs
+import collections
 import copy
+import json
 import math
 import random
 import re
 import select
 import shutil
 import signal
+import struct
 import sys
 import threading
-import time
 try:
-    import urllib.error
+    # urllib.request (http.client, email, ssl ...) is costly
+    # to import and is needed only to open a URL, so it is
+    # imported on first use -- see uri_open_fd()
     import urllib.parse
-    import urllib.request
-    uriopen = urllib.request.urlopen
+    def uriopen(*args, **kwargs):
+        import urllib.request
+        return urllib.request.urlopen(*args, **kwargs)
     uri_quote = urllib.parse.quote
     uri_quote_plus = urllib.parse.quote_plus
     uri_quote_bytes = urllib.parse.quote_from_bytes
@@ -141,14 +150,27 @@ except ImportError:
 from wx.lib.embeddedimage import PyEmbeddedImage
 
 have_tagsmod = False
-# mutagen is a media file tag module in pure python
+# mutagen is a media file tag module in pure python -- it is
+# found here, but imported on first use (get_mutagen())
+mutagen = None
 if not have_tagsmod:
     try:
-        import mutagen
-        have_mutagen = True
-        have_tagsmod = True
+        from importlib.util import find_spec
+        have_mutagen = find_spec("mutagen") != None
     except ImportError:
-        have_mutagen = False
+        import imp
+        try:
+            imp.find_module("mutagen")
+            have_mutagen = True
+        except ImportError:
+            have_mutagen = False
+    have_tagsmod = have_mutagen
+
+def get_mutagen():
+    global mutagen
+    if mutagen == None:
+        import mutagen
+    return mutagen
 
 
 """
@@ -226,6 +248,32 @@ main proc to get the show on the road
 # ignored elsewise
 x_helper_prog = None
 
+##
+## startup phase times, if option -startup-profile is given
+##
+_startup_prof = None
+if "-startup-profile" in sys.argv or "--startup-profile" in sys.argv:
+    _startup_prof = [("module start", _startup_t0)]
+
+def startup_mark(phase):
+    if _startup_prof != None:
+        _startup_prof.append((phase, time.time()))
+
+# write the phases to stderr, once
+def startup_report():
+    global _startup_prof
+    if not _startup_prof:
+        return
+    p, _startup_prof = _startup_prof, None
+    t0 = tp = p[0][1]
+    for nm, tm in p:
+        sys.stderr.write("startup: {:<28} {:9.1f} ms (+{:.1f})\n".format(
+                         nm, (tm - t0) * 1000.0, (tm - tp) * 1000.0))
+        tp = tm
+    sys.stderr.flush()
+
+startup_mark("module imports")
+
 ##
 ## main function callable if this is imported as module,
 ## or herein in a if __name__ == '__main__': block
@@ -243,6 +291,7 @@ def wxmav_main(argv = None, x_help_path = None):
         import wx.lib.inspection
         wx.lib.inspection.InspectionTool().Show()
 
+    startup_mark("module loaded")
     app = TheAppClass(ac = len(argv), av = argv)
     app.MainLoop()
     # FPO: not reached
@@ -420,11 +469,14 @@ if not py_v_is_3:
                 pass
         return s
 
+    def fd_encode(s):
+        return _T(s).encode(_ucode_type)
+
     def fd_write(fd, s):
         # sys.version
         # 2.7.13 (default, Jun 26 2017, 10:20:05) \n
         #  [GCC 7.1.1 20170622 (Red Hat 7.1.1-3)]
-        os.write(fd, _T(s).encode(_ucode_type))
+        os.write(fd, fd_encode(s))
         # sys.version
         #
         #os.write(fd, s)
@@ -450,8 +502,21 @@ else:
             return _Tencode(s)
         return s
 
+    def fd_encode(s):
+        return _Tnec(s).encode('utf_8')
+
     def fd_write(fd, s):
-        os.write(fd, _Tnec(s).encode('utf_8'))
+        os.write(fd, fd_encode(s))
+
+# write all of encoded buf b, os.write() may be partial on a pipe;
+# returns count of write calls made
+def fd_write_all(fd, b):
+    n = 0
+    mv = memoryview(b)
+    while len(mv):
+        n += 1
+        mv = mv[os.write(fd, mv):]
+    return n
 
 # use _T as necessary
 if not py_v_is_3:
@@ -684,6 +749,7 @@ def uri_open_fd(nm, prx = False):
         opnr = urllib2.build_opener(hdlr)
         fd = opnr.open(nm)
     elif v_urllib == 3:
+        import urllib.request
         hdlr = urllib.request.ProxyHandler(prx)
         opnr = urllib.request.build_opener(hdlr)
         fd = opnr.open(nm)
@@ -790,7 +856,7 @@ if have_mutagen:
             self.fname = fname
 
             try:
-                mg = mutagen.File(fname, easy = True)
+                mg = get_mutagen().File(fname, easy = True)
             except:
                 return False
 
@@ -956,7 +1022,18 @@ def get_processed_title(tags, tr_wid = 2, tr_sep = '. '):
 
 if _in_xws:
     # this is for freedesktop.org MPRIS2 support
-    def get_xesam_map(fname):
+    # xesam dates are ISO 8601, with zone offset
+    def xesam_time(tm):
+        lt = time.localtime(tm)
+        z = -(time.altzone if lt.tm_isdst > 0 else time.timezone)
+        z //= 60
+        return _T("{}{}{:02d}:{:02d}").format(
+                    time.strftime("%Y-%m-%dT%H:%M:%S", lt),
+                    "-" if z < 0 else "+", abs(z) // 60, abs(z) % 60)
+
+    # hist is (use count, first time, last time) or None,
+    # e.g. from PlayHistory.get()
+    def get_xesam_map(fname, hist = None):
         tg = get_media_tags_obj(fname)
 
         u = _T(fname)
@@ -974,14 +1051,14 @@ if _in_xws:
             #"composer" :        None,
             #"contentCreated" :  tg.get_date(), # not correct
             #"discNumber" :      None,
-            #"firstUsed" :       None,
+            "firstUsed" :       xesam_time(hist[1]) if hist else None,
             "genre" :           tg.get_genre(),
-            #"lastUsed" :        None,
+            "lastUsed" :        xesam_time(hist[2]) if hist else None,
             #"lyricist" :        None,
             "title" :           tg.get_title(),
             "trackNumber" :     tg.get_tracknum_int(),
             "url" :             u,
-            #"useCount" :        None,
+            "useCount" :        hist[0] if hist else None,
             #"userRating" :      None,
             "DUMMY" : None
         }
@@ -1055,6 +1132,397 @@ if _in_xws:
     "video/x-flv"   # Is this correct?
     ]
 
+    # MPRIS2 replies for the above 'as' properties never change,
+    # so encode them just once
+    def _mk_as_reply(seq):
+        l = [_T("as:\n")]
+        for s in seq:
+            l.append(_T("{}\n").format(s))
+        l.append(_T(":END ARRAY:\n"))
+        return fd_encode(_T("").join(l))
+
+    mpris2_static_replies = {
+        _T("SupportedUriSchemes") : _mk_as_reply(gst_uri_schemes),
+        _T("SupportedMimeTypes")  : _mk_as_reply(gst_mime)
+    }
+
+    # interface of each MPRIS2 property that is signalled on change
+    # -- these are batched by interface into one PropertiesChanged
+    def _mk_prop_iface():
+        base = _T("org.mpris.MediaPlayer2")
+        r = {}
+        for n in ("CanQuit", "Fullscreen", "CanSetFullscreen",
+                  "CanRaise", "HasTrackList", "Identity",
+                  "DesktopEntry", "SupportedUriSchemes",
+                  "SupportedMimeTypes"):
+            r[_T(n)] = base
+        for n in ("PlaybackStatus", "LoopStatus", "Rate", "Shuffle",
+                  "Metadata", "Volume", "Position", "MinimumRate",
+                  "MaximumRate", "CanGoNext", "CanGoPrevious",
+                  "CanPlay", "CanPause", "CanSeek", "CanControl"):
+            r[_T(n)] = base + _T(".Player")
+        return r
+
+    mpris2_prop_iface = _mk_prop_iface()
+
+    #
+    class FramedReader:
+        """Line framing for reads on a pipe descriptor: data is
+        read in large chunks into a bytearray, each line is found
+        by scanning only bytes not scanned before, and only whole
+        lines are decoded (with _T) as they are taken -- consumed
+        space is reclaimed when it is the greater part of buffer
+        """
+        def __init__(self, fd, bufsize = 16384, sep = b'\n'):
+            self.fd      = fd
+            self.bufsize = bufsize
+            self.sep     = sep
+            self.buf     = bytearray()
+            self.pos     = 0 # start of unconsumed data
+            self.scan    = 0 # where search for sep resumes
+
+        def fill(self):
+            """Do one os.read(), return count read, 0 on EOF"""
+            if self.pos and self.pos >= (len(self.buf) >> 1):
+                del self.buf[:self.pos]
+                self.scan -= self.pos
+                self.pos = 0
+            b = os.read(self.fd, self.bufsize)
+            self.buf.extend(b)
+            return len(b)
+
+        def pending(self):
+            return len(self.buf) - self.pos
+
+        def get_line(self):
+            """Return a buffered whole line (with sep), else None"""
+            i = self.buf.find(self.sep, self.scan)
+            if i < 0:
+                self.scan = len(self.buf)
+                return None
+            i += len(self.sep)
+            r = _T(bytes(self.buf[self.pos:i]))
+            self.pos = self.scan = i
+            return r
+
+        def get_rest(self):
+            """Return any partial line left, e.g. at EOF"""
+            if not self.pending():
+                return _T("")
+            r = _T(bytes(self.buf[self.pos:]))
+            self.pos = self.scan = len(self.buf)
+            return r
+
+        def lines(self):
+            """Generate whole lines now in buffer"""
+            while True:
+                r = self.get_line()
+                if r == None:
+                    break
+                yield r
+
+        def readline(self):
+            """Blocking: return a line, or partial line at EOF"""
+            while True:
+                r = self.get_line()
+                if r != None:
+                    return r
+                if self.fill() == 0:
+                    return self.get_rest()
+
+        def get_frame(self):
+            """Return a buffered whole length prefixed frame
+            (bytes, undecoded, less the prefix), else None"""
+            n = self.pending()
+            if n < 4:
+                return None
+            i = self.pos + 4
+            l = struct.unpack('>I', bytes(self.buf[self.pos:i]))[0]
+            if n < 4 + l:
+                return None
+            r = bytes(self.buf[i:i + l])
+            self.pos = self.scan = i + l
+            return r
+
+        def readframe(self):
+            """Blocking: return a frame, or None at EOF"""
+            while True:
+                r = self.get_frame()
+                if r != None:
+                    return r
+                if self.fill() == 0:
+                    return None
+
+    class LineThrottle:
+        """Rate cap for lines posted by a reader thread: a token
+        bucket of burst lines, refilled at rate per second; lines
+        over the cap are dropped and counted, and take_dropped()
+        gives the count (once) when lines pass again, or when
+        forced (the flood ended, or EOF) -- rate <= 0 means no cap
+        """
+        def __init__(self, rate = 100, burst = 200):
+            self.rate    = rate
+            self.burst   = max(burst, 1)
+            self.tokens  = float(self.burst)
+            self.tm      = time.time()
+            self.dropped = 0
+
+        def take(self, lines):
+            """Return the lines of list that pass the cap"""
+            if self.rate <= 0:
+                return lines
+
+            tm = time.time()
+            self.tokens = min(float(self.burst),
+                              self.tokens + (tm - self.tm) * self.rate)
+            self.tm = tm
+
+            n = min(int(self.tokens), len(lines))
+            self.tokens -= n
+            self.dropped += len(lines) - n
+            return lines[:n]
+
+        def take_dropped(self, force = False):
+            """Return count dropped and not yet reported, if lines
+            are passing again or force is True, else 0"""
+            if not self.dropped or (self.tokens < 1 and not force):
+                return 0
+            self.tokens = max(0.0, self.tokens - 1)
+            r, self.dropped = self.dropped, 0
+            return r
+
+    """
+    MPRIS2 helper protocol version 2: the helper offers 'proto:2'
+    and if accepted each exchange is one frame each way: a 4 byte
+    big-endian length, then self-describing typed values, each of
+    which is the type char, then:
+        b y            -- 1 byte
+        n q            -- 2 bytes
+        i u h          -- 4 bytes
+        x t d          -- 8 bytes (d as IEEE double)
+        s o g          -- 4 byte length, then utf-8
+        v              -- one typed value
+        a              -- 1 byte length and element type string,
+                          4 byte count, then typed values
+        (              -- 4 byte count, then typed values
+        {              -- 2 typed values
+    Values here are (type-string, value) tuples, with list of
+    (type-string, value) as value for 'a' and '(', a pair of those
+    for '{', and one for 'v'; (None, bytes) is a value already
+    packed, e.g. mpris2_static_frames. The dialog code serves either
+    protocol: see MPRIS2Handler.on_mpris2_frame().
+    """
+    mpris2_proto_version = 2
+
+    _mpris2_fixed = {
+        'b' : '>B', 'y' : '>B', 'n' : '>h', 'q' : '>H',
+        'i' : '>i', 'u' : '>I', 'h' : '>i',
+        'x' : '>q', 't' : '>Q', 'd' : '>d'
+    }
+
+    def mpris2_pack_value(val, out):
+        t, v = val
+        if t == None:
+            out.append(v)
+            return
+        t = str(t)
+        c = t[0]
+        out.append(fd_encode(c))
+        if c in _mpris2_fixed:
+            if c == 'b':
+                v = 1 if v else 0
+            out.append(struct.pack(_mpris2_fixed[c], v))
+        elif c in 'sog':
+            b = fd_encode(v)
+            out.append(struct.pack('>I', len(b)))
+            out.append(b)
+        elif c == 'v':
+            mpris2_pack_value(v, out)
+        elif c == 'a':
+            et = fd_encode(t[1:])
+            out.append(struct.pack('>B', len(et)))
+            out.append(et)
+            out.append(struct.pack('>I', len(v)))
+            for e in v:
+                mpris2_pack_value(e, out)
+        elif c == '(':
+            out.append(struct.pack('>I', len(v)))
+            for e in v:
+                mpris2_pack_value(e, out)
+        elif c == '{':
+            mpris2_pack_value(v[0], out)
+            mpris2_pack_value(v[1], out)
+        else:
+            raise ValueError(_T("MPRIS2 cannot pack type '{}'").format(t))
+
+    # list of values to one frame, with length prefix
+    def mpris2_pack_frame(vals):
+        out = []
+        for val in vals:
+            mpris2_pack_value(val, out)
+        b = bytes().join(out)
+        return struct.pack('>I', len(b)) + b
+
+    # the static replies of mpris2_static_replies, packed once
+    def _mk_as_frame(seq):
+        out = []
+        mpris2_pack_value(
+            (_T("as"), [(_T("s"), _T(s)) for s in seq]), out)
+        return (None, bytes().join(out))
+
+    mpris2_static_frames = {
+        _T("SupportedUriSchemes") : _mk_as_frame(gst_uri_schemes),
+        _T("SupportedMimeTypes")  : _mk_as_frame(gst_mime)
+    }
+
+    # frame (less length prefix) to list of values
+    def mpris2_unpack_frame(b):
+        def _get(b, i):
+            c = _T(b[i:i + 1])
+            i += 1
+            if c in _mpris2_fixed:
+                f = _mpris2_fixed[c]
+                n = struct.calcsize(f)
+                v = struct.unpack(f, b[i:i + n])[0]
+                if c == 'b':
+                    v = True if v else False
+                return ((c, v), i + n)
+            elif c in 'sog':
+                n = struct.unpack('>I', b[i:i + 4])[0]
+                i += 4
+                return ((c, _T(b[i:i + n])), i + n)
+            elif c == 'v':
+                v, i = _get(b, i)
+                return ((c, v), i)
+            elif c == 'a':
+                n = struct.unpack('>B', b[i:i + 1])[0]
+                t = c + _T(b[i + 1:i + 1 + n])
+                i += 1 + n
+                n = struct.unpack('>I', b[i:i + 4])[0]
+                i += 4
+                l = []
+                for k in range(n):
+                    v, i = _get(b, i)
+                    l.append(v)
+                return ((t, l), i)
+            elif c == '(':
+                n = struct.unpack('>I', b[i:i + 4])[0]
+                i += 4
+                l = []
+                for k in range(n):
+                    v, i = _get(b, i)
+                    l.append(v)
+                t = _T('({})').format(_T('').join([e[0] for e in l]))
+                return ((t, l), i)
+            elif c == '{':
+                k, i = _get(b, i)
+                v, i = _get(b, i)
+                return ((_T('{{{}{}}}').format(k[0], v[0]), (k, v)), i)
+            raise ValueError(_T("MPRIS2 cannot unpack type '{}'").format(c))
+
+        r = []
+        i = 0
+        while i < len(b):
+            v, i = _get(b, i)
+            r.append(v)
+        return r
+
+    # end offset of one complete type in type string t from i
+    def mpris2_type_end(t, i = 0):
+        c = t[i]
+        if c == 'a':
+            return mpris2_type_end(t, i + 1)
+        if c in '({':
+            d = 0
+            while True:
+                if t[i] in '({':
+                    d += 1
+                elif t[i] in ')}':
+                    d -= 1
+                    if d == 0:
+                        return i + 1
+                i += 1
+        return i + 1
+
+    # like the helper gvar_from_strings(): type t with text v from
+    # a 'type:value' line, or None, and further lines from rdl()
+    def mpris2_value_from_text(t, v, rdl):
+        c = t[0]
+        if len(t) == 1:
+            if v == None:
+                v = rdl()
+            if c == 'b':
+                return (t, s_eq(v.lower(), "true"))
+            elif c in 'sog':
+                return (t, v)
+            elif c == 'd':
+                return (t, float(v))
+            elif c == 'v':
+                st, sv = v.split(_T(':'), 1)
+                return (t, mpris2_value_from_text(st, sv, rdl))
+            return (t, int(v))
+
+        if v == _T(""):
+            v = None
+
+        if c == 'a':
+            l = []
+            while True:
+                if v == None:
+                    v = rdl()
+                if s_eq(v, ":END ARRAY:"):
+                    break
+                l.append(mpris2_value_from_text(t[1:], v, rdl))
+                v = None
+            return (t, l)
+        elif c == '{':
+            if v == None:
+                v = rdl()
+            k = mpris2_value_from_text(t[1], v, rdl)
+            return (t, (k, mpris2_value_from_text(t[2:-1], rdl(), rdl)))
+        elif c == '(':
+            l = []
+            i = 1
+            while i < len(t) - 1:
+                e = mpris2_type_end(t, i)
+                if v == None:
+                    v = rdl()
+                l.append(mpris2_value_from_text(t[i:e], v, rdl))
+                v = None
+                i = e
+            return (t, l)
+
+        raise ValueError(_T("MPRIS2 cannot convert type '{}'").format(t))
+
+    # like the helper put_args_from_gvar(): list of text lines
+    def mpris2_value_to_text(val):
+        t, v = val
+        c = t[0]
+        if c == 'b':
+            return [_T("true") if v else _T("false")]
+        elif c == 'd':
+            return [_T("{:f}").format(v)]
+        elif c in 'sog':
+            return [v]
+        elif c == 'a':
+            r = []
+            for e in v:
+                r += mpris2_value_to_text(e)
+            r.append(_T(":END ARRAY:"))
+            return r
+        elif c == '(':
+            r = []
+            for e in v:
+                r += mpris2_value_to_text(e)
+            return r
+        elif c == '{':
+            return mpris2_value_to_text(v[0]) + mpris2_value_to_text(v[1])
+        elif c == 'v':
+            r = mpris2_value_to_text(v)
+            r[0] = _T("{}:{}").format(v[0], r[0])
+            return r
+        return [_T("{}").format(v)]
+
     #
     class IODescriptorPair:
         """Pass this possibly by posted message across threads
@@ -1158,6 +1626,305 @@ av_uniq_manager = UniqueIdManager(av_uniq_digits, unique_set_global)
 # clients (e.g. MPRIS2) are not confused if an id is reused
 av_uniq_remove_in_dtor = False
 
+class ShufflePermutation:
+    """Seeded bijection over range(size) for shuffle play --
+    nothing is materialized, so a set of a million items costs
+    no more than a set of ten: position -> indice and
+    indice -> position are both computed on demand by a small
+    Feistel network with 'cycle walking' to confine values
+    to the range (the walk is short, as the network domain
+    is at most 4 * size)
+    """
+    rounds = 4
+    mask64 = (1 << 64) - 1
+
+    def __init__(self, size, seed = None):
+        self.size = max(int(size), 0)
+        if seed == None:
+            seed = random.getrandbits(31)
+        self.seed = int(seed)
+
+        bits = max((self.size - 1).bit_length(), 2)
+        if bits & 1:
+            bits += 1
+        self.half  = bits >> 1
+        self.hmask = (1 << self.half) - 1
+
+        m = self.mask64
+        k = (self.seed * 0x9E3779B97F4A7C15 + 0x632BE59BD9B4E5B5) & m
+        self.keys = []
+        for r in range(self.rounds):
+            k = self._mix(k + r + 1)
+            self.keys.append(k)
+
+    def _mix(self, v):
+        # splitmix64 finalizer
+        m = self.mask64
+        v = ((v ^ (v >> 30)) * 0xBF58476D1CE4E5B9) & m
+        v = ((v ^ (v >> 27)) * 0x94D049BB133111EB) & m
+        return v ^ (v >> 31)
+
+    def _f(self, r, v):
+        return self._mix(v ^ self.keys[r]) & self.hmask
+
+    def _enc(self, v):
+        h = self.half
+        l, r = v >> h, v & self.hmask
+        for i in range(self.rounds):
+            l, r = r, l ^ self._f(i, r)
+        return (l << h) | r
+
+    def _dec(self, v):
+        h = self.half
+        l, r = v >> h, v & self.hmask
+        for i in range(self.rounds - 1, -1, -1):
+            l, r = r ^ self._f(i, l), l
+        return (l << h) | r
+
+    def at(self, pos):
+        """indice at shuffled position pos"""
+        if pos < 0 or pos >= self.size:
+            return None
+        v = self._enc(pos)
+        while v >= self.size:
+            v = self._enc(v)
+        return v
+
+    def index_of(self, indice):
+        """shuffled position of indice"""
+        if indice < 0 or indice >= self.size:
+            return None
+        v = self._dec(indice)
+        while v >= self.size:
+            v = self._dec(v)
+        return v
+
+class TickDuty:
+    """One duty of the top window's main timer: fn(timer) is
+    called every period ms while active() returns True, and
+    at once when it becomes active -- unless spaced, then a
+    period after it becomes active, or at its time if that is
+    still ahead, so that no activity makes it run more often;
+    see TopWnd.run_tick_duties()
+    """
+    def __init__(self, period, fn, active = None, spaced = False):
+        self.period  = period
+        self.fn      = fn
+        self.active  = active or (lambda: True)
+        self.spaced  = spaced
+        self.next_tm = 0.0
+
+class LengthTracker:
+    """Length samples for the loaded item: backends estimate
+    length for some media (think vbr mp3, streams) and revise
+    it as playing goes on -- the length is stable after need
+    samples in a row within tol ms of each other, all of them
+    positive (0 may be an unbounded stream or a backend not yet
+    ready, so it is never taken as stable), and then need not
+    be polled; a new value is taken (add() returns
+    True) only if it differs from the last taken by more than
+    tol ms and tol_frac of it, or boundedness changes -- an
+    item given with a length found stable before starts stable
+    """
+    def __init__(self, item = None, need = 5, tol = 500,
+                 tol_frac = 0.005):
+        self.need     = need
+        self.tol      = tol
+        self.tol_frac = tol_frac
+        self.hist     = []
+        self.value    = -1
+        self.stable   = False
+
+        if item and item.len_stable and item.length > 0:
+            self.value  = item.length
+            self.stable = True
+
+    def add(self, ln):
+        if self.stable:
+            return False
+
+        self.hist.append(ln)
+        del self.hist[:-self.need]
+
+        v = self.value
+        d = abs(ln - v)
+        r = (v < 0 or (ln > 0) != (v > 0) or
+             (d > self.tol and d > v * self.tol_frac))
+
+        if (len(self.hist) >= self.need and min(self.hist) > 0 and
+            max(self.hist) - min(self.hist) <= self.tol):
+            self.stable = True
+            self.value = ln
+        elif r:
+            self.value = ln
+
+        return r
+
+class FailCache:
+    """Resources that failed to load, by resname: one is bad
+    until its retry time, ttl secs after the failure, doubled
+    for each further failure in a row up to ttl_max; at most
+    size entries are kept, the oldest failure goes first
+    """
+    def __init__(self, ttl = 60.0, ttl_max = 3600.0, size = 1024):
+        self.ttl     = ttl
+        self.ttl_max = ttl_max
+        self.size    = size
+        # resname: [count, retry time, fail time, err]
+        self.ent     = {}
+
+    def fail(self, res, err = None):
+        now = time.time()
+        e = self.ent.get(res)
+        n = e[0] + 1 if e else 1
+        t = min(self.ttl_max, self.ttl * (2 ** min(n - 1, 16)))
+        self.ent[res] = [n, now + t, now, err]
+
+        if len(self.ent) > self.size:
+            k = min(self.ent, key = lambda k: self.ent[k][2])
+            del self.ent[k]
+
+        return t
+
+    def ok(self, res):
+        return self.ent.pop(res, None) != None
+
+    def bad(self, res):
+        e = self.ent.get(res)
+        return e != None and time.time() < e[1]
+
+    # resnames past their retry time
+    def due(self):
+        now = time.time()
+        return [k for k, e in self.ent.items() if e[1] <= now]
+
+class ResumeStore:
+    """Play positions (ms) by resname, for items long enough to
+    be worth resuming: kept in memory, read from file name on
+    first use and written back by flush() only if changed;
+    at most size entries, the least recently used dropped
+    """
+    def __init__(self, name, size = 500):
+        self.name  = name
+        self.size  = size
+        self.pos   = None
+        self.dirty = False
+
+    def _load(self):
+        if self.pos != None:
+            return
+
+        self.pos = collections.OrderedDict()
+        try:
+            with open(self.name, "rb") as f:
+                lines = f.read().splitlines()
+        except (OSError, IOError):
+            return
+
+        # "pos<TAB>resname", least recent first
+        for l in lines:
+            p, sep, r = _T(l).partition(_T("\t"))
+            if sep and p.isdigit():
+                self.pos.pop(r, None)
+                self.pos[r] = int(p)
+        self._trim()
+
+    def _trim(self):
+        while len(self.pos) > self.size:
+            self.pos.popitem(last = False)
+            self.dirty = True
+
+    def get(self, res):
+        self._load()
+        k = _T(res)
+        p = self.pos.pop(k, None)
+        if p != None:
+            self.pos[k] = p
+        return p
+
+    def put(self, res, pos):
+        self._load()
+        k = _T(res)
+        if self.pos.pop(k, None) != pos:
+            self.dirty = True
+        self.pos[k] = pos
+        self._trim()
+
+    def drop(self, res):
+        self._load()
+        if self.pos.pop(_T(res), None) != None:
+            self.dirty = True
+
+    def flush(self):
+        if not self.dirty:
+            return True
+
+        tmp = self.name + _T(".tmp")
+        try:
+            d = os.path.dirname(self.name)
+            if d and not os.path.isdir(d):
+                os.makedirs(d)
+            with open(tmp, "wb") as f:
+                for k, p in self.pos.items():
+                    f.write(_T("{}\t{}\n").format(p, k).encode("utf-8"))
+            getattr(os, "replace", os.rename)(tmp, self.name)
+        except (OSError, IOError) as e:
+            wx.GetApp().prdbg(_T("ResumeStore: {}").format(e))
+            return False
+
+        self.dirty = False
+        return True
+
+class PlayerSnapshot:
+    """Player state as read at one time, from which MPRIS2
+    property reads are answered without backend calls or
+    reslist walks -- see TopWnd.get_mpris_snap(); Position
+    is extrapolated from the time of reading while playing,
+    so it is right between refreshes too
+    """
+    def __init__(self, w):
+        self.tm = time.time()
+        self.state = w.get_medi_state()
+        self.load_ok = w.load_ok
+        self.indice = w.media_indice
+        if w.medi:
+            self.length = w.media_length()
+            self.tell = w.medi.Tell() if self.load_ok else 0
+        else:
+            self.length = -1
+            self.tell = 0
+        self.can_next = w.get_can_do_next()
+        self.can_prev = w.get_can_do_prev()
+        self.has_items = True if w.reslist else False
+        self.fullscreen = w.is_fullscreen()
+        self.loop_track = w.loop_track
+        self.shuffle = w.shuffle
+        d = float(w.vol_max - w.vol_min)
+        self.volume = float(w.vol_cur - w.vol_min) / d
+        self._meta = None
+
+    def position(self):
+        """ms, as Tell() would give now"""
+        p = self.tell
+        if self.state == wx.media.MEDIASTATE_PLAYING:
+            p += int((time.time() - self.tm) * 1000.0)
+            if self.length > 0:
+                p = min(p, self.length)
+        return p
+
+    def playback_state_string(self):
+        if self.state == wx.media.MEDIASTATE_PLAYING:
+            return _T("Playing")
+        elif self.state == wx.media.MEDIASTATE_PAUSED:
+            return _T("Paused")
+        return _T("Stopped")
+
+    def metadata(self, w):
+        """w.get_mpris2_metadata(), once per snapshot"""
+        if self._meta == None:
+            self._meta = w.get_mpris2_metadata()
+        return self._meta
+
 class AVItem:
     """Structure for an a/v resource which, it is hoped,
     will be found agreeable by the wxMediaCtrl backend in use
@@ -1174,6 +1941,8 @@ class AVItem:
         self.resname = resname
         self.err = err
         self.length = length
+        # length was seen stable while playing -- see LengthTracker
+        self.len_stable = False
 
         self.res_dispname = None
         self.des_dispname = None
@@ -1216,6 +1985,15 @@ class AVItem:
         a = allow_none
         return self.get_description_with_displayname().get_disp_str(a)
 
+    # video size as measured in play and put in comment as "WxH",
+    # as (w, h), or None if not known or not video
+    def get_vsize(self):
+        m = re.match(_T(r"^([0-9]+)x([0-9]+)$"), _T(self.comment or ""))
+        if not m:
+            return None
+        w, h = int(m.group(1)), int(m.group(2))
+        return (w, h) if (w > 0 and h > 0) else None
+
 
 def res_lst_to_avitem_lst(lst):
     return [AVItem(desc = i, resname = i)
@@ -1512,6 +2290,8 @@ class AVGroupList(AVGroup):
         ver = None
         num = 0
         dorm = []
+        # app-specific per entry comments: entry number: text
+        meta = {}
         for i, l in enumerate(dat):
             m = re.match(_T(r"Version\s*=\s*([0-9]+)"), _T(l), re.I)
             if m:
@@ -1524,6 +2304,14 @@ class AVGroupList(AVGroup):
                 num = int(m.group(1))
                 dorm.append(i)
                 continue
+            # measured data comment, see wr_xpls_file() -- it
+            # follows its entry, so the last one would follow
+            # the last entry parsed in the loop below
+            m = re.match(_T(r"^\s*[;#]\s*Meta([0-9]+):(.*)$"), _T(l))
+            if m:
+                meta[int(m.group(1))] = m.group(2)
+                dorm.append(i)
+                continue
 
         dorm.reverse()
         for i in dorm:
@@ -1631,8 +2419,25 @@ class AVGroupList(AVGroup):
             #print("chew_dat_xpls EXCEPTION")
             pass
 
+        for n, v in meta.items():
+            if 0 < n <= len(ret):
+                AVGroupList.chew_meta(ret[n - 1], v)
+
         return (ret, filedesc)
 
+    # "size=WxH length=ms stable=1" -- any may be absent
+    @staticmethod
+    def chew_meta(it, v):
+        m = re.search(_T(r"\bsize=([0-9]+x[0-9]+)\b"), v)
+        if m:
+            it.comment = m.group(1)
+        m = re.search(_T(r"\blength=([0-9]+)\b"), v)
+        if m:
+            it.length = int(m.group(1))
+        m = re.search(_T(r"\bstable=([01])\b"), v)
+        if m:
+            it.len_stable = (m.group(1) == _T("1")) and it.length > 0
+
     @staticmethod
     def chew_dat_xm3u(dat):
         ret = []
@@ -1714,6 +2519,108 @@ class AVGroupListFile(AVGroupList):
                           AVGroupListFile.defdesc,
                           do_close, put_desc)
 
+class AVGroupListFileLazy(AVGroupListFile):
+    """A group from a .pls file of the saved set, as written
+    by wr_xpls_file(): at first only the description and entry
+    count are read (from #ListDesc: and NumberOfEntries), and
+    the items are parsed when data is first used -- until
+    then the file text is what is written on save
+    """
+    def __init__(self, desc = AVGroupListFile.defdesc, name = None):
+        self.name = name
+        self._raw = None
+        self._num, fdesc = self.peek_pls(name)
+
+        AVGroup.__init__(self, desc = fdesc or desc)
+        if fdesc:
+            self.set_user_desc(fdesc)
+        self._desc0 = self.desc
+
+        # no count found: not ours, so parse now
+        self._lazy = (self._num != None)
+        if not self._lazy:
+            self.materialize()
+
+    @staticmethod
+    def peek_pls(name):
+        try:
+            with open(name, "rb") as f:
+                b = f.read()
+        except (OSError, IOError):
+            return (None, None)
+
+        m = re.search(br"^\s*NumberOfEntries\s*=\s*([0-9]+)",
+                      b, re.I | re.M)
+        num = int(m.group(1)) if m else None
+        # as in chew_dat_xpls(), if several, last wins
+        m = re.findall(br"^\s*[;#]\s*ListDesc:(.*)$", b, re.M)
+        desc = _T(m[-1].strip()) if m else None
+
+        return (num, desc)
+
+    @property
+    def data(self):
+        if self._lazy:
+            self.materialize()
+        return self._data
+
+    @data.setter
+    def data(self, val):
+        self._data = val
+        self._lazy = False
+
+    def is_lazy(self):
+        return self._lazy
+
+    def materialize(self):
+        if self._raw != None:
+            dat, err = self._raw, None
+        else:
+            dat, err = textfile2linelist_tup(self.name)
+        self._raw = None
+
+        if err:
+            self.data = [AVItem(err = err, desc = self.name)]
+        else:
+            self.data, fdesc = AVGroupList.chew_dat(list(dat))
+
+        wx.GetApp().prdbg(
+            _T("AVGroupListFileLazy: parsed '{}' ({} of {})").format(
+                    self.name, len(self._data), self._num))
+
+    def get_len(self):
+        if self._lazy:
+            return self._num
+        return AVGroup.get_len(self)
+
+    # read file text while it exists -- wr_current_set()
+    # removes the set directory before writing
+    def keep_raw(self):
+        if self._lazy and self._raw == None:
+            dat, err = textfile2linelist_tup(self.name)
+            if err:
+                self.materialize()
+            else:
+                self._raw = dat
+
+    def write_file(self, out, do_close = True, put_desc = True):
+        if not self._lazy or not s_eq(self.desc, self._desc0):
+            return AVGroupListFile.write_file(self, out,
+                                              do_close, put_desc)
+
+        self.keep_raw()
+        if not self._lazy:
+            return AVGroupListFile.write_file(self, out,
+                                              do_close, put_desc)
+
+        fd = out if hasattr(out, "write") else cv_open_w(out)
+        for l in self._raw:
+            fd.write(_U(_T("{}\n").format(_T(l))))
+        if do_close:
+            fd.close()
+
+        return True
+
 class AVGroupListDir(AVGroupList):
     """Init from a simple list of resources file, e.g. PLS v1
     -- this will raise an exception if name arg is n.g. for reading
@@ -1774,6 +2681,95 @@ class AVGroupListURIFile(AVGroupList):
                           do_close, put_desc)
 
 
+# bytes of memory available, or None if not found
+def mem_available():
+    try:
+        with open("/proc/meminfo", "rb") as f:
+            for l in f:
+                if l.startswith(b"MemAvailable:"):
+                    return int(l.split()[1]) * 1024
+    except (OSError, IOError, ValueError, IndexError):
+        pass
+
+    try:
+        return (os.sysconf("SC_AVPHYS_PAGES") *
+                os.sysconf("SC_PAGE_SIZE"))
+    except (AttributeError, ValueError, OSError):
+        pass
+
+    return None
+
+# how much of a file of size bytes to prefetch: up to lim,
+# but no more than a 16th of available memory, nor under 1MB
+def prefetch_amount(size, lim = 64 << 20):
+    n = min(size, lim)
+    av = mem_available()
+    if av:
+        n = min(n, av // 16)
+    return max(n, min(size, 1 << 20))
+
+# have the head of file name, and a smaller tail (where some
+# containers keep an index, or tags), read into the page cache:
+# by posix_fadvise() where there is one, else by reading them
+# -- returns bytes asked for; meant for a background thread
+def prefetch_file(name, amount = None):
+    fd = os.open(name, os.O_RDONLY)
+    try:
+        sz = os.fstat(fd).st_size
+        if amount == None:
+            amount = prefetch_amount(sz)
+
+        hd = min(sz, amount)
+        tl = min(sz - hd, amount // 4)
+        spans = [(0, hd)]
+        if tl > 0:
+            spans.append((sz - tl, tl))
+
+        fadv = getattr(os, "posix_fadvise", None)
+        for off, n in spans:
+            if fadv:
+                fadv(fd, off, n, os.POSIX_FADV_WILLNEED)
+                continue
+            os.lseek(fd, off, os.SEEK_SET)
+            while n > 0:
+                b = os.read(fd, min(n, 1 << 20))
+                if not b:
+                    break
+                n -= len(b)
+    finally:
+        os.close(fd)
+
+    return hd + tl
+
+# default ports of stream URI schemes, for stream_reachable()
+_stream_ports = {
+    "http" : 80, "https" : 443, "rtsp" : 554, "rtsps" : 322,
+    "rtmp" : 1935, "mms" : 1755, "mmsh" : 80, "icy" : 80
+}
+
+# can a TCP connection be made to the host of stream uri? returns
+# None if that cannot tell (no host, or a scheme not over TCP),
+# else an error string or the empty string for success -- meant
+# for a background thread
+def stream_reachable(uri, timeout = 5.0):
+    import socket
+
+    try:
+        u = uri_parse(uri)
+        host = u.hostname
+        port = u.port or _stream_ports.get(u.scheme.lower())
+    except ValueError:
+        return None
+    if not (host and port):
+        return None
+
+    try:
+        socket.create_connection((host, port), timeout).close()
+    except (socket.error, socket.timeout) as e:
+        return _T("{}").format(e) or _T("connect failed")
+
+    return _T("")
+
 # make file:// URI from path, optionally quoting
 def do_uri_file(fpath, quote=True):
     if _in_msw:
@@ -1857,6 +2853,8 @@ def mk_from_args(*args, **kwargs):
     wx.GetApp().prdbg(_T("mk_from_args: kwargs '{}'").format(kwargs))
 
     dir_recurse = False
+    # .pls files of the saved set: AVGroupListFileLazy
+    lazy_pls = False
     # option to reduce file:// to a plain path; otherwise
     # urllib will get the resource -- that's works for regular
     # files but not directories -- so default to filtering file://
@@ -1871,6 +2869,8 @@ def mk_from_args(*args, **kwargs):
             dir_recurse = v
         elif k == "file_uri_filter":
             file_uri_filter = v
+        elif k == "lazy_pls":
+            lazy_pls = v
         elif k == "uri_filter_permissive":
             if v != True:
                 continue
@@ -1893,6 +2893,8 @@ def mk_from_args(*args, **kwargs):
         elif not isf and re.match(upat, _T(fs), re.I):
             return AVGroupList(data = [fs])
         elif isf and re.match(fpat, _T(fs), re.I):
+            if lazy_pls and fs.lower().endswith(_T(".pls")):
+                return AVGroupListFileLazy(name = fs)
             return AVGroupListFile(name = fs)
         elif isf:
             return AVGroupList(data = [fs])
@@ -1911,6 +2913,16 @@ def get_lst_from_args(*args, **kwargs):
     rm = []
 
     for g in avl:
+        # saved set file, not parsed yet: as written, it has
+        # no error entries or nested playlists to check for
+        if isinstance(g, AVGroupListFileLazy) and g.is_lazy():
+            if accum:
+                res.append(AVGroup(data = accum))
+                accum = []
+            if g.get_len() > 0:
+                res.append(g)
+            continue
+
         if (isinstance(g, AVGroupListFile) or
             isinstance(g, AVGroupListURIFile) or
             isinstance(g, AVGroupListDir)):
@@ -2016,7 +3028,19 @@ def wr_xpls_file(out, group, do_close = True, put_desc = True):
         except:
             li = -1
         ln = int(-1 if li < 0 else (li + 500) / 1000)
-        fd.write(_U("Length{:d}={:d}\n\n").format(n, ln))
+        fd.write(_U("Length{:d}={:d}\n").format(n, ln))
+
+        # app specific comment with values measured in play: other
+        # readers skip it; the length here is in millisecs
+        vs = it.get_vsize()
+        if vs or (it.len_stable and li > 0):
+            mt = [_T("size={}x{}").format(*vs)] if vs else []
+            if li > 0:
+                mt.append(_T("length={:d}").format(li))
+                mt.append(_T("stable={:d}").format(int(it.len_stable)))
+            fd.write(_U(_T("#Meta{:d}: {}\n").format(n, _T(" ").join(mt))))
+
+        fd.write(_U("\n"))
 
     fd.write(_U("NumberOfEntries={:d}\n").format(num))
     fd.write(_U("Version={:d}\n").format(ver))
@@ -2070,6 +3094,11 @@ def wr_groups(grlist, in_dir, namebase = _T("group-"), do_exc = False):
 def wr_current_set(grlist, set_dir = None, do_exc = False):
     od = set_dir if set_dir else wx.GetApp().get_data_dir_curset()
 
+    # unparsed groups are read from files in od
+    for g in grlist:
+        if isinstance(g, AVGroupListFileLazy):
+            g.keep_raw()
+
     if do_exc:
         # existing current set is removed
         if os.path.exists(od):
@@ -2163,21 +3192,29 @@ class AThreadEvent(wx.PyEvent):
     wxWidgets).  The evttag argument to the constructor *must*
     be passed (it associates the event with a type), and the
     payload argument *may* be passed if the event should carry
-    a message or some data (but be mindful of threading issues),
-    and finally the event will by default be delivered to the
-    main top window, but a different window id may be given
-    in the destid argument.
+    a message or some data, and finally the event will by default
+    be delivered to the main top window, but a different window id
+    may be given in the destid argument.
+
+    Tag and payload are posted as given, not copied: they should
+    be immutable (strings, bytes, numbers, tuples of those), or
+    else posting hands them over -- the posting thread must not
+    touch them after (an IODescriptorPair in MPRIS events is a
+    shared object by design, see it).  A poster that keeps using
+    mutable data should pass deep = True to post a deep copy.
     """
-    def __init__(self, evttag, payload = None, destid = -1):
+    def __init__(self, evttag, payload = None, destid = -1,
+                 deep = False):
         wx.PyEvent.__init__(
             self, destid,
             T_EVT_CHILDPROC_MESSAGE)
 
-        # use deepcopy out of paranoia re. data in events that
-        # are delivered across threads -- see wxPython 4.x docs re.
-        # wx.QueueEvent and wx.PostEvent (re. string fields)
-        self.ev_type = copy.deepcopy(evttag)
-        self.ev_data = copy.deepcopy(payload)
+        if deep:
+            evttag  = copy.deepcopy(evttag)
+            payload = copy.deepcopy(payload)
+
+        self.ev_type = evttag
+        self.ev_data = payload
 
     def get_content(self):
         """on receipt, get_content() may be called on the event
@@ -2245,6 +3282,173 @@ class AChildThread(threading.Thread):
     def set_quit(self):
         self.got_quit = True
 
+class PlayHistory(threading.Thread):
+    """Append-only play history: record() puts events, which this
+    thread appends as JSON lines ([time, kind, resname]) to
+    name + ".log" -- at start, and after compact_at events, the
+    log is compacted into per resname aggregates in name + ".agg";
+    record() also updates the in-memory aggregates, [play count,
+    first time, last time], which get() returns
+
+    Compaction must not count a play twice if it is cut short:
+    the log is first renamed to name + ".log.<seq>", then the
+    .agg is replaced with one that has seq, then the renamed log
+    is removed -- a renamed log is counted only if its seq is
+    greater than that in the .agg
+    """
+    def __init__(self, name, compact_at = 1000):
+        threading.Thread.__init__(self)
+        self.daemon = True
+
+        self.f_log = name + _T(".log")
+        self.f_agg = name + _T(".agg")
+        self.compact_at = compact_at
+
+        self.fifo = q_fifo(256)
+        self.lock = threading.Lock()
+        # for get(), with events not yet written
+        self.agg  = {}
+        # this thread only: as on disk
+        self.disk = {}
+        self.nlog = 0
+        # greatest seq of renamed logs counted in disk
+        self.seq  = 0
+
+    @staticmethod
+    def _add(agg, res, tm, n = 1, t1 = None):
+        a = agg.get(res)
+        t1 = tm if t1 == None else t1
+        if a:
+            a[0] += n
+            a[1] = min(a[1], tm)
+            a[2] = max(a[2], t1)
+        else:
+            agg[res] = [n, tm, t1]
+
+    def record(self, res, kind = "play"):
+        tm = time.time()
+        res = _T(res)
+        if kind == "play":
+            with self.lock:
+                self._add(self.agg, res, tm)
+        try:
+            self.fifo.put_nowait((tm, kind, res))
+        except q_fifo_full:
+            pass
+
+    def get(self, res):
+        with self.lock:
+            a = self.agg.get(_T(res))
+            return tuple(a) if a else None
+
+    def stop(self, timeout = 2.0):
+        try:
+            self.fifo.put(None, timeout = timeout)
+        except q_fifo_full:
+            return
+        self.join(timeout)
+
+    def run(self):
+        self._load()
+        self._compact()
+
+        while True:
+            ev = self.fifo.get()
+            if ev == None:
+                break
+            self._append(ev)
+            if self.nlog >= self.compact_at:
+                self._compact()
+
+    def _load(self):
+        try:
+            with open(self.f_agg, "rb") as f:
+                j = json.loads(_T(f.read()))
+            # before renamed logs, .agg was the bare aggregates
+            if isinstance(j.get("seq"), int):
+                self.seq, j = j["seq"], j["agg"]
+            for r, a in j.items():
+                self._add(self.disk, r, a[1], a[0], a[2])
+        except (OSError, IOError, ValueError, TypeError,
+                AttributeError, KeyError):
+            pass
+
+        # renamed by a compaction cut short
+        seq = self.seq
+        for n, fn in self._rotated():
+            if n > seq:
+                self._load_log(fn)
+                self.seq = n
+
+        self._load_log(self.f_log)
+
+        with self.lock:
+            for r, a in self.disk.items():
+                self._add(self.agg, r, a[1], a[0], a[2])
+
+    def _load_log(self, fn):
+        try:
+            with open(fn, "rb") as f:
+                for l in f:
+                    try:
+                        tm, kind, r = json.loads(_T(l))
+                    except (ValueError, TypeError):
+                        continue
+                    if kind == "play":
+                        self._add(self.disk, r, tm)
+        except (OSError, IOError):
+            pass
+
+    def _rotated(self):
+        """Renamed logs present, as sorted (seq, file name)"""
+        d = os.path.dirname(self.f_log)
+        b = os.path.basename(self.f_log) + _T(".")
+        r = []
+        try:
+            for n in os.listdir(d or _T(".")):
+                if n.startswith(b) and n[len(b):].isdigit():
+                    r.append((int(n[len(b):]), os.path.join(d, n)))
+        except (OSError, IOError):
+            pass
+        return sorted(r)
+
+    def _append(self, ev):
+        tm, kind, r = ev
+        try:
+            d = os.path.dirname(self.f_log)
+            if d and not os.path.isdir(d):
+                os.makedirs(d)
+            with open(self.f_log, "ab") as f:
+                f.write(_T("{}\n").format(json.dumps(ev)).encode("utf-8"))
+        except (OSError, IOError):
+            return
+        self.nlog += 1
+        if kind == "play":
+            self._add(self.disk, r, tm)
+
+    def _compact(self):
+        old = self._rotated()
+        seq = max([self.seq] + [n for n, fn in old]) + 1
+        rot = _T("{}.{}").format(self.f_log, seq)
+        tmp = self.f_agg + _T(".tmp")
+        try:
+            if os.path.exists(self.f_log):
+                os.rename(self.f_log, rot)
+            with open(tmp, "wb") as f:
+                f.write(_T(json.dumps({"seq" : seq, "agg" : self.disk})
+                          ).encode("utf-8"))
+            getattr(os, "replace", os.rename)(tmp, self.f_agg)
+        except (OSError, IOError):
+            return
+        self.seq = seq
+        self.nlog = 0
+
+        for n, fn in old + [(seq, rot)]:
+            try:
+                os.unlink(fn)
+            except (OSError, IOError):
+                pass
+
 
 """
 App classes
@@ -2367,7 +3571,8 @@ elif _in_xws:
                      envplus = {},
                      fd0 = None,
                      mk_pgrp = False,
-                     line_rdsize = 4096):
+                     line_rdsize = 4096,
+                     spawn = True):
             # I've read that file.readline(*size*) requires a non-zero
             # *size* arg to reliably return empty string *only* on EOF
             # (which is needed) so line_rdsize should by larger than
@@ -2376,6 +3581,11 @@ elif _in_xws:
 
             self.mk_pgrp = mk_pgrp
 
+            # os.posix_spawn (py >= 3.8) avoids fork() of this big
+            # process (wx, GTK, heap) and setup in the child; exec
+            # errors raise directly in the parent
+            self.spawn = spawn and hasattr(os, "posix_spawn")
+
             self.xcmd = cmd
             self.xcmdargs = arglist or []
             self.xcmdenv = envplus
@@ -2399,6 +3609,7 @@ elif _in_xws:
             self.root = True
 
             self.ch_pid = None
+            self.stat_fd = -1
             self.error  = ("no error", None, None, None)
 
 
@@ -2527,6 +3738,56 @@ elif _in_xws:
 
             return self.wait(opts)
 
+        """
+        public: after go(), learn whether the child's exec*()
+        succeeded -- the child holds the write end of a
+        close-on-exec pipe, so EOF with no data means the exec
+        happened; if the child fails first it writes its exit
+        status and errno there -- returns None on success (or
+        if nothing is known after timeout ms) else a tuple
+        (status, errno), and also sets self.error
+        """
+        def exec_check(self, timeout = 1000):
+            fd = self.stat_fd
+            if fd < 0:
+                return None
+
+            self.stat_fd = -1
+            dat = b''
+            try:
+                pl = select.poll()
+                pl.register(fd, select.POLLIN|select.POLLHUP)
+                while pl.poll(timeout):
+                    b = os.read(fd, 64)
+                    if not b:
+                        break
+                    dat += b
+            except (OSError, select.error):
+                pass
+            finally:
+                os.close(fd)
+
+            if not dat:
+                return None
+
+            try:
+                st, eno = [int(v) for v in dat.split()[:2]]
+            except ValueError:
+                st, eno = self.exec_wtf_status, 0
+
+            self.error = ("exec", st, eno,
+                          os.strerror(eno) if eno else "exec failure")
+            return (st, eno)
+
+        # in child: report to exec_check and exit
+        def _child_fail(self, status, err = 0):
+            try:
+                os.write(self._stat_wfd,
+                         "{} {}\n".format(status, err or 0).encode('ascii'))
+            except:
+                pass
+            os._exit(status)
+
         """
         fork() and return tuple (child_pid, read_fd, err_fd(2)),
         """
@@ -2554,6 +3815,19 @@ elif _in_xws:
                 self.error = ("go", None, e.errno, e.strerror)
                 return (-1, None, None)
 
+            if self.spawn:
+                return self._go_spawn(rfd, wfd1, efd, wfd2)
+
+            try:
+                sfd, wfd3 = os.pipe()
+                fcntl.fcntl(wfd3, fcntl.F_SETFD,
+                    fcntl.fcntl(wfd3, fcntl.F_GETFD) | fcntl.FD_CLOEXEC)
+            except (OSError, IOError) as e:
+                for fd in (rfd, wfd1, efd, wfd2):
+                    os.close(fd)
+                self.error = ("go", None, e.errno, e.strerror)
+                return (-1, None, None)
+
             try:
                 pid = os.fork()
             except OSError as e:
@@ -2561,6 +3835,8 @@ elif _in_xws:
                 os.close(wfd1)
                 os.close(efd)
                 os.close(wfd2)
+                os.close(sfd)
+                os.close(wfd3)
                 self.error = ("go", None, e.errno, e.strerror)
                 return (-1, None, None)
 
@@ -2572,6 +3848,8 @@ elif _in_xws:
             if pid == 0:
                 # for reference in methods
                 self.root = False
+                self._stat_wfd = wfd3
+                os.close(sfd)
 
                 if self.mk_pgrp:
                     # start new group giving parent kill group option
@@ -2582,11 +3860,11 @@ elif _in_xws:
                             os.setpgrp()
                         pgrp = os.getpgrp()
                     except OSError as e:
-                        os._exit(self.pgrp_err_status)
+                        self._child_fail(self.pgrp_err_status, e.errno)
 
                     # success?
                     if mpid != pgrp:
-                        os._exit(self.pgrp_err_status)
+                        self._child_fail(self.pgrp_err_status)
 
                 os.close(rfd)
                 os.close(efd)
@@ -2599,7 +3877,7 @@ elif _in_xws:
                     os.dup2(wfd2, 2)
                     os.close(wfd2)
                 except OSError as e:
-                    os._exit(self.exec_dup_status)
+                    self._child_fail(self.exec_dup_status, e.errno)
 
                 is_path = os.path.split(self.xcmd)
                 if len(is_path[0]) > 0:
@@ -2613,16 +3891,57 @@ elif _in_xws:
                         os.execv(self.xcmd, self.xcmdargs)
                     else:
                         os.execvp(self.xcmd, self.xcmdargs)
-                    os._exit(self.exec_wtf_status)
+                    self._child_fail(self.exec_wtf_status)
                 except OSError as e:
-                    os._exit(self.exec_err_status)
+                    self._child_fail(self.exec_err_status, e.errno)
 
             else:
                 os.close(wfd1)
                 os.close(wfd2)
+                os.close(wfd3)
+                self.stat_fd = sfd
 
             return tuple(rlst)
 
+        # go() by os.posix_spawn{,p}: file actions do the fd
+        # plumbing, and the environment is given explicitly
+        def _go_spawn(self, rfd, wfd1, efd, wfd2):
+            env = dict(os.environ)
+            for k, v in self._mk_sane_env(self.xcmdenv):
+                env[k] = v
+
+            # pipe fds are close-on-exec (py3 default), dup2
+            # to 0, 1, 2 clears that on the copies
+            facts = [
+                (os.POSIX_SPAWN_DUP2, self.fd0, 0),
+                (os.POSIX_SPAWN_DUP2, wfd1, 1),
+                (os.POSIX_SPAWN_DUP2, wfd2, 2),
+            ]
+
+            kw = {"file_actions" : facts}
+            if self.mk_pgrp:
+                kw["setpgroup"] = 0
+
+            if len(os.path.split(self.xcmd)[0]) > 0:
+                spawn = os.posix_spawn
+            else:
+                spawn = os.posix_spawnp
+
+            try:
+                pid = spawn(self.xcmd, self.xcmdargs, env, **kw)
+            except OSError as e:
+                for fd in (rfd, wfd1, efd, wfd2):
+                    os.close(fd)
+                self.error = ("exec", self.exec_err_status,
+                              e.errno, e.strerror)
+                return (-1, None, None)
+
+            os.close(wfd1)
+            os.close(wfd2)
+
+            self.ch_pid = pid
+            return (pid, rfd, efd)
+
         @staticmethod
         def _putenv_cntnr(cntnr):
             try:
@@ -2665,9 +3984,25 @@ elif _in_xws:
             signal.SIGTERM, signal.SIGUSR1, signal.SIGUSR2
         ]
 
+        # after 'SETWName' the helper wants the name in a read of
+        # its own -- it says "R:setwname" when ready; older helpers
+        # do not, so the name is sent after this many ms regardless
+        wname_wait_ms = 333
+
+        # per readiness wakeup, read no more than this from a
+        # helper output fd before posting what has been read
+        out_drain_max = 65536
+        # report lines dropped by the stderr rate cap when the
+        # helper has written none for this long
+        err_flush_ms = 1000
+
         def __init__(self, app, procargs = None, go = False,
-                     mpris2 = True):
+                     mpris2 = True, err_rate = (100, 200)):
             self.thd = self.pwr = self.ch_proc = self.linemax = None
+            self.wname_pend = self.wname_timer = None
+            # helper stderr is diagnostic, so may be capped;
+            # stdout (keys, replies) never is
+            self.err_throttle = LineThrottle(*err_rate)
             self.quitting = False
 
             self.app = app
@@ -2937,15 +4272,20 @@ elif _in_xws:
 
             pid, rfd, efd = self.ch_proc.go()
 
-            # exec*() success detection - short sleep then
-            # ch_proc.wait nohang, which should return -2,
+            # exec*() success detection - ch_proc.exec_check
+            # returns as soon as the exec has happened (or the
+            # child has reported failure on its status pipe);
+            # then ch_proc.wait nohang, which should return -2,
             # meaning pid was found but not exited or signalled,
             # or > 0 meaning exited or signalled, or other
             # negative value meaning a wait error, like pid NG
             dec_msg = None
             dec_sta = 0
             if pid > 0:
-                wx.MilliSleep(50)
+                ex = self.ch_proc.exec_check()
+                if ex is not None:
+                    self.err_msg(
+                        "CHILD EXEC FAILED: {}".format(self.ch_proc.error))
                 st = self.ch_proc.wait(opts = "nohang")
                 if st >= 0:
                     d = self.ch_proc.decode_wait(st)
@@ -3082,14 +4422,40 @@ elif _in_xws:
             if self.linemax <= len(m):
                 return
 
-            os.write(self.pwr, "SETWName\n".encode('ascii'))
-            self.prdbg("do_setwname SETWName")
+            # if a name is already awaited, the helper has had
+            # its SETWName -- just replace the name to be sent
+            if self.wname_pend == None:
+                os.write(self.pwr, "SETWName\n".encode('ascii'))
+                self.prdbg("do_setwname SETWName")
+                self.wname_timer = wx.CallLater(self.wname_wait_ms,
+                                                self.setwname_send)
+
+            self.wname_pend = m
 
-            wx.MilliSleep(333)
+        # send name awaited after SETWName: on the helper's ready
+        # reply, or from the fallback timer, whichever is first
+        def setwname_send(self):
+            m = self.wname_pend
+            self.wname_pend = None
+
+            t = self.wname_timer
+            self.wname_timer = None
+            if t and t.IsRunning():
+                t.Stop()
+
+            if m == None or self.pwr == None or self.pwr < 0:
+                return
 
             os.write(self.pwr, m)
             self.prdbg(_T("do_setwname '{}'").format(m))
 
+        # handle a reply line from the helper; True if consumed
+        def on_reply(self, s):
+            if s.rstrip().lower() == _T("r:setwname"):
+                self.setwname_send()
+                return True
+            return False
+
         def do_wroot(self):
             if self.pwr == None or self.pwr < 0:
                 return
@@ -3152,8 +4518,8 @@ elif _in_xws:
             bufsize = 4096
 
             try:
-                f1 = os.fdopen(fdr1, "r", bufsize)
-                f2 = os.fdopen(fdr2, "r", bufsize)
+                f1 = FramedReader(fdr1, bufsize)
+                f2 = FramedReader(fdr2, bufsize)
             except OSError as e:
                 put_thd_event(
                     self.app, AThreadEvent(_T("X"), e.strerror, -1))
@@ -3170,9 +4536,10 @@ elif _in_xws:
             # immediately get line max
             try:
                 os.write(fdwr, "linemax\n".encode('ascii'))
-                lin = f1.readline(bufsize)
+                lin = f1.readline()
                 self.check_linemax(lin)
                 bufsize = max(self.linemax, bufsize)
+                f1.bufsize = f2.bufsize = bufsize
                 self.prdbg("linemax read== '{}' check == '{}'".format(
                             lin.rstrip(), self.linemax))
             except OSError as e:
@@ -3203,8 +4570,13 @@ elif _in_xws:
                 pl.register(mpctrl[0], select.POLLIN|errbits)
 
             while True:
+                # with a dropped stderr count not yet reported, wait
+                # only so long for the flood to go on, then report
+                tmo = None
+                if self.err_throttle.dropped:
+                    tmo = self.err_flush_ms
                 try:
-                    rl = pl.poll(None)
+                    rl = pl.poll(tmo)
                 except select.error as e:
                     err, msg = e
                     if err == errno.EINTR or err == errno.EAGAIN:
@@ -3214,6 +4586,9 @@ elif _in_xws:
                     return -1
 
                 if len(rl) == 0:
+                    if tmo is not None:
+                        self.post_dropped()
+                        continue
                     break
 
                 lin = ""
@@ -3222,6 +4597,8 @@ elif _in_xws:
                         continue
                     err = bits & errbits
                     if err:
+                        if fd == fdr2:
+                            self.post_dropped()
                         if fd in flist: flist.remove(fd)
                         try:
                             pl.unregister(fd)
@@ -3285,36 +4662,142 @@ elif _in_xws:
                                              mpctrl[1])))
                             continue
 
-                        # X helper std IO fds?
-                        lin = fN.readline(bufsize)
-
-                        if len(lin) > 0:
-                            put_thd_event(self.app,
-                                          AThreadEvent(pfx, lin))
-                        else:
+                        # X helper std IO fds? -- drain what is
+                        # ready, then post every whole line in one
+                        # event (payload a tuple); a line left
+                        # partial at EOF is passed as is
+                        eof = self.drain_output(fN)
+                        lines = list(fN.lines())
+                        if eof:
+                            lin = fN.get_rest()
+                            if len(lin) > 0:
+                                lines.append(lin)
                             #flist.remove(fd)
                             #pl.unregister(fd)
-                            pass
+
+                        if fd == fdr2:
+                            lines = self.err_throttle.take(lines)
+                            n = self.err_throttle.take_dropped(eof)
+                            if n:
+                                lines.insert(0, _T(
+                                    "(rate cap: {} lines dropped)\n"
+                                    ).format(n))
+
+                        if lines:
+                            put_thd_event(self.app,
+                                  AThreadEvent(pfx, tuple(lines)))
                     else:
                         pass
 
                 if len(flist) == 0:
                     break
 
+            self.post_dropped()
             try:
-                f1.close()
-                f2.close()
+                os.close(fdr1)
+                os.close(fdr2)
             except:
                 pass
 
             return 0
 
-        def check_linemax(self, s):
-            r = re.search(_T(r'^([YN]):([0-9]+)' + '\n*$'), s)
+        # post the helper stderr lines dropped by the rate cap
+        # and not yet reported
+        def post_dropped(self):
+            n = self.err_throttle.take_dropped(True)
+            if n:
+                put_thd_event(self.app, AThreadEvent(_T("2"), (_T(
+                    "(rate cap: {} lines dropped)\n").format(n),)))
+
+        # read from helper output reader until the fd is not
+        # ready, or out_drain_max is read; True on EOF
+        def drain_output(self, fN):
+            pl = select.poll()
+            pl.register(fN.fd, select.POLLIN)
+            n = 0
+            while True:
+                r = fN.fill()
+                if r == 0:
+                    return True
+                n += r
+                if n >= self.out_drain_max or not pl.poll(0):
+                    return False
+
+        def check_linemax(self, s):
+            r = re.search(_T(r'^([YN]):([0-9]+)' + '\n*$'), s)
             if r and r.group(1) == _T('Y'):
                 self.linemax = int(r.group(2))
             return self.linemax
 
+    class MPRIS2Dispatcher:
+        """Serve the helper's MPRIS2 requests for one readiness
+        event from the poll thread: after each request the pipe is
+        checked again, with a short linger since the helper sends
+        its next request as soon as it has a reply, and any that
+        are ready are served in this same event -- so a burst of
+        queries (e.g. a control client starting up) costs one
+        event hop and one 'poll' on the control pipe, rather
+        than one of each per request
+        """
+        linger_ms = 2
+        burst_max = 64
+
+        def __init__(self, wnd, dat):
+            self.w      = wnd
+            self.line_1 = dat[0]
+            self.io_obj = dat[1]
+            self.donefd = dat[2]
+
+        def go(self):
+            cmd = self.line_1
+            n = 0
+            while True:
+                MPRIS2Handler(self.w, (cmd, self.io_obj, -1)).go()
+                n += 1
+                cmd = _T("")
+                if not self.more():
+                    break
+                if n >= self.burst_max:
+                    # let other events in; data already read ahead
+                    # will not poll readable, so pass it on
+                    ev = AThreadEvent(_T("M"),
+                            (_T(""), self.io_obj, self.donefd))
+                    wx.CallAfter(self.w.on_chmsg, ev)
+                    return n
+
+            self.w.prdbg(_T("mpris2 dispatch: {} requests").format(n))
+            self.repoll()
+            return n
+
+        def more(self):
+            fd_rd = self.io_obj.get_fds()[0]
+            if fd_rd < 0 or not self.w.mpris:
+                return False
+            try:
+                r = self.w.mpris2_reader
+                if r.fd == fd_rd and r.pending():
+                    return True
+            except AttributeError:
+                pass
+            pl = select.poll()
+            pl.register(fd_rd, select.POLLIN)
+            try:
+                return len(pl.poll(self.linger_ms)) > 0
+            except select.error:
+                return False
+
+        def repoll(self):
+            if self.donefd < 0:
+                return
+            # use try in case reentrant events closed this
+            try:
+                fd_write(self.donefd, _T("poll"))
+            except (IOError, OSError) as e:
+                self.w.err_msg(_T(
+                    "mpris2 dispatch donefd write error '{}'"
+                    ).format(e.strerror))
+            self.w.block_mpris_signals = False
+
     class MPRIS2Handler:
         def __init__(self, wnd, dat):
             self.w      = wnd
@@ -3322,48 +4805,87 @@ elif _in_xws:
             self.io_obj = dat[1]
             self.donefd = dat[2]
 
-            self._rbuf = _T("")
+            # replies are assembled here and written with one
+            # os.write() when a read is due, or when done
+            self._wbuf = []
+            self._wfd = -1
+            # for -debug: write calls made, and start time
+            self.wr_calls = 0
+            self.tm_start = time.time()
+            # with the framed protocol, the dialog code reads the
+            # request as lines from _script, and its replies are
+            # put in _vals as values for the reply frame
+            self._script = None
+            self._vals = None
 
         def go(self):
+            fd_rd = self.io_obj.get_fds()[0]
+            if fd_rd >= 0 and not self.line_1:
+                # a new reader (new helper) resets the protocol
+                self.get_reader(fd_rd)
+                if self.w.mpris2_proto == mpris2_proto_version:
+                    self.on_mpris2_frame(self.io_obj)
+                    return
             self.on_mpris2(self.line_1, self.io_obj)
 
+        # the pipe is put back in the poll list by the
+        # MPRIS2Dispatcher when it has no more requests
         def done(self):
-            #self.err_msg(_T(
-            #    "mpris2hdlr::done donefd '{}'").format(self.donefd))
-            if self.donefd >= 0:
-                # rapid pace of property queries at startup
-                # seems to overwhelm something (wx wvent loop?
-                # python poll()?) and lockups occur -- try using
-                # bothe callafter and sleep to slow things down
-                def _done_mp(w, fd, sl):
-                    if sl > 0:
-                        wx.MilliSleep(sl)
-                    # use try in case reentrant events closed this
-                    try:
-                        fd_write(fd, _T("poll"))
-                    except (IOError, OSError) as e:
-                        w.err_msg(_T(
-                            "mpris2hdlr::done donefd write error '{}'"
-                            ).format(e.strerror))
-                    w.block_mpris_signals = False
-
-                if True:
-                    _done_mp(self.w, self.donefd, 0)
-                else:
-                    wx.CallAfter(_done_mp, self.w, self.donefd, 0)
+            self.flush()
+            self.prdbg(_T("mpris2hdlr: {} write calls, {:.3f} ms").format(
+                self.wr_calls, (time.time() - self.tm_start) * 1000.0))
 
         def wr(self, fd, v):
-            return fd_write(fd, _Tnec(v))
+            self.wr_raw(fd, fd_encode(v))
+
+        # reply: text m, or with the framed protocol the value val
+        # (if not None -- some text, e.g. "ARGS:", has no value)
+        def put(self, fd, m, val):
+            if self._vals == None:
+                self.wr(fd, m)
+            elif val != None:
+                self._vals.append(val)
+
+        # v must already be encoded, e.g. mpris2_static_replies
+        def wr_raw(self, fd, v):
+            if fd != self._wfd:
+                self.flush()
+                self._wfd = fd
+            self._wbuf.append(v)
+
+        def flush(self):
+            if not self._wbuf:
+                return
+            b = self._wbuf[0] if len(self._wbuf) == 1 else (
+                bytes().join(self._wbuf))
+            self._wbuf = []
+            self.wr_calls += fd_write_all(self._wfd, b)
+
+        # the reader is kept by the window, not per handler,
+        # so that nothing read ahead can be lost between calls
+        def get_reader(self, fd):
+            try:
+                r = self.w.mpris2_reader
+                if r.fd == fd:
+                    return r
+            except AttributeError:
+                pass
+            r = self.w.mpris2_reader = FramedReader(fd)
+            self.w.mpris2_proto = 1
+            return r
 
+        # nbuf is only a hint for the line length expected
         def rd(self, fd, nbuf = 128):
-            while True:
-                p = self._rbuf.find(_T('\n'))
-                if p >= 0:
-                    p += 1
-                    r = self._rbuf[:p]
-                    self._rbuf = self._rbuf[p:]
-                    return r
-                self._rbuf += _T(os.read(fd, nbuf))
+            if self._script != None:
+                if not self._script:
+                    raise IOError(errno.EPIPE, _T("MPRIS2 frame short"))
+                return self._script.pop(0)
+            # the peer will not answer what it has not got
+            self.flush()
+            r = self.get_reader(fd).readline()
+            if not r:
+                raise IOError(errno.EPIPE, _T("MPRIS2 read EOF"))
+            return r
 
         def rdstp(self, fd, nbuf = 128):
             return self.rd(fd, nbuf).strip(_T('\n'))
@@ -3373,7 +4895,7 @@ elif _in_xws:
             self.err_msg(_T("mpris2_send_ack '{}'").format(ack))
 
             try:
-                self.wr(fd_wr, ack)
+                self.put(fd_wr, ack, (_T('s'), ack[:-1]))
                 self.err_msg(_T("MPRIS2 after mpris2_send_ack"))
             except (IOError, OSError) as e:
                 self.err_msg(_T("MPRIS2 write error '{}' in {}").format(
@@ -3394,6 +4916,8 @@ elif _in_xws:
                 return self.mpris2_send_base(fd_rd, fd_wr)
             elif s_eq(level, "player"):
                 return self.mpris2_send_player(fd_rd, fd_wr)
+            elif s_eq(level, "tracklist"):
+                return self.mpris2_send_tracklist(fd_rd, fd_wr)
 
             return False
 
@@ -3407,6 +4931,39 @@ elif _in_xws:
             return self.mpris2_send_prop_or_signal(fd_rd, fd_wr,
                                                    prop, "player")
 
+        def mpris2_send_tracklist(self, fd_rd, fd_wr):
+            prop = self.rdstp(fd_rd, 128)
+            return self.mpris2_send_prop_or_signal(fd_rd, fd_wr,
+                                                   prop, "tracklist")
+
+        # list of lines, NL terminated, for the a{sv} data of
+        # TopWnd.get_mpris2_metadata() -- less the 'a{sv}:' line,
+        # but with the closing ':END ARRAY:'
+        def mpris2_metadata_lines(self, a):
+            r = []
+            for s, v in a:
+                r.append(_T("{}\n").format(s))
+                if v[:3] == _T('as:'):
+                    r.append(_T("as:\n"))
+                    r.append(_T("{}\n").format(v[3:]))
+                    r.append(_T(":END ARRAY:\n"))
+                else:
+                    r.append(_T("{}\n").format(v))
+            r.append(_T(":END ARRAY:\n"))
+            return r
+
+        # the same, as the a{sv} value for the framed protocol
+        def mpris2_metadata_value(self, a):
+            r = []
+            for s, v in a:
+                if v[:3] == _T('as:'):
+                    e = (_T('as'), [(_T('s'), v[3:])])
+                else:
+                    t, v = v.split(_T(':'), 1)
+                    e = mpris2_value_from_text(t, v, None)
+                r.append((_T('{sv}'), ((_T('s'), s), (_T('v'), e))))
+            return (_T('a{sv}'), r)
+
         def mpris2_send_signal(self, rd_ch, wr_ch, signal):
             # dbus signal/property maps as tuples:
             # (object_path, interface_name,
@@ -3468,8 +5025,32 @@ elif _in_xws:
                 )
                 )
 
+            sigtracklistsigs = (
+                _T("/org/mpris/MediaPlayer2\n"),
+                _T("org.mpris.MediaPlayer2.TrackList\n"),
+                _T("signal\n"),
+                ( # tracklist signal signals -- these
+                  # are queued as (name, data) tuples
+                    _T("TrackListReplaced"),    # (ao: Tracks,
+                                                #  o: CurrentTrack)
+                    _T("TrackAdded"),           # (a{sv}: Metadata,
+                                                #  o: AfterTrack)
+                    _T("TrackRemoved"),         # (o: TrackId)
+                    _T("TrackMetadataChanged")  # (o: TrackId,
+                                                #  a{sv}: Metadata)
+                )
+                )
+
             ttup = (sigbasesigs, sigbaseprops,
-                    sigplayersigs, sigplayerprops)
+                    sigplayersigs, sigplayerprops,
+                    sigtracklistsigs)
+
+            sigdat = None
+            if isinstance(signal, tuple):
+                signal, sigdat = signal
+
+            if s_eq(signal, "PropertiesChanged"):
+                return self.mpris2_send_props(rd_ch, wr_ch, sigdat)
 
             opath = ifname = sigtype = None
             for tup in ttup:
@@ -3483,14 +5064,14 @@ elif _in_xws:
                 self.err_msg(
                     _T("signal_emit: unknown signal '{}'").format(
                         signal))
-                self.wr(wr_ch, _T("ACK:NA\n"))
+                self.put(wr_ch, _T("ACK:NA\n"), (_T('s'), _T("ACK:NA")))
                 return False
 
             rsz = 256
 
             # write ack string
             #static const char *ack = "signal";
-            self.wr(wr_ch, _T("signal\n"))
+            self.put(wr_ch, _T("signal\n"), (_T('s'), _T("signal")))
 
             # read method/property -- not used here but
             # the line must be read
@@ -3500,15 +5081,12 @@ elif _in_xws:
                 self.err_msg(
                     _T("signal_emit: unexpected method '{}'").format(r))
 
-            if False:
-                # write object path
-                self.wr(wr_ch, opath)
-                # write interface name
-                self.wr(wr_ch, ifname)
-                # write signal name
-                self.wr(wr_ch, _T("{}\n").format(signal))
-                # write signal type !!! "property" or "signal"
-                self.wr(wr_ch, sigtype)
+            if self._vals != None:
+                # object path, interface, signal name and type
+                self._vals += [(_T('s'), opath[:-1]),
+                               (_T('s'), ifname[:-1]),
+                               (_T('s'), signal),
+                               (_T('s'), sigtype[:-1])]
             else:
                 # multiline write
                 self.wr(wr_ch, _T("{}{}{}{}").format(
@@ -3516,19 +5094,69 @@ elif _in_xws:
 
             # use mpris handler to write GIO/dbus format string and data
             r = self.mpris2_send_prop_or_signal(rd_ch, wr_ch,
-                                                signal, "signal")
+                                                signal, "signal",
+                                                sigdat)
 
             # cleanup and return
             return r
 
+        # a batch from TopWnd.coproc_queue_get(): one signal
+        # of type 'properties' with the changed properties and
+        # values as the a{sv} for PropertiesChanged
+        def mpris2_send_props(self, rd_ch, wr_ch, sigdat):
+            ifname, names = sigdat
+
+            self.put(wr_ch, _T("signal\n"), (_T('s'), _T("signal")))
+
+            r = self.rdstp(rd_ch, 256)
+            if r != _T("signaldata"):
+                self.err_msg(
+                    _T("signal_emit: unexpected method '{}'").format(r))
+
+            if self._vals != None:
+                # each value is put in a list of its own
+                vals, a = self._vals, []
+                for prop in names:
+                    self._vals = []
+                    self.mpris2_send_prop_or_signal(rd_ch, wr_ch,
+                                                    prop, "signal")
+                    a.append((_T('{sv}'),
+                              ((_T('s'), prop), (_T('v'), self._vals[0]))))
+                self._vals = vals
+                self._vals += [(_T('s'), _T("/org/mpris/MediaPlayer2")),
+                               (_T('s'), ifname),
+                               (_T('s'), _T("PropertiesChanged")),
+                               (_T('s'), _T("properties")),
+                               (_T('a{sv}'), a)]
+                return True
+
+            self.wr(wr_ch, _T("{}\n{}\n{}\n{}\n{}\n").format(
+                _T("/org/mpris/MediaPlayer2"), ifname,
+                _T("PropertiesChanged"), _T("properties"),
+                _T("a{sv}:")))
+
+            for prop in names:
+                self.wr(wr_ch, _T("{}\n").format(prop))
+                self.mpris2_send_prop_or_signal(rd_ch, wr_ch,
+                                                prop, "signal")
+
+            self.wr(wr_ch, _T(":END ARRAY:\n"))
+            return True
+
         def mpris2_send_prop_or_signal(self,
                                        fd_rd, fd_wr,
-                                       prop, level):
+                                       prop, level,
+                                       sigdat = None):
             self.err_msg(
                 _T("mpris2 send {} property '{}'").format(
                     level, prop))
 
-            m = _T("b:true\n")
+            # a scalar is type t and value x; others set the
+            # text m, or with the framed protocol the value val
+            fv = self._vals != None
+            t, x = 'b', True
+            m = val = None
+            sn = self.w.get_mpris_snap()
 
             # Cases that would return "b:true\n" will just pass
             #
@@ -3536,102 +5164,136 @@ elif _in_xws:
             if s_eq(prop, "CanQuit"):
                 pass
             elif s_eq(prop, "Fullscreen"):
-                t = "true" if self.w.is_fullscreen() else "false"
-                m = _T("b:{}\n").format(_T(t))
+                x = True if sn.fullscreen else False
             elif s_eq(prop, "CanSetFullscreen"):
                 pass
             elif s_eq(prop, "CanRaise"):
                 pass
             elif s_eq(prop, "HasTrackList"):
-                # TODO:
-                #set true when org.mpris.MediaPlayer2.TrackList done
-                m = _T("b:false\n")
+                pass
             elif s_eq(prop, "Identity"):
-                t = self.w.get_identity()
-                m = _T("s:{}\n").format(t)
+                t, x = 's', self.w.get_identity()
             elif s_eq(prop, "DesktopEntry"):
-                m = _T("s:wxmav\n")
-            elif s_eq(prop, "SupportedUriSchemes"):
-                m = _T("as:\n")
-                self.wr(fd_wr, m)
-                for s in gst_uri_schemes:
-                    m = _T("{}\n").format(s)
-                    self.wr(fd_wr, m)
-                m = _T(":END ARRAY:\n")
-            elif s_eq(prop, "SupportedMimeTypes"):
-                m = _T("as:\n")
-                self.wr(fd_wr, m)
-                for s in gst_mime:
-                    m = _T("{}\n").format(s)
-                    self.wr(fd_wr, m)
-                m = _T(":END ARRAY:\n")
+                t, x = 's', _T("wxmav")
+            elif (s_eq(prop, "SupportedUriSchemes") or
+                  s_eq(prop, "SupportedMimeTypes")):
+                if fv:
+                    self._vals.append(mpris2_static_frames[_Tnec(prop)])
+                else:
+                    self.wr_raw(fd_wr,
+                                mpris2_static_replies[_Tnec(prop)])
+                return True
             # player (or signal)
             elif s_eq(prop, "PlaybackStatus"):
-                m = _T("s:{}\n").format(
-                    self.w.get_playback_state_string())
+                t, x = 's', sn.playback_state_string()
             elif s_eq(prop, "LoopStatus"):
-                t = "Track" if self.w.loop_track else "None"
-                m = _T("s:{}\n").format(_T(t))
+                t = 's'
+                x = _T("Track") if sn.loop_track else _T("None")
             elif s_eq(prop, "Rate"):
-                m = _T("d:1.0\n")
+                t, x = 'd', 1.0
             elif s_eq(prop, "Shuffle"):
-                # TODO: set true when implemented
-                m = _T("b:false\n")
+                x = True if sn.shuffle else False
             elif s_eq(prop, "Metadata"):
-                a = self.w.get_mpris2_metadata()
-                m = _T("a{sv}:\n")
-                self.wr(fd_wr, m)
-                for s, v in a:
-                    m = _T("{}\n").format(s)
-                    self.wr(fd_wr, m)
-                    if v[:3] == _T('as:'):
-                        m = _T("as:\n")
-                        self.wr(fd_wr, m)
-                        m = _T("{}\n").format(v[3:])
-                        self.wr(fd_wr, m)
-                        m = _T(":END ARRAY:\n")
-                        self.wr(fd_wr, m)
-                    else:
-                        m = _T("{}\n").format(v)
-                        self.wr(fd_wr, m)
-                m = _T(":END ARRAY:\n")
+                a = sn.metadata(self.w)
+                if fv:
+                    val = self.mpris2_metadata_value(a)
+                else:
+                    m = _T("a{sv}:\n")
+                    m += _T("").join(self.mpris2_metadata_lines(a))
             elif s_eq(prop, "Volume"):
-                d = float(self.w.vol_max - self.w.vol_min)
-                v = float(self.w.vol_cur - self.w.vol_min) / d
-                m = _T("d:{:f}\n").format(v)
+                t, x = 'd', sn.volume
             elif s_eq(prop, "Position"):
                 # Note >=0 : unbounded Tell() gives playing time
-                if self.w.load_ok and self.w.medi.Length() >= 0:
-                    v = self.w.medi.Tell() * 1000
+                if sn.load_ok and sn.length >= 0:
+                    v = sn.position() * 1000
                 else:
                     v = 0
-                m = _T("x:{}\n").format(long(v))
+                t, x = 'x', long(v)
             elif s_eq(prop, "Seeked"):
                 # dbus signal -- glib wants a tuple
-                v = 0 if (self.w.medi.Length() < 1) else (
-                    self.w.medi.Tell() * 1000)
-                m = _T("(x):{}\n").format(long(v))
+                v = 0 if (sn.length < 1) else (sn.position() * 1000)
+                if fv:
+                    val = (_T('(x)'), [(_T('x'), long(v))])
+                else:
+                    m = _T("(x):{}\n").format(long(v))
             elif s_eq(prop, "MinimumRate") or s_eq(prop, "MaximumRate"):
-                m = _T("d:1.0\n")
+                t, x = 'd', 1.0
             elif s_eq(prop, "CanGoNext"):
-                if self.w.get_next_index() == None:
-                    m = _T("b:false\n")
+                x = True if sn.can_next else False
             elif s_eq(prop, "CanGoPrevious"):
-                if self.w.get_prev_index() == None:
-                    m = _T("b:false\n")
+                x = True if sn.can_prev else False
             elif s_eq(prop, "CanPlay") or s_eq(prop, "CanPause"):
-                if not self.w.reslist:
-                    m = _T("b:false\n")
+                x = True if sn.has_items else False
             elif s_eq(prop, "CanSeek"):
-                if not (self.w.load_ok and self.w.medi.Length() > 0):
-                    m = _T("b:false\n")
+                x = True if (sn.load_ok and sn.length > 0) else False
             elif s_eq(prop, "CanControl"):
-                m = _T("b:true\n")
+                pass
+            # tracklist (or signal)
+            elif s_eq(prop, "Tracks"):
+                ids = self.w.get_tracklist()
+                if fv:
+                    val = (_T('ao'), [(_T('o'), s) for s in ids])
+                else:
+                    l = [_T("ao:\n")]
+                    for s in ids:
+                        l.append(_T("{}\n").format(s))
+                    l.append(_T(":END ARRAY:\n"))
+                    m = _T("").join(l)
+            elif s_eq(prop, "CanEditTracks"):
+                x = False
+            elif s_eq(prop, "TrackListReplaced") and sigdat:
+                ids, cur = sigdat
+                if fv:
+                    val = (_T('(aoo)'),
+                           [(_T('ao'), [(_T('o'), s) for s in ids]),
+                            (_T('o'), cur)])
+                else:
+                    l = [_T("(aoo):\n")]
+                    for s in ids:
+                        l.append(_T("{}\n").format(s))
+                    l.append(_T(":END ARRAY:\n"))
+                    l.append(_T("{}\n").format(cur))
+                    m = _T("").join(l)
+            elif s_eq(prop, "TrackAdded") and sigdat:
+                a, aft = sigdat
+                if fv:
+                    val = (_T('(a{sv}o)'),
+                           [self.mpris2_metadata_value(a),
+                            (_T('o'), aft)])
+                else:
+                    l = [_T("(a{sv}o):\n")]
+                    l += self.mpris2_metadata_lines(a)
+                    l.append(_T("{}\n").format(aft))
+                    m = _T("").join(l)
+            elif s_eq(prop, "TrackRemoved") and sigdat:
+                if fv:
+                    val = (_T('(o)'), [(_T('o'), sigdat)])
+                else:
+                    m = _T("(o):{}\n").format(sigdat)
+            elif s_eq(prop, "TrackMetadataChanged") and sigdat:
+                tid, a = sigdat
+                if fv:
+                    val = (_T('(oa{sv})'),
+                           [(_T('o'), tid),
+                            self.mpris2_metadata_value(a)])
+                else:
+                    l = [_T("(oa{{sv}}):{}\n").format(tid)]
+                    l += self.mpris2_metadata_lines(a)
+                    m = _T("").join(l)
             else:
-                m = _T("b:false\n")
-                self.wr(fd_wr, m)
+                self.put(fd_wr, _T("b:false\n"), (_T('b'), False))
                 return False
 
+            if fv:
+                if val == None:
+                    val = (_T(t), x)
+                self._vals.append(val)
+                return True
+
+            if m == None:
+                m = _T("{}:{}\n").format(
+                    t, mpris2_value_to_text((t, x))[0])
+
             self.err_msg(
                 _T("mpris2 send {} property '{}' -> '{}'").format(
                     level, prop, m))
@@ -3647,14 +5309,18 @@ elif _in_xws:
                 return self.mpris2_recv_base(fd_rd, fd_wr)
             elif s_eq(level, "player"):
                 return self.mpris2_recv_player(fd_rd, fd_wr)
+            elif s_eq(level, "tracklist"):
+                # no writable properties
+                prop = self.rdstp(fd_rd, 128)
+                self.put(fd_wr, _T("b:ng\n"), (_T('s'), _T("ng")))
+                return False
 
             return False
 
         def mpris2_recv_base(self, fd_rd, fd_wr):
             def _propresp(t, ok):
-                m = _T("{t}:{s}\n").format(t = t,
-                    s = "ok" if ok else "ng")
-                self.wr(fd_wr, m)
+                s = _T("ok") if ok else _T("ng")
+                self.put(fd_wr, _T("{}:{}\n").format(t, s), (_T('s'), s))
 
             prop = self.rdstp(fd_rd, 128)
             if False:
@@ -3672,9 +5338,8 @@ elif _in_xws:
 
         def mpris2_recv_player(self, fd_rd, fd_wr):
             def _propresp(t, ok):
-                m = _T("{t}:{s}\n").format(t = t,
-                    s = "ok" if ok else "ng")
-                self.wr(fd_wr, m)
+                s = _T("ok") if ok else _T("ng")
+                self.put(fd_wr, _T("{}:{}\n").format(t, s), (_T('s'), s))
 
             prop = self.rdstp(fd_rd, 128)
             if False:
@@ -3699,6 +5364,12 @@ elif _in_xws:
                 _propresp("b", True)
                 resp = self.rdstp(fd_rd, 128)
                 self.prdbg(_T("MPRIS2 set shuffle {}").format(resp))
+                if s_eq(resp, "true"):
+                    self.w.set_shuffle(do_shuffle = True)
+                elif s_eq(resp, "false"):
+                    self.w.set_shuffle(do_shuffle = False)
+                else:
+                    self.w.set_shuffle(force_signal = True)
             elif s_eq(prop, "Volume"):
                 _propresp("d", True)
                 resp = self.rdstp(fd_rd, 128)
@@ -3721,6 +5392,8 @@ elif _in_xws:
                 return self.mpris2_meth_base(fd_rd, fd_wr)
             elif s_eq(level, "player"):
                 return self.mpris2_meth_player(fd_rd, fd_wr)
+            elif s_eq(level, "tracklist"):
+                return self.mpris2_meth_tracklist(fd_rd, fd_wr)
 
             return False
 
@@ -3728,7 +5401,7 @@ elif _in_xws:
             def _methresp(t, ok):
                 m = _T("{t}:{s}\n").format(t = t,
                     s = "ok" if ok else "ng")
-                self.wr(fd_wr, m)
+                self.put(fd_wr, m, (_T('s'), _T(t)))
 
             self.err_msg(_T("MPRIS2 before mpris2_meth_base READ"))
             meth = self.rdstp(fd_rd, 128)
@@ -3740,6 +5413,7 @@ elif _in_xws:
                 #self.w.Close(False)
                 #wx.CallAfter(self.w.Close, False)
                 self.w._quit_signal = -2
+                self.w.sched_wake()
             elif s_eq(meth, "Raise"):
                 _methresp("VOID", True)
                 self.w.Raise()
@@ -3752,7 +5426,7 @@ elif _in_xws:
             def _methresp(t, ok):
                 m = _T("{t}:{s}\n").format(t = t,
                     s = "ok" if ok else "ng")
-                self.wr(fd_wr, m)
+                self.put(fd_wr, m, (_T('s'), _T(t)))
 
             meth = self.rdstp(fd_rd, 128)
             if False:
@@ -3781,19 +5455,19 @@ elif _in_xws:
                 if st == wx.media.MEDIASTATE_PLAYING:
                     self.w.do_command_button(self.w.id_play)
             elif s_eq(meth, "Seek"):
-                self.wr(fd_wr, _T("ARGS:x\n"))
+                self.put(fd_wr, _T("ARGS:x\n"), None)
                 val = self.rdstp(fd_rd, 128)
                 self.w.mpris_seek_method(val, True)
                 _methresp("VOID", True)
             elif s_eq(meth, "SetPosition"):
-                self.wr(fd_wr, _T("ARGS:o:x\n"))
+                self.put(fd_wr, _T("ARGS:o:x\n"), None)
                 pth = self.rdstp(fd_rd, 4096)
                 val = self.rdstp(fd_rd, 128)
                 if self.w.check_dbus_itempath_current(pth):
                     self.w.mpris_seek_method(val, False)
                 _methresp("VOID", True)
             elif s_eq(meth, "OpenUri"):
-                self.wr(fd_wr, _T("ARGS:s\n"))
+                self.put(fd_wr, _T("ARGS:s\n"), None)
                 val = self.rdstp(fd_rd, 4096)
                 reslist, errs = self.w.do_arg_list([val],
                                             append = True,
@@ -3808,13 +5482,56 @@ elif _in_xws:
 
             return True
 
+        def mpris2_meth_tracklist(self, fd_rd, fd_wr):
+            def _methresp(t, ok):
+                m = _T("{t}:{s}\n").format(t = t,
+                    s = "ok" if ok else "ng")
+                self.put(fd_wr, m, (_T('s'), _T(t)))
+
+            meth = self.rdstp(fd_rd, 128)
+            if False:
+                pass
+            # org.mpris.MediaPlayer2.TrackList methods
+            elif s_eq(meth, "GetTracksMetadata"):
+                self.put(fd_wr, _T("ARGS:ao\n"), None)
+                ids = []
+                while True:
+                    pth = self.rdstp(fd_rd, 4096)
+                    if s_eq(pth, ":END ARRAY:"):
+                        break
+                    ids.append(pth)
+                # whole reply in one write; unknown ids are
+                # skipped as the spec allows
+                ml = [self.w.get_tracklist_metadata(pth) for pth in ids]
+                if self._vals != None:
+                    self._vals.append((_T('s'), _T("RETURN")))
+                    self._vals.append((_T('aa{sv}'),
+                        [self.mpris2_metadata_value(a) for a in ml if a]))
+                else:
+                    l = [_T("aa{sv}:\n")]
+                    for a in ml:
+                        if a:
+                            l += self.mpris2_metadata_lines(a)
+                    l.append(_T(":END ARRAY:\n"))
+                    self.wr(fd_wr, _T("").join(l))
+            elif s_eq(meth, "GoTo"):
+                self.put(fd_wr, _T("ARGS:o\n"), None)
+                pth = self.rdstp(fd_rd, 4096)
+                _methresp("VOID", True)
+                self.w.tracklist_goto(pth)
+            else:
+                # AddTrack, RemoveTrack: CanEditTracks is false
+                _methresp("UNSUPPORTED", True)
+
+            return True
+
         def prdbg(self, m):
             self.w.prdbg(m)
 
         def err_msg(self, m):
             self.w.err_msg(m)
 
-        def on_mpris2(self, cmd, io_desc_pair):
+        def mpris2_get_fds(self, io_desc_pair):
             fd_rd, fd_wr = io_desc_pair.get_fds()
 
             self.w.mpris = (fd_rd >= 0 and fd_wr >= 0)
@@ -3823,20 +5540,70 @@ elif _in_xws:
 
             self.err_msg(_T("self.w.mpris : {}").format(self.w.mpris))
             if not self.w.mpris:
-                return False
+                return None
 
             self.w.block_mpris_signals = True
+            return (fd_rd, fd_wr)
+
+        def on_mpris2(self, cmd, io_desc_pair):
+            fds = self.mpris2_get_fds(io_desc_pair)
+            if not fds:
+                return False
+
+            fd_rd, fd_wr = fds
 
             if not cmd:
                 cmd = self.rdstp(fd_rd, 128)
             self.err_msg(_T("on_mpris2 cmd '{}'").format(cmd))
 
+            ret = self.mpris2_dispatch(cmd, fd_rd, fd_wr)
+
+            self.done()
+            return ret
+
+        # framed protocol: the request frame is made into the
+        # lines the dialog code reads, and the values it puts
+        # are packed into the reply frame
+        def on_mpris2_frame(self, io_desc_pair):
+            fds = self.mpris2_get_fds(io_desc_pair)
+            if not fds:
+                return False
+
+            fd_rd, fd_wr = fds
+
+            b = self.get_reader(fd_rd).readframe()
+            if b == None:
+                raise IOError(errno.EPIPE, _T("MPRIS2 read EOF"))
+
+            vals = mpris2_unpack_frame(b)
+            cmd = vals[0][1]
+            self.err_msg(_T("on_mpris2_frame cmd '{}'").format(cmd))
+
+            l = [vals[1][1]]
+            for v in vals[2:]:
+                l += mpris2_value_to_text(v)
+            self._script = [_T("{}\n").format(t) for t in l]
+            self._vals = []
+
+            try:
+                ret = self.mpris2_dispatch(cmd, fd_rd, fd_wr)
+                vals = self._vals
+            finally:
+                self._script = self._vals = None
+
+            self.wr_raw(fd_wr, mpris2_pack_frame(vals))
+
+            self.done()
+            return ret
+
+        def mpris2_dispatch(self, cmd, fd_rd, fd_wr):
             ret = False
 
             if s_eq(cmd, "send:signal"):
                 sig = self.w.coproc_queue_get()
                 if sig == None:
-                    self.wr(fd_wr, _T("ACK:NA\n"))
+                    self.put(fd_wr, _T("ACK:NA\n"),
+                             (_T('s'), _T("ACK:NA")))
                     self.err_msg(_T("MPRIS cmd signal is N.A."))
                     ret = False
                 else:
@@ -3858,11 +5625,25 @@ elif _in_xws:
                     ret = self.mpris2_recv(fd_rd, fd_wr, cmd, "player")
                 elif s_eq(cmd, "method"):
                     ret = self.mpris2_meth(fd_rd, fd_wr, cmd, "player")
+            elif s_eq(cmd[:10], "tracklist:"):
+                cmd = cmd[10:]
+                if s_eq(cmd, "getproperty"):
+                    ret = self.mpris2_send(fd_rd, fd_wr, cmd, "tracklist")
+                elif s_eq(cmd, "setproperty"):
+                    ret = self.mpris2_recv(fd_rd, fd_wr, cmd, "tracklist")
+                elif s_eq(cmd, "method"):
+                    ret = self.mpris2_meth(fd_rd, fd_wr, cmd, "tracklist")
+            elif s_eq(cmd, _T("proto:{}").format(mpris2_proto_version)):
+                # helper offers the framed protocol; it is used
+                # from the next exchange on
+                self.put(fd_wr, _T("{}\n").format(cmd), (_T('s'), cmd))
+                self.w.mpris2_proto = mpris2_proto_version
+                ret = True
             else:
-                self.wr(fd_wr, _T("UNSUPPORTED\n"))
+                self.put(fd_wr, _T("UNSUPPORTED\n"),
+                         (_T('s'), _T("UNSUPPORTED")))
                 self.err_msg(_T("MPRIS cmd is unsupported"))
 
-            self.done()
             return ret
 
 # end if _in_xws:
@@ -3994,6 +5775,8 @@ class TheAppClass(wx.App):
                 filesys_encoding = m.group(1)
                 return False
             return (arg != "-inspection" and
+                    arg != "-startup-profile" and
+                    arg != "--startup-profile" and
                     arg != "-no-mpris" and
                     arg != "-verbose" and
                     arg != "-debug")
@@ -4055,10 +5838,20 @@ class TheAppClass(wx.App):
                 else:
                     procargs = None
 
+            # helper stderr rate cap: lines/sec[,burst]
+            try:
+                err_rate = tuple(int(v) for v in
+                    os.environ['WXMAV_XHELPER_ERR_RATE'].split(',')[:2])
+                if len(err_rate) < 2:
+                    err_rate += (max(err_rate[0] * 2, 1),)
+            except:
+                err_rate = (100, 200)
+
             self.xhelper = XWSHelperProcClass(
                             self,
                             procargs = procargs,
-                            mpris2 = self.should_do_mpris())
+                            mpris2 = self.should_do_mpris(),
+                            err_rate = err_rate)
             global X11hack
             if X11hack and X11hack["lib_err"]:
                 self.err_msg(_T("Cannot load {} : '{}'").format(
@@ -4115,12 +5908,16 @@ class TheAppClass(wx.App):
             h = 640
         size = wx.Size(w, h)
 
+        startup_mark("app init")
+
         self.frame = TopWnd(
             None, wx.ID_ANY,
             _("(WX) M A/V (Player)"),
             size = size, pos = pos,
             cmdargs = acmd, argplay = argplay)
 
+        startup_mark("main window built")
+
         self.SetTopWindow(self.frame)
 
         self.frame.Show(True)
@@ -4130,6 +5927,18 @@ class TheAppClass(wx.App):
         elif config.ReadBool(_T("maximized"), False):
             self.frame.Maximize(True)
 
+        startup_mark("main window shown")
+
+        # the rest need not hold up the window: helper start
+        # (and, in the frame, the taskbar object) come after
+        # pending events, e.g. the first paint
+        wx.CallAfter(self.start_deferred)
+
+        self.err_msg("PYTHON VERSION: '{}'".format(sys.version))
+
+        return True
+
+    def start_deferred(self):
         if self.xhelper:
             if self.xhelper.go():
                 wx.CallAfter(self.frame.xhelper_ready, self.xhelper)
@@ -4140,9 +5949,12 @@ class TheAppClass(wx.App):
                 self.err_msg(
                     "APP OnInit: Xhelper exec FAIL {}".format(s))
 
-        self.err_msg("PYTHON VERSION: '{}'".format(sys.version))
-
-        return True
+        startup_mark("helper started")
+        # if resuming play, on_media_play reports; in case not ...
+        if self.frame.resume_play:
+            wx.CallLater(15000, startup_report)
+        else:
+            wx.CallAfter(startup_report)
 
 
     def _on_signal(self, signum):
@@ -4315,6 +6127,16 @@ class TheAppClass(wx.App):
             self.do_exit_run()
             return
 
+        # helper output is posted as a tuple of lines per burst
+        if isinstance(dat, tuple) and (t == _T('1') or t == _T('2')):
+            for lin in dat:
+                self.do_chmsg(t, lin)
+            return
+
+        self.do_chmsg(t, dat)
+
+    # one line of helper output, or a handler message
+    def do_chmsg(self, t, dat):
         if t == _T('2'):
             self.do_stderr_msg(dat)
             return
@@ -4326,8 +6148,12 @@ class TheAppClass(wx.App):
             self.do_handler_msg(dat)
             return
 
+        if dat[0:2] == _T("R:") and self.xhelper:
+            if self.xhelper.on_reply(dat):
+                return
+
         if not self.quitting:
-            self.frame.on_chmsg(event)
+            self.frame.do_chmsg(t, dat)
 
     """
     The remainder of the methods of this class concern the child
@@ -4553,12 +6379,25 @@ class MediaPanel(wx.Panel):
         self.med_len = 0
         self.med_sz  = wx.Size(0, 0)
 
+        # hidden second control for preload of next item,
+        # made on first use -- see preload()
+        self.medi_pre = None
+        self.pre_res  = None
+        self.pre_ok   = False
+
         self.last_mouse_pos = wx.DefaultPosition
 
     def _hack_on_color(self):
         self.SetBackgroundColour(wx.Colour(0, 0, 0))
 
     def _mk_medi(self):
+        self.medi = self._new_medi()
+
+        # bindings
+        for event, handler in self.handlers:
+            self.medi.Bind(event, handler)
+
+    def _new_medi(self):
         # the following try block with the wxMSW code is from an
         # example found at
         #    github.com/wxWidgets/wxPython/blob/master/demo/MediaCtrl.py
@@ -4585,11 +6424,11 @@ class MediaPanel(wx.Panel):
                 backend = wx.media.MEDIABACKEND_WMP10
 
             if phoenix:
-                self.medi = wx.media.MediaCtrl()
+                medi = wx.media.MediaCtrl()
             else:
-                self.medi = wx.media.PreMediaCtrl()
+                medi = wx.media.PreMediaCtrl()
 
-            ok = self.medi.Create(
+            ok = medi.Create(
                 self, wx.ID_ANY,
                 pos = wx.DefaultPosition, size = wx.DefaultSize,
                 style = wx.BORDER_NONE,
@@ -4599,16 +6438,85 @@ class MediaPanel(wx.Panel):
                 raise NotImplementedError
 
             if not phoenix:
-                self.medi.PostCreate(self.medi)
+                medi.PostCreate(medi)
         except NotImplementedError:
-            self.medi = wx.media.MediaCtrl(
+            medi = wx.media.MediaCtrl(
                 self, wx.ID_ANY,
                 pos = wx.DefaultPosition, size = wx.DefaultSize,
                 style = wx.BORDER_NONE)
 
-        # bindings
-        for event, handler in self.handlers:
-            self.medi.Bind(event, handler)
+        return medi
+
+    # media events of the preload control must not reach the
+    # top window handlers -- not calling Skip() stops them
+    pre_events = (
+        wx.media.EVT_MEDIA_FINISHED,
+        wx.media.EVT_MEDIA_STOP,
+        wx.media.EVT_MEDIA_LOADED,
+        wx.media.EVT_MEDIA_STATECHANGED,
+        wx.media.EVT_MEDIA_PLAY,
+        wx.media.EVT_MEDIA_PAUSE
+    )
+
+    def _bind_pre(self, medi, bind = True):
+        for event in self.pre_events:
+            if bind:
+                medi.Bind(event, self.on_pre_event)
+            else:
+                medi.Unbind(event)
+
+    def on_pre_event(self, event):
+        if (event.GetEventType() == wx.media.wxEVT_MEDIA_LOADED and
+            self.pre_res != None):
+            self.prdbg(_T("PRELOAD loaded '{}'").format(
+                        _T(self.pre_res)))
+            self.pre_ok = True
+
+    # load res in the hidden control using load_fn(res, medi),
+    # which returns success
+    def preload(self, res, load_fn):
+        if not self.medi_pre:
+            self.medi_pre = self._new_medi()
+            self.medi_pre.Show(False)
+            for event, handler in self.handlers:
+                self.medi_pre.Bind(event, handler)
+            self._bind_pre(self.medi_pre)
+
+        self.pre_ok = False
+        self.pre_res = res
+        if not load_fn(res, self.medi_pre):
+            self.pre_res = None
+            return False
+
+        return True
+
+    def preload_drop(self):
+        if self.pre_res == None:
+            return
+        self.pre_res = None
+        self.pre_ok = False
+        # as TopWnd.unload_media(force = True)
+        self.medi_pre.Load(_T('') if _in_msw else os.devnull)
+
+    # make the preloaded control the current one; return it
+    def preload_swap(self):
+        old, new = self.medi, self.medi_pre
+
+        self._bind_pre(new, False)
+        self._bind_pre(old)
+
+        self.medi, self.medi_pre = new, old
+        new.Show(True)
+        old.Show(False)
+
+        self.pre_ok = False
+        self.pre_res = None
+        old.Load(_T('') if _in_msw else os.devnull)
+
+        self.load_ok = True
+        self.do_new_size()
+
+        return new
 
     def prdbg(self, *args):
         self.GetParent().prdbg(*args)
@@ -4626,10 +6534,12 @@ class MediaPanel(wx.Panel):
         self.med_len = length
         self.med_sz  = size
 
-    def do_new_size(self):
+    # msz: media size to fit, if not the control's best size
+    def do_new_size(self, msz = None):
         xoff = yoff = 0
         ssz = self.GetSize()
-        msz = self.medi.GetBestSize()
+        if msz == None:
+            msz = self.medi.GetBestSize()
 
         # can this happen?
         if ssz.height < 1 or ssz.width < 1:
@@ -6408,6 +8318,19 @@ class TopWnd(wx.Frame):
         self.loop_track = False
         # on current track finish, advance to next and play
         self.adv_track = True
+        # shuffle play: next/prev follow a ShufflePermutation
+        # over the whole set, or only the current group if
+        # shuffle_group; the permutation is rotated so that
+        # shuffle_origin (the track current when shuffle was
+        # set) is the first in shuffled order
+        self.shuffle = False
+        self.shuffle_group = False
+        self.shuffle_seed = random.getrandbits(31)
+        self.shuffle_origin = None
+        self.shuffle_perm = None
+        self.shuffle_key = None
+        # group navigation wants one linear step, even in shuffle
+        self.shuffle_linear_step = False
 
         # set this to a callable object if something must
         # be done in media loaded event handler, e.g. seek & play
@@ -6484,6 +8407,57 @@ class TopWnd(wx.Frame):
         # this stores whether state was playing when drag starts,
         # and determines whether Play() is called
         self.pos_seek_state  = None
+        # main timer duties (see mk_tick_duties()) and flags
+        # that activate some until they have run
+        self.tick_duties = []
+        self.tick_next_tm = 0.0
+        self.autosave_due = False
+        self.mpris_check_due = False
+        # media length samples for the loaded item
+        self.len_track = None
+        # seek scheduler: only the latest target is kept, backend
+        # seeks are at most one per seek_cadence ms, with a trailing
+        # seek by timer; Seeked is signalled once, when settled
+        self.seek_target  = -1
+        self.seek_sent    = -1
+        self.seek_last_tm = 0.0
+        self.seek_timer   = None
+        self.seek_cadence = 200
+        # optional gapless mode: near the end of a track the next
+        # one is loaded in a hidden second MediaCtrl, which is
+        # swapped in on finish (config gapless_preload, and
+        # gapless_ahead_ms before the end)
+        self.gapless        = False
+        self.gapless_ahead  = 5000
+        self.pre_ix         = None
+        self.pre_is_uri     = False
+        # track finish time, for the gap to next play in debug out
+        self.gap_t0         = None
+        # resources that failed to load: next/prev skip them
+        # without a backend load until their retry time
+        self.fail_cache     = FailCache()
+        # streams being checked in a thread, see tick_revalidate
+        self.revalidate_busy = set()
+        # resume positions of long items, by resname, written
+        # with the config; medi_res is the resname in self.medi
+        self.res_pos = ResumeStore(os.path.join(
+            wx.GetApp().get_data_dir(), _T("resume.pos")))
+        self.res_pos_min_len = 600000
+        self.res_pos_margin  = 30000
+        self.medi_res        = None
+        # play history, for MPRIS xesam:useCount etc.; hist_res
+        # is the loaded resname once its play is recorded
+        self.play_hist = PlayHistory(os.path.join(
+            wx.GetApp().get_data_dir(), _T("history")))
+        self.play_hist.start()
+        self.hist_res  = None
+        # page cache prefetch of the next local file, once play
+        # is within prefetch_ahead_ms of the end; load_t0 is the
+        # load start, for load latency in debug out
+        self.prefetch_ahead = 30000
+        self.prefetch_res   = None
+        self.prefetch_thd   = None
+        self.load_t0        = None
 
         # manager for undo/redo stacks
         self.undo_redo = UndoRedoManager()
@@ -6494,12 +8468,32 @@ class TopWnd(wx.Frame):
             # handler should discard first when put() fails
             self.coproc_fifo = q_fifo(32)
             self.block_mpris_signals = False
+        # MPRIS2 property changes are not queued singly: names
+        # gather here by interface, without duplicates, until a
+        # flush puts the interface in mpris_props_ready, and then
+        # coproc_queue_get() hands out each ready interface as one
+        # PropertiesChanged -- so none are lost to a full queue
+        self.mpris_props = {}
+        self.mpris_props_ready = []
+        self.mpris_props_flush_due = False
+        # ms to gather property changes; 0 is end of current event
+        self.mpris_debounce = 0
         # set by MPRIS2 Seek and SetPosition handlers --
         # must be scrupulously reset to -1
         self.mpris_seek = -1
         # this is set to an object on mpris setup; set back
         # to None on error, and is tested in various places
         self.mpris = None
+        # PlayerSnapshot for MPRIS2 property reads: dropped each
+        # timer tick and on state changes, made again when wanted
+        self.mpris_snap = None
+        # MPRIS2 TrackList: only a window of tracklist_span ids
+        # around the current track is published, with an id to
+        # indice map and a metadata cache for that window
+        self.tracklist_span = 24
+        self.tracklist_ids = []
+        self.tracklist_map = {}
+        self.tracklist_meta = {}
 
         # get config values here, in case a setting applies
         # to interface objects created below
@@ -6589,6 +8583,21 @@ class TopWnd(wx.Frame):
         self.medi = self.player_panel.medi
         self.medi.SetVolume(0.5)
 
+        # resuming last state: start the backend load of the
+        # resume item now, while the rest of the window is built
+        # and the helper starts -- its loaded event is handled
+        # after __init__ returns, when load_func is set in the
+        # restore state code, below
+        self.early_res = None
+        self.resume_play = False
+        if (cfvals and cfvals[_T("res_restart")] and
+            cmdargs and not argplay and
+            (cfvals[_T("playing")] or cfvals[_T("current_pos")] > 0)):
+            r = cfvals[_T("current_res")]
+            if r and self.load_media(r):
+                self.early_res = r
+                startup_mark("resume load started")
+
         self.medi_has_mouse = True #False
         self.medi_tick = -1
         self.medi_tick_span = 4
@@ -6600,10 +8609,17 @@ class TopWnd(wx.Frame):
         if cfvals:
             self.loop_track    = cfvals[_T("loop_play")]
             self.adv_track     = cfvals[_T("auto_advance")]
+            self.shuffle       = cfvals[_T("shuffle")]
+            self.shuffle_group = cfvals[_T("shuffle_group")]
+            if cfvals[_T("shuffle_seed")] > 0:
+                self.shuffle_seed = cfvals[_T("shuffle_seed")]
+            if cfvals[_T("shuffle_origin")] >= 0:
+                self.shuffle_origin = cfvals[_T("shuffle_origin")]
         self.make_menu_bar()
         self.make_status_bar()
         self.make_tool_bar()
-        self.set_taskbar_object()
+        # tray icon is not needed to show the window
+        wx.CallAfter(self.set_taskbar_object)
 
         self.SetToolBar(self.toolbar)
         szr.Add(self.toolbar2, 0, wx.EXPAND | wx.ALL, 0)
@@ -6735,9 +8751,11 @@ class TopWnd(wx.Frame):
         self.dialog_savegroup = None
         self.dialog_saveset   = None
 
-        # start main timer
+        # start main timer -- one-shot, see run_tick_duties()
         self.main_timer = wx.Timer(self, 1)
-        self.main_timer.Start(1000, False)
+        self.mk_tick_duties()
+        self.tick_next_tm = time.time() + 1.0
+        self.main_timer.Start(1000, True)
 
         if not cmdargs:
             cmdargs = []
@@ -6752,11 +8770,14 @@ class TopWnd(wx.Frame):
             argplay = False
 
         self.reslist = []
+        # without args, cmdargs is the saved set: its groups
+        # are parsed only when used (AVGroupListFileLazy)
         reslist, errs = self.do_arg_list(
                                         cmdargs, append = True,
                                         recurse = False,
                                         play = argplay,
-                                        pushundo = False)
+                                        pushundo = False,
+                                        lazy = not argplay)
         self.prdbg(_T("LIST w/ {} groups").format(len(self.reslist)))
         if self.getdbg():
             for n, g in enumerate(self.reslist):
@@ -6796,6 +8817,16 @@ class TopWnd(wx.Frame):
                     do_state = ok
 
         self.prdbg(_T("DO RESTORE STATE: {}").format(do_state))
+        early_res, self.early_res = self.early_res, None
+        if early_res:
+            it = None
+            if do_state:
+                it = self.get_reslist_item(cfvals[_T("resource_index")])
+            if not (it and s_eq(it.resname, early_res)):
+                # set changed under the saved state? drop it
+                self.prdbg(_T("RESTORE STATE early load unused"))
+                self.unload_media(force = True)
+                early_res = None
         if do_state:
             self.media_indice = cfvals[_T("resource_index")]
             self.group_indice = cfvals[_T("group_index")]
@@ -6805,6 +8836,8 @@ class TopWnd(wx.Frame):
             if pos < 0:
                 pos = 0
 
+            self.resume_play = cfvals[_T("playing")]
+
             def _st_aft(self, pos, pl):
                 if pl:
                     f = lambda: self._seek_and_play(pos)
@@ -6822,12 +8855,20 @@ class TopWnd(wx.Frame):
                         self.load_func = None
 
             self.set_tb_combos()
-            wx.CallAfter(_st_aft, self, pos, cfvals[_T("playing")])
+            if early_res:
+                # loaded event not handled yet, so this is in time
+                if cfvals[_T("playing")]:
+                    self.load_func = lambda: self._seek_and_play(pos)
+                else:
+                    self.load_func = lambda: self._seek_and_pause(pos)
+            else:
+                wx.CallAfter(_st_aft, self, pos, cfvals[_T("playing")])
 
 
     def do_arg_list(self, files,
                     append = False, recurse = False, play = True,
-                    pushundo = True, uri_filter_permissive = True):
+                    pushundo = True, uri_filter_permissive = True,
+                    lazy = False):
         up = uri_filter_permissive
 
         if not append:
@@ -6854,7 +8895,8 @@ class TopWnd(wx.Frame):
 
         reslist, errs = get_lst_from_args(*files,
                                           dir_recurse = recurse,
-                                          uri_filter_permissive = up)
+                                          uri_filter_permissive = up,
+                                          lazy_pls = lazy)
         if not reslist:
             return (None, errs)
         if pushundo:
@@ -7078,11 +9120,13 @@ class TopWnd(wx.Frame):
             doemit = force
             sset = []
 
+            sn = self.get_mpris_snap()
+
             try:
                 b = self.cangonext
             except AttributeError:
                 b = self.cangonext = None
-            c = self.get_can_do_next()
+            c = sn.can_next
             if b != c:
                 self.cangonext = c
                 sset.append(_T("CanGoNext"))
@@ -7092,7 +9136,7 @@ class TopWnd(wx.Frame):
                 b = self.cangoprev
             except AttributeError:
                 b = self.cangoprev = None
-            c = self.get_can_do_prev()
+            c = sn.can_prev
             if b != c:
                 self.cangoprev = c
                 sset.append(_T("CanGoPrevious"))
@@ -7102,8 +9146,7 @@ class TopWnd(wx.Frame):
                 b = self.canplay
             except AttributeError:
                 b = self.canplay = None
-            c = True if (
-                self.reslist and len(self.reslist) > 0) else False
+            c = sn.has_items
             if b != c:
                 self.canplay = c
                 sset.append(_T("CanPlay"))
@@ -7118,7 +9161,7 @@ class TopWnd(wx.Frame):
                 l = self.lastlen
             except AttributeError:
                 l = self.lastlen = None
-            lcur = self.medi.Length()
+            lcur = sn.length
             c = True if lcur > 0 else False
             if b != c or (l != lcur and lcur > 0):
                 self.canseek = c
@@ -7139,20 +9182,26 @@ class TopWnd(wx.Frame):
             # makes the control programs work as expected --
             # maybe there is an expected sequence of signal
             # emissions that is not documented for MPRIS2.
+            # (These are all batched into one PropertiesChanged
+            # now, so the extra property costs no dialog.)
             if doemit:
                 sset.append(_T("PlaybackStatus"))
                 for s in sset:
                     self.mpris2_signal_emit(s)
+                # these are from the snapshot, which is still good
+                self.mpris_snap = sn
             else:
                 # check if queue is not empty, and if not prod coproc
                 fifo = self.coproc_fifo
-                if not fifo.empty():
+                if not fifo.empty() or self.mpris_props_ready:
                     self._x_core_mpris2_signal_emit()
 
-        def metadata_check(self):
+        def metadata_check(self, tracklist_replace = False):
             if not self.mpris:
                 return
 
+            self.tracklist_check(replace = tracklist_replace)
+
             g, i = self.get_res_group_with_index()
             curtuple = None
             try:
@@ -7178,7 +9227,7 @@ class TopWnd(wx.Frame):
                 l = self.lastlen
             except AttributeError:
                 l = self.lastlen = None
-            lcur = self.medi.Length()
+            lcur = self.media_length()
 
             if (curtuple == None or
                 curtuple[0] != gid or curtuple[1] != uid or
@@ -7210,8 +9259,9 @@ class TopWnd(wx.Frame):
                       _T('o:{}').format(resid)))
 
             l = 0
-            if self.load_ok and self.medi.Length() > 0:
-                l = self.medi.Length()
+            iscur = (idx == None or idx == self.media_indice)
+            if iscur and self.load_ok and self.media_length() > 0:
+                l = self.media_length()
             elif i.length > 0:
                 l = i.length
             # length attribute needs microsecs (we have millisecs)
@@ -7230,7 +9280,7 @@ class TopWnd(wx.Frame):
             ids = _Tencode(ids)
             gds = _Tencode(g.get_desc())
 
-            xm = get_xesam_map(nam)
+            xm = get_xesam_map(nam, self.play_hist.get(i.resname))
             td = _Tencode(xm['title']) if xm['title'] else ids
             r.append((_T("xesam:title"), _T('s:{}').format(td)))
             td = _Tencode(xm['album']) if xm['album'] else gds
@@ -7261,15 +9311,170 @@ class TopWnd(wx.Frame):
                 r.append((_T("xesam:url"),
                           _T('s:{}').format(_Tencode(xm['url']))))
 
+            if xm['useCount'] != None:
+                r.append((_T("xesam:useCount"),
+                          _T('i:{}').format(xm['useCount'])))
+                r.append((_T("xesam:firstUsed"),
+                          _T('s:{}').format(xm['firstUsed'])))
+                r.append((_T("xesam:lastUsed"),
+                          _T('s:{}').format(xm['lastUsed'])))
+
+            return r
+
+
+        # indices of the TrackList window: tracklist_span tracks
+        # around the current, in play order (shuffled, if so)
+        def get_tracklist_indices(self):
+            l = self.get_reslist_len()
+            if not l:
+                return []
+
+            p = pos = None
+            if self.shuffle:
+                p, base = self.get_shuffle_perm()
+                if p != None:
+                    pos = p.index_of(self.media_indice - base)
+
+            if pos == None:
+                n = l
+                cur = self.media_indice
+                _at = lambda pos: pos
+            else:
+                n = p.size
+                o = self.shuffle_origin
+                cur = (pos - o) % n
+                _at = lambda pos: base + p.at((pos + o) % n)
+
+            span = self.tracklist_span
+            start = max(0, min(cur - span // 2, n - span))
+            end = min(n, start + span)
+
+            return [_at(i) for i in range(start, end)]
+
+        def get_tracklist(self):
+            if not self.tracklist_ids:
+                self.tracklist_check()
+            return self.tracklist_ids
+
+        # find total indice of a track id -- window map first,
+        # then the (linear) search through the set
+        def get_tracklist_indice(self, objpath):
+            try:
+                return self.tracklist_map[objpath]
+            except KeyError:
+                pass
+
+            obj, ifc = self.get_dbus_dom_app()
+            pfx = _T("{}/").format(obj)
+            if not s_eq(objpath[:len(pfx)], pfx):
+                return None
+            t = objpath[len(pfx):].split(_T('/'))
+            if len(t) != 2:
+                return None
+
+            gid, uid = t
+            l = 0
+            for g in self.reslist:
+                if s_eq(_T(g.uniq), gid):
+                    for i, it in enumerate(g.data):
+                        if s_eq(_T(it.uniq), uid):
+                            return l + i
+                    return None
+                l += g.get_len()
+
+            return None
+
+        # metadata for GetTracksMetadata: the current track is
+        # always fresh (length may still be converging), others
+        # come from the window cache
+        def get_tracklist_metadata(self, objpath):
+            idx = self.get_tracklist_indice(objpath)
+            if idx == None:
+                return None
+
+            if idx == self.media_indice:
+                return self.get_mpris2_metadata(idx)
+
+            try:
+                return self.tracklist_meta[objpath]
+            except KeyError:
+                pass
+
+            r = self.get_mpris2_metadata(idx)
+            if objpath in self.tracklist_map:
+                self.tracklist_meta[objpath] = r
+
             return r
 
+        def tracklist_goto(self, objpath):
+            idx = self.get_tracklist_indice(objpath)
+            if idx == None or idx == self.media_indice:
+                return False
+
+            return self.cmd_goto_index(idx, from_user = True)
+
+        # recompute the TrackList window and signal the change:
+        # a small diff as TrackRemoved/TrackAdded, else (or if
+        # replace) as one TrackListReplaced
+        def tracklist_check(self, replace = False):
+            ixs = self.get_tracklist_indices()
+            ids = []
+            idmap = {}
+            for ix in ixs:
+                g, i = self.get_res_group_with_index(ix)
+                if g == None or i == None:
+                    continue
+                pth = self.get_dbus_itempath(g, g.get_at_index(i))
+                ids.append(pth)
+                idmap[pth] = ix
+
+            old = self.tracklist_ids
+            if not replace and ids == old:
+                return
+
+            self.tracklist_ids = ids
+            self.tracklist_map = idmap
+
+            if replace:
+                self.tracklist_meta = {}
+            else:
+                for k in list(self.tracklist_meta.keys()):
+                    if not k in idmap:
+                        del self.tracklist_meta[k]
+
+            if not self.mpris:
+                return
+
+            oldset = set(old)
+            gone = [s for s in old if not s in idmap]
+            added = [s for s in ids if not s in oldset]
+
+            if (replace or not old or
+                len(gone) + len(added) > self.tracklist_span // 4):
+                cur = self.get_dbus_itempath_current()
+                self.mpris2_signal_emit(
+                    (_T("TrackListReplaced"), (list(ids), cur)))
+                return
+
+            for s in gone:
+                self.mpris2_signal_emit((_T("TrackRemoved"), s))
+
+            notrack = _T("/org/mpris/MediaPlayer2/TrackList/NoTrack")
+            for s in added:
+                i = ids.index(s)
+                aft = ids[i - 1] if i > 0 else notrack
+                a = self.get_tracklist_metadata(s)
+                self.mpris2_signal_emit((_T("TrackAdded"), (a, aft)))
 
     # not in _in_xws, but stubs convenient
     else:
         def mpris_sendsignal_check(self, force = False):
             pass
 
-        def metadata_check(self):
+        def metadata_check(self, tracklist_replace = False):
+            pass
+
+        def tracklist_check(self, replace = False):
             pass
 
     # END dbus interface/object misc.
@@ -7311,6 +9516,8 @@ class TopWnd(wx.Frame):
             for cur in g.data:
                 s = _T(cur.get_desc_disp_str(True) or
                        cur.get_res_disp_str())
+                if cur.err:
+                    s = _("(failed) {}").format(s)
                 self.cbox_resrc.Append(s)
             self.cbox_resrc.SetSelection(ig)
 
@@ -7436,6 +9643,7 @@ class TopWnd(wx.Frame):
                 pass
 
         self.pending_notification = (title, message)
+        wx.CallAfter(self._show_notification_message)
 
     def _show_notification_message(self):
         try:
@@ -7550,6 +9758,18 @@ class TopWnd(wx.Frame):
                         _("Auto play next track after current"),
                         wx.ITEM_CHECK)
         mctrl.Check(cur, self.adv_track)
+        # shuffle play
+        self.mctrl_shuffle = cur = I()
+        mctrl.Append(cur, _("S&huffle"),
+                        _("Play tracks in shuffled order"),
+                        wx.ITEM_CHECK)
+        mctrl.Check(cur, self.shuffle)
+        # shuffle only within current group
+        self.mctrl_shuffle_grp = cur = I()
+        mctrl.Append(cur, _("Shuffle &Within Group"),
+                        _("Shuffle tracks of the current group only"),
+                        wx.ITEM_CHECK)
+        mctrl.Check(cur, self.shuffle_group)
         # separator
         mctrl.AppendSeparator()
         # play
@@ -8248,10 +10468,14 @@ class TopWnd(wx.Frame):
                 self.media_indice += self.reslist[i].get_len()
             self.set_tb_combos(do_group = False, do_resrc = True)
         else:
+            # the item picked, even if known bad: not next/prev,
+            # which pass over bad items
             ix = 0
             for i in range(ig):
                 ix += self.reslist[i].get_len()
-            self.media_indice = ix + rix
+            self.shuffle_linear_step = False
+            self.cmd_goto_index(ix + rix, from_user = True)
+            return
 
         if self.media_indice > 0:
             self.media_indice -= 1
@@ -8271,16 +10495,16 @@ class TopWnd(wx.Frame):
             self.on_quit(event)
         elif i == self.mfile_openfile:
             self.dialog_open_file()
-            self.metadata_check()
+            self.metadata_check(tracklist_replace = True)
         elif i == self.mfile_opendir:
             self.dialog_open_dirs()
-            self.metadata_check()
+            self.metadata_check(tracklist_replace = True)
         elif i == self.mfile_opendir_recurse:
             self.dialog_open_dirs(recurse = True)
-            self.metadata_check()
+            self.metadata_check(tracklist_replace = True)
         elif i == self.mfile_openurl:
             self.dialog_open_uri()
-            self.metadata_check()
+            self.metadata_check(tracklist_replace = True)
         ## saves
         elif i == self.mfile_savegrp:
             self.dialog_save_group()
@@ -8290,24 +10514,25 @@ class TopWnd(wx.Frame):
         ## regrets
         elif i == self.medit_undo:
             self.do_undo()
-            self.metadata_check()
+            self.metadata_check(tracklist_replace = True)
         elif i == self.medit_redo:
             self.do_redo()
-            self.metadata_check()
+            self.metadata_check(tracklist_replace = True)
         ## set edit dialog
         elif i == self.medit_editor:
             self.dialog_set_editor()
-            self.metadata_check()
+            self.metadata_check(tracklist_replace = True)
         ## set title tags on group items
         elif i == self.medit_grtags:
             self.do_group_items_desc_from_tags()
+            self.metadata_check(tracklist_replace = True)
         ## deletes
         elif i == self.medit_delegrp:
             self.delete_group()
-            self.metadata_check()
+            self.metadata_check(tracklist_replace = True)
         elif i == self.medit_deleset:
             self.delete_set()
-            self.metadata_check()
+            self.metadata_check(tracklist_replace = True)
         # Controls menu
         elif i == self.mctrl_loop:
             b = self.loop_track
@@ -8316,6 +10541,11 @@ class TopWnd(wx.Frame):
                 self.mpris2_signal_emit(_T("LoopStatus"))
         elif i == self.mctrl_advance:
             self.adv_track = self.mctrl.IsChecked(self.mctrl_advance)
+        elif i == self.mctrl_shuffle:
+            self.set_shuffle(self.mctrl.IsChecked(self.mctrl_shuffle))
+        elif i == self.mctrl_shuffle_grp:
+            self.set_shuffle(
+                group = self.mctrl.IsChecked(self.mctrl_shuffle_grp))
         elif i == self.mctrl_play:
             self.do_command_button(self.id_play)
         elif i == self.mctrl_pause:
@@ -8584,9 +10814,37 @@ class TopWnd(wx.Frame):
         if force_signal:
             self.mpris2_signal_emit(_T("LoopStatus"))
 
+    def set_shuffle(self, do_shuffle = None, group = None,
+                          force_signal = False):
+        b = self.shuffle
+        if do_shuffle != None:
+            self.shuffle = True if do_shuffle else False
+        if group != None:
+            self.shuffle_group = True if group else False
+
+        if b != self.shuffle:
+            force_signal = True
+        # new order each time shuffle is set, starting here
+        if self.shuffle and (force_signal or group != None):
+            self.shuffle_seed = random.getrandbits(31)
+            self.shuffle_origin = None
+            self.shuffle_perm = None
+            self.shuffle_key = None
+
+        if self.mctrl.IsChecked(self.mctrl_shuffle) != self.shuffle:
+            self.mctrl.Check(self.mctrl_shuffle, self.shuffle)
+        if self.mctrl.IsChecked(
+                self.mctrl_shuffle_grp) != self.shuffle_group:
+            self.mctrl.Check(self.mctrl_shuffle_grp, self.shuffle_group)
+
+        if force_signal:
+            self.mpris2_signal_emit(_T("Shuffle"))
+            self.tracklist_check(replace = True)
+
     # see comment in ctor, where this is Bind()ed
     def on_iconize_event(self, event):
         self.do_tb2_size(None)
+        self.sched_wake()
         # if restored from minimized state:
         if not event.IsIconized():
             if _in_gtk:
@@ -8715,19 +10973,18 @@ class TopWnd(wx.Frame):
                 del butid[butid.index(self.id_next)]
                 self.get_obj_by_id(self.id_prev).Enable(False)
                 del butid[butid.index(self.id_prev)]
-            elif self.media_indice <= 0:
-                self.mctrl.Enable(self.mctrl_next, True)
-                self.mctrl.Enable(self.mctrl_previous, False)
-                self.get_obj_by_id(self.id_prev).Enable(False)
-                del butid[butid.index(self.id_prev)]
-            elif self.media_indice >= (l - 1):
-                self.mctrl.Enable(self.mctrl_next, False)
-                self.mctrl.Enable(self.mctrl_previous, True)
-                self.get_obj_by_id(self.id_next).Enable(False)
-                del butid[butid.index(self.id_next)]
             else:
-                self.mctrl.Enable(self.mctrl_next, True)
-                self.mctrl.Enable(self.mctrl_previous, True)
+                # get_can_do_* rather than indice tests: shuffle
+                cn = self.get_can_do_next()
+                cp = self.get_can_do_prev()
+                self.mctrl.Enable(self.mctrl_next, cn)
+                self.mctrl.Enable(self.mctrl_previous, cp)
+                if not cp:
+                    self.get_obj_by_id(self.id_prev).Enable(False)
+                    del butid[butid.index(self.id_prev)]
+                if not cn:
+                    self.get_obj_by_id(self.id_next).Enable(False)
+                    del butid[butid.index(self.id_next)]
 
             l = self.get_res_group_len()
             g = self.get_res_group_current()
@@ -8784,6 +11041,11 @@ class TopWnd(wx.Frame):
 
         self.set_medi_state(wx.media.MEDIASTATE_STOPPED)
 
+        # played through: next time from the start
+        if self.medi_res:
+            self.res_pos.drop(self.medi_res)
+            self.play_hist.record(self.medi_res, "finish")
+
         dn, med, des, com, err, lth = self.get_reslist_item_tup()
 
         nm = _T(des or dn or med)
@@ -8798,6 +11060,11 @@ class TopWnd(wx.Frame):
             wx.CallAfter(self.cmd_on_play)
             return
 
+        if self.adv_track:
+            self.gap_t0 = time.time()
+            if self.preload_swap():
+                return
+
         self.unload_media()
         self.in_play = False
         self.in_stop = False
@@ -8837,6 +11104,20 @@ class TopWnd(wx.Frame):
         self.prdbg(_T("Media event: EVT_MEDIA_PLAY"))
 
         self.set_medi_state(wx.media.MEDIASTATE_PLAYING)
+        # -startup-profile: launch to playback, if resuming play
+        startup_mark("playback started")
+        startup_report()
+
+        if self.gap_t0 != None:
+            self.prdbg(_T("Track gap: {:.1f} ms").format(
+                        (time.time() - self.gap_t0) * 1000.0))
+            self.gap_t0 = None
+
+        # one play per load, not per resume from pause
+        if self.medi_res and self.hist_res == None:
+            self.hist_res = self.medi_res
+            self.play_hist.record(self.medi_res)
+            self.mpris2_signal_emit(_T("Metadata"))
 
         self.set_pause_label()
         self.in_play = True
@@ -9023,10 +11304,20 @@ class TopWnd(wx.Frame):
         self.set_medi_state(wx.media.MEDIASTATE_STOPPED)
         self.canseek = None
         self.lastlen = None
+        self.len_track = LengthTracker(self.get_reslist_item())
 
         call_me = self.load_func
         self.load_func = None
 
+        if self.load_t0 != None:
+            self.prdbg(_T("Load latency: {:.1f} ms").format(
+                        (time.time() - self.load_t0) * 1000.0))
+            self.load_t0 = None
+
+        it = self.get_reslist_item()
+        if it:
+            self.res_loaded(it.resname)
+
         ln, sz = self.check_set_media_meta()
         if sz.width == 0 or sz.height == 0 or ln == 0:
             ln, sz = self.check_set_media_meta(True)
@@ -9068,8 +11359,17 @@ class TopWnd(wx.Frame):
         if ln > 0:
             self.set_statusbar(self.get_time_str(tm = ln), 1)
 
+        pos = -1
+        if not (call_me or self.in_play):
+            pos = self.res_pos_resume()
+
         if call_me:
             wx.CallAfter(call_me)
+        elif pos > 0:
+            self.prdbg(_T("with_media_loaded: resume at {}").format(
+                        self.get_time_str(tm = pos, wm = True)))
+            self._seek_and_play(pos)
+            self.focus_medi_opt()
         elif not self.in_play:
             self.medi_pause()
 
@@ -9082,7 +11382,7 @@ class TopWnd(wx.Frame):
         self.mpris_sendsignal_check(force=True)
 
     def slider_setup(self, pos = None):
-        ln = self.medi.Length()
+        ln = self.media_length()
         if not ln and pos == None:
             pos = 0
         psf = float(self.pos_mul)
@@ -9113,7 +11413,11 @@ class TopWnd(wx.Frame):
         return ln
 
     def unload_media(self, force = False):
+        self.res_pos_note()
+        self.medi_res = None
+        self.hist_res = None
         self.load_ok = False
+        self.len_track = None
 
         if not self.medi:
             return False
@@ -9137,7 +11441,10 @@ class TopWnd(wx.Frame):
             return True
 
     def load_media(self, med = None):
-        dn, med, des, com, err, lth = self.get_reslist_item_tup()
+        self.load_t0 = time.time()
+        if med == None:
+            dn, med, des, com, err, lth = self.get_reslist_item_tup()
+            self.presize_media(self.get_reslist_item())
 
         if not med:
             return False
@@ -9146,12 +11453,30 @@ class TopWnd(wx.Frame):
         if not s:
             return False
 
+        ret, self.media_current_is_uri = self._load_res(s, self.medi)
+
+        if self.msg_grep:
+            self.err_msg(_T("IN load_media: {}").format(self.msg_grep))
+            self.load_ok = False
+            self.msg_grep = None
+        else:
+            self.load_ok = ret
+
+        if self.load_ok:
+            self.medi_res = s
+            wx.CallAfter(self.check_set_media_meta, True)
+
+        return self.load_ok
+
+    # backend load of resource s in medi: returns (success, is_uri)
+    def _load_res(self, s, medi):
         ret = False
+        is_uri = False
 
         r = re.match(_T(r'^([A-Za-z]+)://.*/.*$'), _T(s))
         if r:
             # URI form
-            self.media_current_is_uri = True
+            is_uri = True
             # TODO: user specified proxy(s) for protocol set(s)
             prx = None
             try:
@@ -9161,11 +11486,10 @@ class TopWnd(wx.Frame):
 
             # load with proxy has been failing, silently
             if prx and self.can_use_proxy:
-                ret = bool(self.medi.LoadURIWithProxy(s, prx))
+                ret = bool(medi.LoadURIWithProxy(s, prx))
             else:
-                ret = bool(self.medi.LoadURI(s))
+                ret = bool(medi.LoadURI(s))
         else:
-            self.media_current_is_uri = False
             # assume local file
             # wxPython bug: tries to decode arg with utf-8 codec,
             # ignoring that, at least on Unix, fs paths/names are
@@ -9186,11 +11510,11 @@ class TopWnd(wx.Frame):
                             # tested w/ MSW7; WMP 12.0.7601.23517 --
                             # no exception; either failure return
                             # or hang!
-                            t = bool(self.medi.Load(v))
+                            t = bool(medi.Load(v))
                         else:
-                            t = bool(self.medi.LoadURI(do_uri_file(v)))
+                            t = bool(medi.LoadURI(do_uri_file(v)))
                     except:
-                        t = bool(self.medi.Load(v))
+                        t = bool(medi.Load(v))
                     if t:
                         failed = False
                         break
@@ -9204,17 +11528,7 @@ class TopWnd(wx.Frame):
                         ).format(i, _T(v)))
             ret = not failed
 
-        if self.msg_grep:
-            self.err_msg(_T("IN load_media: {}").format(self.msg_grep))
-            self.load_ok = False
-            self.msg_grep = None
-        else:
-            self.load_ok = ret
-
-        if self.load_ok:
-            wx.CallAfter(self.check_set_media_meta, True)
-
-        return self.load_ok
+        return (ret, is_uri)
 
     def check_set_media_meta(self, do_set = False, only_len = False):
         if not (self.medi and self.load_ok):
@@ -9223,17 +11537,21 @@ class TopWnd(wx.Frame):
         if do_set:
             if not only_len:
                 self.medi.SetInitialSize()
-                ln = self.medi.Length()
                 sz = self.medi.GetBestSize()
             else:
-                ln = self.medi.Length()
                 sz = self.media_meta[1]
 
+            t = self.len_track
+            if t and not t.stable:
+                t.add(self.medi.Length())
+            ln = self.media_length()
+
             self.media_meta = (ln, sz)
 
             it = self.get_reslist_item()
             if it:
                 it.length = int(ln) if (ln > 0) else -1
+                it.len_stable = (ln > 0 and t != None and t.stable)
                 it.comment = _T("{}x{}").format(sz.width, sz.height)
 
             self.player_panel.set_meta(sz, ln)
@@ -9242,6 +11560,14 @@ class TopWnd(wx.Frame):
 
         return self.media_meta
 
+    # media length, as last taken by the tracker (not every
+    # small revision by the backend), else from the backend
+    def media_length(self):
+        t = self.len_track
+        if t and t.value >= 0:
+            return t.value
+        return self.medi.Length()
+
     def on_position(self, event):
         if not self.medi:
             return
@@ -9257,6 +11583,45 @@ class TopWnd(wx.Frame):
                     self.pos_seek_state = st
                     self.medi.Pause()
             self.pos_seek_paused = pval
+            self.sched_wake()
+
+            # slider event (not a call from code that seeks itself)
+            if not (event == None or isinstance(event, int)):
+                self.seek_request(self.pos_sld_ms())
+
+    # position slider value in media ms
+    def pos_sld_ms(self):
+        v = self.pos_sld.GetValue()
+        return long(float(v - self.pos_sld.GetMin()) / self.pos_mul)
+
+    # seek scheduler: request a backend seek to ms; the latest
+    # request replaces any pending one
+    def seek_request(self, ms):
+        self.seek_target = ms
+        if self.seek_timer:
+            return
+
+        w = self.seek_cadence - (time.time() - self.seek_last_tm) * 1000
+        if w <= 0:
+            self.seek_flush()
+        else:
+            self.seek_timer = wx.CallLater(int(w) + 1, self.seek_flush)
+
+    # do pending seek now (from timer, or when settling)
+    def seek_flush(self):
+        t = self.seek_timer
+        self.seek_timer = None
+        if t and t.IsRunning():
+            t.Stop()
+
+        v = self.seek_target
+        self.seek_target = -1
+        if v < 0 or v == self.seek_sent or not self.medi:
+            return
+
+        self.seek_sent = v
+        self.seek_last_tm = time.time()
+        self.medi.Seek(v)
 
     # on_volume is only called when slider widget is manipulated by
     # user, not when slider.SetValue() is used, so there is no loop
@@ -9667,6 +12032,10 @@ class TopWnd(wx.Frame):
                 s0 = _("Failed loading '{}'").format(res)
                 s1 = _("failure")
                 self.err_msg(s0)
+                self.res_failed(med, s0)
+                # auto-advance: go on to next not known bad
+                if not from_user and self.adv_track:
+                    wx.CallAfter(self.cmd_on_next)
             else:
                 s0 = _("Loading '{}' ({})").format(res, _T(med))
                 s1 = _("waiting . . .")
@@ -9735,36 +12104,64 @@ class TopWnd(wx.Frame):
     def get_can_do_prev(self):
         return False if self.get_prev_index() is None else True
 
-    def get_prev_index(self):
-        l = self.get_reslist_len()
-        if not l:
-            return None
+    # shuffle: (permutation, base indice) for set or current group,
+    # permutation is None if there's nothing to shuffle; it is only
+    # made anew if the span or seed have changed
+    def get_shuffle_perm(self):
+        if self.shuffle_group:
+            g, gi = self.get_res_group_with_index()
+            if g == None:
+                return (None, 0)
+            base = self.media_indice - gi
+            l = g.get_len()
+        else:
+            base = 0
+            l = self.get_reslist_len()
 
-        ixnew = max(0, self.media_indice - 1)
+        if l < 2:
+            return (None, base)
+
+        k = (base, l, self.shuffle_seed)
+        if self.shuffle_perm == None or self.shuffle_key != k:
+            p = ShufflePermutation(l, self.shuffle_seed)
+            o = self.shuffle_origin
+            # keep origin restored from config on first use only
+            if self.shuffle_key != None or o == None or o >= l:
+                o = p.index_of(self.media_indice - base) or 0
+            self.shuffle_perm = p
+            self.shuffle_key = k
+            self.shuffle_origin = o
+
+        return (self.shuffle_perm, base)
+
+    # shuffle: step from current indice by incr (1 or -1) in
+    # shuffled order, None at either end -- O(1) both ways
+    def get_shuffle_index(self, incr):
+        p, base = self.get_shuffle_perm()
+        if p == None:
+            return None
 
-        if ixnew == self.media_indice:
+        l = p.size
+        pos = p.index_of(self.media_indice - base)
+        if pos == None:
+            return None
+        pos = (pos - self.shuffle_origin) % l + incr
+        if pos < 0 or pos >= l:
             return None
 
-        return ixnew
+        return base + p.at((pos + self.shuffle_origin) % l)
+
+    def get_prev_index(self):
+        return self._get_step_index_ok(-1)
 
     def cmd_on_prev(self, from_user = False, event = None):
         ixnew = self.get_prev_index()
+        self.shuffle_linear_step = False
 
         if ixnew == None:
             return False
 
-        self.media_indice = ixnew
-        self.set_tb_combos()
-
-        st = self.get_medi_state()
-        if (st == wx.media.MEDIASTATE_PLAYING or
-            st == wx.media.MEDIASTATE_PAUSED):
-            wx.CallAfter(self._unload_and_play)
-        else:
-            self.unload_media()
-            wx.CallAfter(self.cmd_on_play)
-
-        return True
+        return self.cmd_goto_index(ixnew, from_user = from_user)
 
     def cmd_first_grp(self):
         gcur = self.get_res_group_current()
@@ -9772,6 +12169,7 @@ class TopWnd(wx.Frame):
         if i == None or g == gcur:
             return
         self.media_indice = i + 1
+        self.shuffle_linear_step = self.shuffle
         self.do_command_button(self.id_prev)
 
     def cmd_prev_grp(self):
@@ -9780,6 +12178,7 @@ class TopWnd(wx.Frame):
         if i == None or g == gcur:
             return
         self.media_indice = i + 1
+        self.shuffle_linear_step = self.shuffle
         self.do_command_button(self.id_prev)
 
     def on_next(self, event):
@@ -9788,34 +12187,62 @@ class TopWnd(wx.Frame):
     def get_can_do_next(self):
         return False if self.get_next_index() is None else True
 
-    def get_next_index(self):
+    # index n steps on (back if n < 0), or None if off the end
+    def _get_step_index(self, n):
         l = self.get_reslist_len()
         if not l:
             return None
 
-        ixnew = min(l - 1, self.media_indice + 1)
+        if self.shuffle and not self.shuffle_linear_step:
+            return self.get_shuffle_index(n)
+
+        ixnew = self.media_indice + n
 
-        if ixnew == self.media_indice:
+        if ixnew < 0 or ixnew >= l:
             return None
 
         return ixnew
 
+    # next/prev index, passing over resources known bad
+    def _get_step_index_ok(self, incr):
+        n = incr
+        while True:
+            ix = self._get_step_index(n)
+            if ix == None:
+                return None
+            it = self.get_reslist_item(ix)
+            if not (it and self.fail_cache.bad(it.resname)):
+                return ix
+            n += incr
+
+    def get_next_index(self):
+        return self._get_step_index_ok(1)
+
     def cmd_on_next(self, from_user = False, event = None):
         ixnew = self.get_next_index()
+        self.shuffle_linear_step = False
 
         if ixnew == None:
             return False
 
+        return self.cmd_goto_index(ixnew, from_user = from_user)
+
+    # make total indice ixnew current, and play it -- from_user
+    # is passed on to cmd_on_play: a failed load auto-advances
+    # only if not the user's choice
+    def cmd_goto_index(self, ixnew, from_user = False):
+        self.preload_drop()
+        self.mpris_snap = None
         self.media_indice = ixnew
         self.set_tb_combos()
 
         st = self.get_medi_state()
         if (st == wx.media.MEDIASTATE_PLAYING or
             st == wx.media.MEDIASTATE_PAUSED):
-            wx.CallAfter(self._unload_and_play)
+            wx.CallAfter(self._unload_and_play, from_user)
         else:
             self.unload_media()
-            wx.CallAfter(self.cmd_on_play)
+            wx.CallAfter(self.cmd_on_play, from_user)
 
         return True
 
@@ -9825,6 +12252,7 @@ class TopWnd(wx.Frame):
         if i == None or g == gcur:
             return
         self.media_indice = i - 1
+        self.shuffle_linear_step = self.shuffle
         self.do_command_button(self.id_next)
 
     def cmd_next_grp(self):
@@ -9833,6 +12261,7 @@ class TopWnd(wx.Frame):
         if i == None or g == gcur:
             return
         self.media_indice = i - 1
+        self.shuffle_linear_step = self.shuffle
         self.do_command_button(self.id_next)
 
     #delayed set of actions
@@ -9855,10 +12284,10 @@ class TopWnd(wx.Frame):
         wx.CallAfter(_sub_seek_and_play, self, whence, from_user)
 
     #delayed set of actions
-    def _unload_and_play(self):
-        def _sub_unload_and_play(obj):
+    def _unload_and_play(self, from_user = False):
+        def _sub_unload_and_play(obj, u):
             obj.load_ok = False
-            obj.cmd_on_play()
+            obj.cmd_on_play(from_user = u)
 
         #self.prdbg(_T("IN _unload_and_play()"))
         self.medi.Stop()
@@ -9866,7 +12295,7 @@ class TopWnd(wx.Frame):
         self.in_stop = True
         self.in_play = False
         self.set_play_label()
-        wx.CallAfter(_sub_unload_and_play, self)
+        wx.CallAfter(_sub_unload_and_play, self, from_user)
 
     def on_stop(self, event):
         self.cmd_on_stop(from_user = True, event = event)
@@ -9892,6 +12321,7 @@ class TopWnd(wx.Frame):
             return
 
         self.tittime = 2
+        self.sched_wake()
 
         t = self.GetTitle()
         self.orig_title = t
@@ -9971,38 +12401,138 @@ class TopWnd(wx.Frame):
         v = long(val)
         v /= 1000 # value from MPRIS2 is in usecs
         if is_seek:
-            # this was MPRIS2.Playlist Seek method, not SetPosition
-            v += self.medi.Tell()
+            # this was MPRIS2.Playlist Seek method, not SetPosition:
+            # relative to a target not yet sought, if any, so that
+            # quick Seeks within a cadence add up
+            if self.mpris_seek >= 0:
+                v += self.mpris_seek
+            elif self.seek_target >= 0:
+                v += self.seek_target
+            else:
+                v += self.medi.Tell()
         v = min(ln, max(0, v))
-        do_seek = (self.mpris_seek < 0)
         self.mpris_seek = v
+        self.mpris_snap = None
 
-        if True or self.pos_seek_paused <= 0:
-            cur = long(float(self.pos_mul) * v + 0.5)
-            self.pos_sld.SetValue(cur)
-            self.on_position(None)
-            if do_seek:
-                self.medi.Seek(v)
+        cur = long(float(self.pos_mul) * v + 0.5)
+        self.pos_sld.SetValue(cur)
+        self.on_position(None)
+        self.seek_request(v)
+
+    # the main timer runs duties, each with its own period and
+    # condition: the timer is one-shot, restarted for the duty
+    # that is next due, so with nothing active (stopped, or
+    # iconified) it only wakes at tick_idle_ms -- not zero,
+    # since python signal handlers run only when python code
+    # does, and _quit_signal is checked on every wakeup
+    tick_idle_ms = 5000
+    tick_wake_ms = 20
+
+    def mk_tick_duties(self):
+        def _playing():
+            return (self.load_ok and
+                    self.get_medi_state() == wx.media.MEDIASTATE_PLAYING)
+
+        def _shown():
+            return not self.IsIconized()
+
+        self.tick_duties = [
+            # config save -- while playing (resume position, etc.)
+            # and once after any other wakeup, but not more often
+            # than the period however busy the user is
+            TickDuty(30000, self.tick_autosave,
+                     lambda: self.autosave_due or _playing(),
+                     spaced = True),
+            # seek settling must go on whatever the state
+            TickDuty(1000, self.tick_position,
+                     lambda: (self.pos_seek_paused != 0 or
+                              (_playing() and _shown()))),
+            # length sampling, until it has converged
+            TickDuty(1000, self.tick_length,
+                     lambda: _playing() and self.len_converging()),
+            TickDuty(1000, self.tick_title,
+                     lambda: self.tittime > 0),
+            # retry time passed for failed resources?
+            TickDuty(60000, self.tick_revalidate,
+                     lambda: bool(self.fail_cache.ent)),
+            # page cache prefetch of next local file
+            TickDuty(1000, self.tick_prefetch,
+                     lambda: (self.prefetch_ahead > 0 and _playing() and
+                              self.adv_track and not self.loop_track)),
+            # gapless mode: preload next item near track end
+            TickDuty(1000, self.tick_preload,
+                     lambda: (self.gapless and _playing() and
+                              self.adv_track and not self.loop_track)),
+            # mouse check, cursor and controls hiding
+            TickDuty(1000, self.do_time_medi,
+                     lambda: (self.load_ok and _shown() and
+                              (_playing() or self.medi_tick > 0))),
+        ]
 
-    def do_timep(self, timer):
-        # at some interval, do config save as needed
-        if timer:
-            try:
-                # this count is not set in init; hence, the try block
-                cnt = self.autosave_count
-                self.autosave_count += 1
-                itv = timer.GetInterval() or 1000
-                sec = 30000 / itv # 30 secs adjusted for interval
-                m = cnt % sec
-                if m == 0:
-                    self.save_config_and_state()
-            except:
-                # add this member
-                self.autosave_count = 1
-        else:
-            #self.err_msg(_T("do_timep: NO event"))
+        if _in_xws:
+            self.tick_duties.append(
+                TickDuty(1000, self.tick_mpris,
+                         lambda: self.mpris and (self.mpris_check_due or
+                                                 _playing())))
+
+    # the timer is one-shot, so it is restarted whatever happens
+    # in a duty: a duty that raises is logged and keeps its period
+    def run_tick_duties(self, timer):
+        now = time.time()
+        nxt = now + self.tick_idle_ms / 1000.0
+        try:
+            self.tick_quit_check()
+
+            for d in self.tick_duties:
+                try:
+                    if not d.active():
+                        if not d.spaced or d.next_tm <= now:
+                            d.next_tm = 0.0
+                        continue
+                    if d.spaced and d.next_tm == 0.0:
+                        d.next_tm = now + d.period / 1000.0
+                    elif d.next_tm <= now:
+                        d.next_tm = now + d.period / 1000.0
+                        d.fn(timer)
+                except Exception as e:
+                    self.err_msg(_T("timer duty {}: {}").format(
+                                 d.fn.__name__, e))
+                nxt = min(nxt, d.next_tm or nxt)
+        finally:
+            ms = max(self.tick_wake_ms, int((nxt - now) * 1000))
+            self.tick_next_tm = now + ms / 1000.0
+            self.main_timer.Start(ms, True)
+
+    # something changed that may activate a tick duty: have
+    # the timer run them soon (unless it will anyway)
+    def sched_wake(self):
+        self.autosave_due = True
+        self.mpris_check_due = True
+
+        w = time.time() + self.tick_wake_ms / 1000.0
+        if self.tick_next_tm <= w:
+            return
+        try:
+            self.main_timer.Start(self.tick_wake_ms, True)
+            self.tick_next_tm = w
+        except AttributeError:
             pass
 
+    # all duties, as the fixed interval timer did
+    def do_timep(self, timer):
+        self.tick_quit_check()
+        self.tick_position(timer)
+        if self.len_converging():
+            self.tick_length(timer)
+        self.tick_title(timer)
+        if _in_xws:
+            self.tick_mpris(timer)
+
+    def tick_autosave(self, timer):
+        self.autosave_due = False
+        self.save_config_and_state()
+
+    def tick_quit_check(self):
         # test a member that does not exist _unless_
         # the App object sets it, which means close up
         # shop (e.g. exit signal was caught)
@@ -10017,26 +12547,262 @@ class TopWnd(wx.Frame):
         except:
             pass
 
-        # show notification popup messages
-        wx.CallAfter(self._show_notification_message)
+    # the backend must estimate media length for some formats
+    # (think vbr mp3), and it cannot reliably be determined when
+    # the backend is ready to provide a non-zero value (much less
+    # an accurate value, as the media.Length() changes over the
+    # course of playing as it converges on accuracy); note also
+    # that the test for zero Length() is the only means of
+    # detecting whether a stream is bounded or not, so false 0
+    # values are really intolerable -- so this duty samples
+    # length until self.len_track finds it stable
+    def tick_length(self, timer):
+        if self.pos_seek_paused > 0:
+            return
+        l0 = self.media_meta[0]
+        ln, sz = self.check_set_media_meta(True, True)
+        if ln != l0:
+            self.slider_setup()
+
+    def len_converging(self):
+        t = self.len_track
+        return t != None and not t.stable
+
+    # note load failure of res: the item(s) get the error, shown
+    # in the combo, and navigation passes over res for a while
+    def res_failed(self, res, err):
+        t = self.fail_cache.fail(res, err)
+        self.prdbg(_T("'{}' failed, retry after {:.0f}s").format(
+                    _T(res), t))
+        self.res_set_err(res, err)
+
+    def res_loaded(self, res):
+        if self.fail_cache.ok(res):
+            self.res_set_err(res, None)
+
+    def res_set_err(self, res, err):
+        chg = False
+        for g in self.reslist:
+            # unparsed groups: not shown, nothing to mark
+            if isinstance(g, AVGroupListFileLazy) and g.is_lazy():
+                continue
+            for it in g.data:
+                if it.err != err and s_eq(it.resname, res):
+                    it.err = err
+                    chg = True
+        if chg:
+            self.set_tb_combos(do_group = False)
+
+    # near the end of a bounded track, have the next item's file
+    # read ahead into the page cache by a thread
+    def tick_prefetch(self, timer):
+        ln = self.media_length()
+        if ln <= 0 or ln - self.medi.Tell() > self.prefetch_ahead:
+            return
+
+        ix = self.get_next_index()
+        it = self.get_reslist_item(ix) if ix != None else None
+        res = it.resname if it else None
+        if not res or s_eq(res, self.prefetch_res):
+            return
+        # a local file may be given as a file:// URI
+        name = un_uri_file(_T(res))
+        if re.match(_T(r'^([A-Za-z]+)://.*/.*$'), name):
+            return
+
+        t = self.prefetch_thd
+        if t and t.is_alive():
+            return
+
+        self.prefetch_res = res
+
+        def _pf(name):
+            try:
+                t0 = time.time()
+                n = prefetch_file(name)
+                m = _T("PREFETCH {} bytes of '{}', {:.1f} ms").format(
+                        n, _T(name), (time.time() - t0) * 1000.0)
+            except (OSError, IOError) as e:
+                m = _T("PREFETCH '{}': {}").format(_T(name), e)
+            # debug out from the GUI thread
+            wx.CallAfter(self.prdbg, m)
+
+        self.prefetch_thd = t = threading.Thread(target = _pf,
+                                                 args = (name,))
+        t.daemon = True
+        t.start()
+
+    # with video size (and length) kept from an earlier play, lay
+    # out the panel for it now, not after the loaded event
+    def presize_media(self, it):
+        vs = it.get_vsize() if it else None
+        if not vs:
+            return
+
+        ln = it.length if it.len_stable else 0
+        sz = wx.Size(*vs)
+        self.player_panel.set_meta(sz, max(0, ln))
+        # the control's best size is the last item's, yet
+        self.player_panel.do_new_size(sz)
+
+    # keep the position in the loaded item, if long enough to be
+    # resumed -- near either end, forget it
+    def res_pos_note(self):
+        res = self.medi_res
+        if not (res and self.load_ok):
+            return
+
+        st = self.get_medi_state()
+        if not (st == wx.media.MEDIASTATE_PLAYING or
+                st == wx.media.MEDIASTATE_PAUSED):
+            return
+
+        ln = self.media_length()
+        if ln < self.res_pos_min_len:
+            return
+
+        pos = self.medi.Tell()
+        m = self.res_pos_margin
+        if pos < m or pos > ln - m:
+            self.res_pos.drop(res)
+        else:
+            self.res_pos.put(res, int(pos))
+
+    # kept position for the loaded item, or -1
+    def res_pos_resume(self):
+        res = self.medi_res
+        ln = self.media_length()
+        if not res or ln < self.res_pos_min_len:
+            return -1
+
+        pos = self.res_pos.get(res)
+        m = self.res_pos_margin
+        if pos == None or pos < m or pos > ln - m:
+            return -1
+
+        return pos
+
+    # failed resources past retry time: local files are checked
+    # for access here, streams by a connection to their host in
+    # a thread (see revalidate_stream) -- if found good, the error
+    # is cleared, else the retry time is backed off again
+    def tick_revalidate(self, timer):
+        fc = self.fail_cache
+        for res in fc.due():
+            r = re.match(_T(r'^([A-Za-z]+)://.*/.*$'), _T(res))
+            if r:
+                self.revalidate_stream(res, r.group(1).lower())
+            elif os.access(res, os.R_OK):
+                self.prdbg(_T("'{}' readable, retry").format(_T(res)))
+                self.res_loaded(res)
+            else:
+                fc.fail(res, fc.ent[res][3])
+
+    revalidate_max = 4
+
+    def revalidate_stream(self, res, scheme):
+        busy = self.revalidate_busy
+        if res in busy or len(busy) >= self.revalidate_max:
+            return
+
+        # a proxy would be used: a connection here tells nothing
+        if self.can_use_proxy and self.proxies.get(scheme):
+            self.res_loaded(res)
+            return
+
+        def _rv(res):
+            e = stream_reachable(res)
+            wx.CallAfter(self.revalidate_done, res, e)
+
+        busy.add(res)
+        t = threading.Thread(target = _rv, args = (res,))
+        t.daemon = True
+        t.start()
+
+    def revalidate_done(self, res, err):
+        self.revalidate_busy.discard(res)
+        fc = self.fail_cache
+        # loaded, or failed again, meanwhile?
+        if not (res in fc.ent and res in fc.due()):
+            return
+
+        if err:
+            self.prdbg(_T("'{}' still failing: {}").format(
+                        _T(res), _T(err)))
+            fc.fail(res, fc.ent[res][3])
+        else:
+            # reachable, or cannot tell: the next load will
+            self.prdbg(_T("'{}' reachable, retry").format(_T(res)))
+            self.res_loaded(res)
+
+    # gapless mode: within gapless_ahead ms of the end of a bounded
+    # track, load the next item in the panel's hidden control
+    def tick_preload(self, timer):
+        ln = self.media_length()
+        if ln <= 0 or ln - self.medi.Tell() > self.gapless_ahead:
+            return
+
+        ix = self.get_next_index()
+        it = self.get_reslist_item(ix) if ix != None else None
+        if not (it and it.resname):
+            return
+
+        p = self.player_panel
+        if ix == self.pre_ix and s_eq(p.pre_res, it.resname):
+            return
+
+        def _ld(res, medi):
+            ok, self.pre_is_uri = self._load_res(res, medi)
+            return ok
+
+        self.preload_drop()
+        self.prdbg(_T("PRELOAD {} '{}'").format(ix, _T(it.resname)))
+        if p.preload(it.resname, _ld):
+            self.pre_ix = ix
+
+    def preload_drop(self):
+        self.pre_ix = None
+        self.player_panel.preload_drop()
+
+    # on finish, if the preload is still the next item, make it
+    # current and play it: returns False if not done
+    def preload_swap(self):
+        p = self.player_panel
+        ix = self.pre_ix
+
+        it = None
+        if ix != None and p.pre_ok and ix == self.get_next_index():
+            it = self.get_reslist_item(ix)
+        if not (it and s_eq(p.pre_res, it.resname)):
+            self.preload_drop()
+            return False
+
+        self.pre_ix = None
+        self.mpris_snap = None
+        self.media_indice = ix
+        self.set_tb_combos()
+
+        self.unload_media()
+        self.medi = p.preload_swap()
+        self.medi_res = it.resname
+        self.media_current_is_uri = self.pre_is_uri
+        self.msg_grep = None
+        self.load_ok = True
+        self.in_play = False
+        self.in_stop = False
 
+        # as if the loaded event came now: it plays the item
+        self.on_media_loaded(None)
+
+        return True
+
+    def tick_position(self, timer):
         if self.pos_seek_paused <= 0:
-            # unfortunately, it proves necessary to call
-            # check_set_media_meta(True) and slider_setup()
-            # repeatedly at this interval due to the fact that
-            # the backend must estimate media length for some
-            # formats (think vbr mp3), and it cannot reliably be
-            # determined when the backend is ready to provide
-            # a non-zero value (much less an accurate value, as
-            # the media.Length() changes over the course of
-            # playing as it converges on accuracy); note also
-            # that the test for zero Length() is the only means
-            # of detecting whether a stream is bounded or not,
-            # so false 0 values are really intolerable -- sadly,
-            # for the most part in most formats these repeated
-            # calls are a waste
-            ln, sz = self.check_set_media_meta(True, True)
-            self.slider_setup()
+            ln = self.media_meta[0]
+
+            # not in a drag: a seek to the last target is new
+            if not self.seek_timer:
+                self.seek_sent = -1
 
             bounded = (not ln < 1)
             if self.medi and self.load_ok:
@@ -10054,24 +12820,24 @@ class TopWnd(wx.Frame):
         else:
             self.pos_seek_paused -= 1
             if self.pos_seek_paused == 0:
+                # settled: trailing seek now, then the one Seeked
+                self.seek_flush()
                 if self.pos_seek_state == wx.media.MEDIASTATE_PLAYING:
                     self.medi.Play()
                 self.pos_seek_state = None
 
                 self.mpris2_signal_emit(_T("Seeked"))
                 self.mpris_seek = -1
+                self.seek_sent = -1
                 #XXX this might be an oppotune time for:
                 #self.config_wr()
             else:
-                def _sk_mse(self, v, sig):
-                    self.medi.Seek(v)
-                    wx.CallAfter(self.mpris2_signal_emit, sig)
-                v = self.pos_sld.GetValue()
-                v = long(
-                    float(v - self.pos_sld.GetMin()) / self.pos_mul)
-                wx.CallAfter(_sk_mse, self, v, _T("Seeked"))
-                #wx.CallAfter(self.medi.Seek, v)
+                # slider may have been set by code (keys, etc.);
+                # the scheduler skips a target already sought
+                self.seek_request(self.pos_sld_ms())
 
+
+    def tick_title(self, timer):
         if self.tittime > 0:
             if self.tittime == 3:
                 self.prdbg(_T("do_timep {}").format(self.tittime))
@@ -10084,10 +12850,12 @@ class TopWnd(wx.Frame):
 
             self.tittime -= 1
 
-        if _in_xws:
-            # timer checks for state changes for mpris2
-            self.mpris_sendsignal_check()
-
+    def tick_mpris(self, timer):
+        # timer checks for state changes for mpris2,
+        # with fresh state
+        self.mpris_check_due = False
+        self.mpris_snap = None
+        self.mpris_sendsignal_check()
 
     def get_medi_state(self):
         # Incredibly, under msw self.medi.GetState() will return
@@ -10102,7 +12870,32 @@ class TopWnd(wx.Frame):
         #return self.medi_state if _in_msw else self.medi.GetState()
 
     def set_medi_state(self, state):
+        pl = wx.media.MEDIASTATE_PLAYING
+        if (state == pl) != (self.medi_state == pl):
+            self.medi_tick_state(state == pl)
+
         self.medi_state = state
+        self.mpris_snap = None
+        self.sched_wake()
+
+    # the mouse check and cursor/controls hiding duty runs only
+    # while playing or counting down to hide, so when playing
+    # stops show what it may have hidden, and when playing
+    # starts count down to hide it again
+    def medi_tick_state(self, playing):
+        if playing:
+            self.medi_tick = self.medi_tick_span
+            return
+
+        self.medi_tick = -1
+        if self.is_fullscreen():
+            self.show_wnd_obj(self.hiders["vszr"], True)
+        self.SetCursor(select_cursor(wx.CURSOR_DEFAULT))
+
+    def get_mpris_snap(self):
+        if self.mpris_snap == None:
+            self.mpris_snap = PlayerSnapshot(self)
+        return self.mpris_snap
 
     def get_playback_state_string(self):
         st = self.get_medi_state()
@@ -10158,6 +12951,18 @@ class TopWnd(wx.Frame):
                              _T("use_notifymsg"), self.opt_notifymsg)
         self.can_use_proxy  = config.ReadBool(
                              _T("use_proxy"), self.can_use_proxy)
+        self.mpris_debounce = config.ReadInt(
+                             _T("mpris_debounce_ms"), self.mpris_debounce)
+        self.seek_cadence = config.ReadInt(
+                             _T("seek_cadence_ms"), self.seek_cadence)
+        self.gapless        = config.ReadBool(
+                             _T("gapless_preload"), self.gapless)
+        self.gapless_ahead  = config.ReadInt(
+                             _T("gapless_ahead_ms"), self.gapless_ahead)
+        self.prefetch_ahead = config.ReadInt(
+                             _T("prefetch_ahead_ms"), self.prefetch_ahead)
+        self.res_pos_min_len = config.ReadInt(
+                             _T("resume_min_len_ms"), self.res_pos_min_len)
 
         vmap = {
             _T("resource_index") : 0,     # self.media_indice
@@ -10165,9 +12970,14 @@ class TopWnd(wx.Frame):
             _T("group_desc")     : _T(""),# current AVGroup.desc
             _T("volume")         : 50,    # volume on quit,  0-100
             _T("current_pos")    : -1,    # media.Tell() if bounded
+            _T("current_res")    : _T(""),# resname at resource_index
             _T("playing")        : False, # was playing on quit
             _T("loop_play")      : False, # loop current track menu opt
             _T("auto_advance")   : True,  # on track end advance to next
+            _T("shuffle")        : False, # shuffle play menu opt
+            _T("shuffle_group")  : False, # shuffle in current group only
+            _T("shuffle_seed")   : 0,     # ShufflePermutation seed
+            _T("shuffle_origin") : -1,    # first track in shuffle order
             _T("theme_support")  : True,  # employ theme support
             _T("res_restart")    : True   # on start resume last state
         }
@@ -10207,12 +13017,28 @@ class TopWnd(wx.Frame):
         else:
             cur = -1
         config.WriteInt(_T("current_pos"), cur)
+        it = self.get_reslist_item()
+        config.Write(_T("current_res"), _T(it.resname) if it else _T(""))
         cur = True if (st == wx.media.MEDIASTATE_PLAYING) else False
         config.WriteBool(_T("playing"), cur)
         cur = self.mctrl.IsChecked(self.mctrl_loop)
         config.WriteBool(_T("loop_play"), cur)
         cur = self.mctrl.IsChecked(self.mctrl_advance)
         config.WriteBool(_T("auto_advance"), cur)
+        config.WriteBool(_T("shuffle"), self.shuffle)
+        config.WriteBool(_T("shuffle_group"), self.shuffle_group)
+        config.WriteInt(_T("shuffle_seed"), self.shuffle_seed)
+        cur = self.shuffle_origin
+        config.WriteInt(_T("shuffle_origin"), -1 if cur == None else cur)
+        config.WriteInt(_T("mpris_debounce_ms"), self.mpris_debounce)
+        config.WriteInt(_T("seek_cadence_ms"), self.seek_cadence)
+        config.WriteBool(_T("gapless_preload"), self.gapless)
+        config.WriteInt(_T("gapless_ahead_ms"), self.gapless_ahead)
+        config.WriteInt(_T("prefetch_ahead_ms"), self.prefetch_ahead)
+        config.WriteInt(_T("resume_min_len_ms"), self.res_pos_min_len)
+        # per item positions are written in batch, here
+        self.res_pos_note()
+        self.res_pos.flush()
         cur = self.mopts.IsChecked(self.mopts_quitquery)
         config.WriteBool(_T("do_quitquery"), cur)
         cur = self.mopts.IsChecked(self.mopts_trayicon)
@@ -10286,6 +13112,7 @@ class TopWnd(wx.Frame):
                 self.cmd_on_stop()
             self.unload_media(True)
             self.main_timer.Stop()
+            self.play_hist.stop()
             self.del_taskbar_object()
             self.Destroy()
 
@@ -10343,9 +13170,12 @@ class TopWnd(wx.Frame):
         self.cmd_on_wx_timer(from_user = False, event = event)
 
     def cmd_on_wx_timer(self, from_user = True, event = None):
-        iv = event.GetTimer() if (event and not from_user) else None
-        self.do_timep(iv)
-        self.do_time_medi(iv)
+        if from_user:
+            self.do_timep(None)
+            self.do_time_medi(None)
+            return
+
+        self.run_tick_duties(event.GetTimer() if event else None)
 
     if _in_msw:
         def on_ms_hotkey(self, event):
@@ -10366,6 +13196,13 @@ class TopWnd(wx.Frame):
         if not _in_xws:
             return None
 
+        # batched property changes first, one per interface
+        if self.mpris_props_ready:
+            ifname = self.mpris_props_ready.pop(0)
+            names = self.mpris_props.pop(ifname, None)
+            if names:
+                return (_T("PropertiesChanged"), (ifname, names))
+
         fifo = self.coproc_fifo
         try:
             r = fifo.get(block = False, timeout = -1)
@@ -10400,6 +13237,8 @@ class TopWnd(wx.Frame):
                     break
 
     def mpris2_signal_emit(self, signal):
+        # a change worth a signal is a change to the snapshot
+        self.mpris_snap = None
         if _in_xws and wx.GetApp().should_do_mpris():
             if not self.mpris:
                 return False
@@ -10409,10 +13248,52 @@ class TopWnd(wx.Frame):
 
     if _in_xws:
         def _x_mpris2_signal_emit(self, signal):
+            if isinstance(signal, tuple):
+                pass
+            elif _Tnec(signal) in mpris2_prop_iface:
+                self.mpris2_prop_changed(signal)
+                return
             if True:
                 self.put_coproc_queue(signal)
                 self._x_core_mpris2_signal_emit()
 
+        # add a changed property to the pending batch, and see
+        # that a flush is due (after mpris_debounce ms)
+        def mpris2_prop_changed(self, prop):
+            prop = _Tnec(prop)
+            ifname = mpris2_prop_iface[prop]
+            try:
+                l = self.mpris_props[ifname]
+            except KeyError:
+                l = self.mpris_props[ifname] = []
+            if prop not in l:
+                l.append(prop)
+
+            if self.mpris_props_flush_due:
+                return
+            self.mpris_props_flush_due = True
+            if self.mpris_debounce > 0:
+                wx.CallLater(self.mpris_debounce, self.mpris2_props_flush)
+            else:
+                wx.CallAfter(self.mpris2_props_flush)
+
+        # make pending property batches ready, and prod the
+        # coproc once for all of them; properties changed after
+        # this but before the coproc asks will join the batch
+        def mpris2_props_flush(self):
+            self.mpris_props_flush_due = False
+            if not self.mpris:
+                self.mpris_props = {}
+                self.mpris_props_ready = []
+                return
+
+            for ifname in self.mpris_props.keys():
+                if ifname not in self.mpris_props_ready:
+                    self.mpris_props_ready.append(ifname)
+
+            if self.mpris_props_ready:
+                self._x_core_mpris2_signal_emit()
+
         def _x_core_mpris2_signal_emit(self):
             iotup = wx.GetApp().get_mpris2_signal_io()
             if iotup == None:
@@ -10451,7 +13332,9 @@ class TopWnd(wx.Frame):
 
     def on_chmsg(self, event):
         t, dat = event.get_content()
+        self.do_chmsg(t, dat)
 
+    def do_chmsg(self, t, dat):
         if t == _T("M"):
             if not _in_xws:
                 return
@@ -10476,8 +13359,7 @@ class TopWnd(wx.Frame):
             # MPRIS2 functionality will be kaput
             emsg = None
             try:
-                tmh = MPRIS2Handler(self, dat)
-                tmh.go()
+                MPRIS2Dispatcher(self, dat).go()
             except (IOError, OSError) as e:
                 emsg = _T(
                     "MPRIS event handling (on_chmsg) error '{}'"
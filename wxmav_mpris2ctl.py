@@ -158,6 +158,7 @@ def errout(msg, code=1):
 #
 
 try:
+    import dbus
     from mpris2 import get_players_uri, Player, MediaPlayer2
 except ImportError as e:
     errout("""
@@ -190,6 +191,18 @@ player = None
 # The mpris2.mediaplayer2 object (org.mpris.MediaPlayer2)
 mplayer2 = None
 
+##
+# Property values by name, from GetAll or a PropertiesChanged signal;
+# when not None, print_property() prints from this.
+prop_cache = None
+
+##
+# MPRIS2 object path and interface names.
+mpris2_path = "/org/mpris/MediaPlayer2"
+mpris2_iface = "org.mpris.MediaPlayer2"
+mpris2_iface_player = "org.mpris.MediaPlayer2.Player"
+dbus_iface_props = "org.freedesktop.DBus.Properties"
+
 ##
 # A tuple of MPRIS2 readable properties.
 props_readable = (
@@ -449,6 +462,9 @@ def print_property(prop):
     """
     Print the current value of a MPRIS2 property.
 
+    The value is taken from prop_cache if it is there (see
+    load_prop_cache()), else it is read from the player.
+
     Args:
         prop: String name of the property to print.
 
@@ -458,48 +474,48 @@ def print_property(prop):
     # MediaPlayer2:
     if prop == "CanQuit":
         print("MediaPlayer2: {} == {}".format(
-            "CanQuit", mplayer2.CanQuit))
+            "CanQuit", get_prop(mplayer2, "CanQuit")))
     elif prop == "Fullscreen":
         print("MediaPlayer2: {} == {}".format(
-            "Fullscreen", mplayer2.Fullscreen))
+            "Fullscreen", get_prop(mplayer2, "Fullscreen")))
     elif prop == "CanSetFullscreen":
         print("MediaPlayer2: {} == {}".format(
-            "CanSetFullscreen", mplayer2.CanSetFullscreen))
+            "CanSetFullscreen", get_prop(mplayer2, "CanSetFullscreen")))
     elif prop == "CanRaise":
         print("MediaPlayer2: {} == {}".format(
-            "CanRaise", mplayer2.CanRaise))
+            "CanRaise", get_prop(mplayer2, "CanRaise")))
     elif prop == "HasTrackList":
         print("MediaPlayer2: {} == {}".format(
-            "HasTrackList", mplayer2.HasTrackList))
+            "HasTrackList", get_prop(mplayer2, "HasTrackList")))
     elif prop == "Identity":
         print(mT("MediaPlayer2: {} == {}").format(
-            "Identity", mT(mplayer2.Identity)))
+            "Identity", mT(get_prop(mplayer2, "Identity"))))
     elif prop == "DesktopEntry":
         print(mT("MediaPlayer2: {} == {}").format(
-            "DesktopEntry", mT(mplayer2.DesktopEntry)))
+            "DesktopEntry", mT(get_prop(mplayer2, "DesktopEntry"))))
     elif prop == "SupportedUriSchemes":
-        l = list(mplayer2.SupportedUriSchemes)
+        l = list(get_prop(mplayer2, "SupportedUriSchemes"))
         print(mT("MediaPlayer2: {} == {}").format(
             "SupportedUriSchemes", ", ".join([mT(i) for i in l])))
     elif prop == "SupportedMimeTypes":
-        l = list(mplayer2.SupportedMimeTypes)
+        l = list(get_prop(mplayer2, "SupportedMimeTypes"))
         print(mT("MediaPlayer2: {} == {}").format(
             "SupportedMimeTypes", ", ".join([mT(i) for i in l])))
     # Player:
     elif prop == "PlaybackStatus":
         print(mT("Player: {} == {}").format(
-            "PlaybackStatus", mT(player.PlaybackStatus)))
+            "PlaybackStatus", mT(get_prop(player, "PlaybackStatus"))))
     elif prop == "LoopStatus":
         print(mT("Player: {} == {}").format(
-            "LoopStatus", mT(player.LoopStatus)))
+            "LoopStatus", mT(get_prop(player, "LoopStatus"))))
     elif prop == "Rate":
         print("Player: {} == {}".format(
-            "Rate", player.Rate))
+            "Rate", get_prop(player, "Rate")))
     elif prop == "Shuffle":
         print("Player: {} == {}".format(
-            "Shuffle", player.Shuffle))
+            "Shuffle", get_prop(player, "Shuffle")))
     elif prop == "Metadata":
-        m = dict(player.Metadata)
+        m = dict(get_prop(player, "Metadata"))
         print("Player: Metadata:")
         def _mdval(v):
             """Make arg 'v' displayable without exception."""
@@ -518,42 +534,112 @@ def print_property(prop):
                 print(mT("  {} == {}").format(mT(k), _mdval(m[k])))
     elif prop == "Volume":
         print("Player: {} == {}".format(
-            "Volume", player.Volume))
+            "Volume", get_prop(player, "Volume")))
     elif prop == "Position":
         print("Player: {} == {}".format(
-            "Position", player.Position))
+            "Position", get_prop(player, "Position")))
     elif prop == "MinimumRate":
         print("Player: {} == {}".format(
-            "MinimumRate", player.MinimumRate))
+            "MinimumRate", get_prop(player, "MinimumRate")))
     elif prop == "MaximumRate":
         print("Player: {} == {}".format(
-            "MaximumRate", player.MaximumRate))
+            "MaximumRate", get_prop(player, "MaximumRate")))
     elif prop == "CanGoNext":
         print("Player: {} == {}".format(
-            "CanGoNext", player.CanGoNext))
+            "CanGoNext", get_prop(player, "CanGoNext")))
     elif prop == "CanGoPrevious":
         print("Player: {} == {}".format(
-            "CanGoPrevious", player.CanGoPrevious))
+            "CanGoPrevious", get_prop(player, "CanGoPrevious")))
     elif prop == "CanPlay":
         print("Player: {} == {}".format(
-            "CanPlay", player.CanPlay))
+            "CanPlay", get_prop(player, "CanPlay")))
     elif prop == "CanPause":
         print("Player: {} == {}".format(
-            "CanPause", player.CanPause))
+            "CanPause", get_prop(player, "CanPause")))
     elif prop == "CanSeek":
         print("Player: {} == {}".format(
-            "CanSeek", player.CanSeek))
+            "CanSeek", get_prop(player, "CanSeek")))
     elif prop == "CanControl":
         print("Player: {} == {}".format(
-            "CanControl", player.CanControl))
+            "CanControl", get_prop(player, "CanControl")))
 
 
 
+def prop_name(name):
+    """
+    Get the MPRIS2 name of a readable property given in any case.
+
+    Args:
+        name: String property name, e.g. "volume".
+
+    Returns:
+        The name as in props_readable, e.g. "Volume", or None if
+        it is not a readable property.
+    """
+    n = name.lower()
+    for p in props_readable:
+        if p.lower() == n:
+            return p
+    return None
+
+
+def get_prop(obj, name):
+    """
+    Get a property value, from prop_cache if present there.
+
+    Args:
+        obj: The mpris2 object (player or mplayer2) with the property.
+        name: String name of the property.
+
+    Returns:
+        The property value.
+    """
+    if prop_cache is not None and name in prop_cache:
+        return prop_cache[name]
+    return getattr(obj, name)
+
+
+def _unwrap(v):
+    """Make dbus.Boolean a bool, as printed elsewhere."""
+    if isinstance(v, dbus.Boolean):
+        return bool(v)
+    return v
+
+
+def load_prop_cache():
+    """
+    Read all properties of both MPRIS2 interfaces into prop_cache.
+
+    One org.freedesktop.DBus.Properties.GetAll call per interface,
+    rather than one Get per property.
+
+    Returns:
+        True on success, else False (and prop_cache is None).
+    """
+    global prop_cache
+
+    prop_cache = None
+    try:
+        obj = dbus.SessionBus().get_object(player_uri, mpris2_path)
+        pif = dbus.Interface(obj, dbus_iface_props)
+        c = {}
+        for iface in (mpris2_iface, mpris2_iface_player):
+            for k, v in pif.GetAll(iface).items():
+                c[str(k)] = _unwrap(v)
+    except Exception as e:
+        errmsg("GetAll failed: {}".format(e))
+        return False
+
+    prop_cache = c
+    return True
+
+
 def print_properties_many(props):
     """
     Print each of an iterable set of properties.
 
-    Invoke print_property() for each in the given set.
+    Fetch all properties in bulk with load_prop_cache(), then
+    invoke print_property() for each in the given set.
 
     Args:
         props: Iterable object with the property names for printing.
@@ -561,8 +647,14 @@ def print_properties_many(props):
     Returns:
         None.
     """
-    for p in props:
-        print_property(p)
+    global prop_cache
+
+    load_prop_cache()
+    try:
+        for p in props:
+            print_property(p)
+    finally:
+        prop_cache = None
 
 
 def print_properties_all():
@@ -639,6 +731,147 @@ def do_property_wr_args(ao):
         print("Volume now: {}".format(player.Volume))
 
 
+def do_batch(infile):
+    """
+    Run commands read from infile, one per line, over one connection.
+
+    Each line is one of:
+        a method, as for the positional arguments, e.g. "seek=-5000000"
+        "query" -- print all properties
+        "get <property> ..." -- print the named properties, any case
+        "set <property> <value>" -- set a writable property
+        "sleep <seconds>"
+    Blank lines and lines starting with '#' are ignored. Unlike
+    positional method arguments, there is no delay between methods;
+    use "sleep" where a player needs it.
+
+    Args:
+        infile: File object to read commands from.
+
+    Returns:
+        Count of commands that failed.
+    """
+    nfail = 0
+    for lin in infile:
+        w = lin.split()
+        if not w or w[0].startswith('#'):
+            continue
+
+        c = w[0].lower()
+        try:
+            if c == 'query':
+                print_properties_all()
+            elif c == 'get' and len(w) > 1:
+                props = []
+                for n in w[1:]:
+                    p = prop_name(n)
+                    if p is None:
+                        errmsg("property '{}' is not known".format(n))
+                        nfail += 1
+                    else:
+                        props.append(p)
+                if props:
+                    print_properties_many(props)
+            elif c == 'set' and len(w) == 3:
+                if not set_property(w[1], w[2]):
+                    errmsg("cannot set property '{}'".format(w[1]))
+                    nfail += 1
+            elif c == 'sleep' and len(w) == 2:
+                sleep(float(w[1]))
+            elif invoke_method_list([lin.strip()]) != -1:
+                errmsg("method '{}' is not known".format(lin.strip()))
+                nfail += 1
+        except Exception as e:
+            errmsg("'{}' failed: {}".format(lin.strip(), e))
+            nfail += 1
+        sys.stdout.flush()
+
+    return nfail
+
+
+def set_property(name, val):
+    """
+    Set a writable property from a string value.
+
+    Args:
+        name: Property name, any case, one of props_writable.
+        val: String form of the value.
+
+    Returns:
+        True if the property was set, else False.
+    """
+    n = name.lower()
+    if n == 'fullscreen':
+        mplayer2.Fullscreen = val.lower() in ('true', '1')
+    elif n == 'loopstatus':
+        m = {'none' : "None", 'track' : "Track",
+             'playlist' : "Playlist"}.get(val.lower())
+        if m is None:
+            return False
+        player.LoopStatus = m
+    elif n == 'rate':
+        player.Rate = float(val)
+    elif n == 'shuffle':
+        player.Shuffle = val.lower() in ('true', '1')
+    elif n == 'volume':
+        player.Volume = float(val)
+    else:
+        return False
+
+    return True
+
+
+def do_watch():
+    """
+    Print properties as the player signals changes, until interrupted.
+
+    Connects to PropertiesChanged (and Player.Seeked) and prints
+    each change as print_property() would; no polling.
+
+    Returns:
+        Small integer exit status code.
+    """
+    try:
+        from gi.repository import GLib
+        loop = GLib.MainLoop()
+    except ImportError:
+        import gobject
+        loop = gobject.MainLoop()
+
+    def _on_changed(iface, changed, invalidated):
+        global prop_cache
+        prop_cache = dict((str(k), _unwrap(v))
+                          for k, v in changed.items())
+        try:
+            for k in prop_cache:
+                print_property(k)
+        finally:
+            prop_cache = None
+        for k in invalidated:
+            print("{}: {} (invalidated)".format(
+                str(iface).split('.')[-1], k))
+        sys.stdout.flush()
+
+    def _on_seeked(pos):
+        print("Player: Seeked == {}".format(int(pos)))
+        sys.stdout.flush()
+
+    bus = dbus.SessionBus()
+    bus.add_signal_receiver(_on_changed,
+        signal_name="PropertiesChanged", dbus_interface=dbus_iface_props,
+        bus_name=player_uri, path=mpris2_path)
+    bus.add_signal_receiver(_on_seeked,
+        signal_name="Seeked", dbus_interface=mpris2_iface_player,
+        bus_name=player_uri, path=mpris2_path)
+
+    try:
+        loop.run()
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
 def get_options():
     """
     Get user options and arguments with argparse.ArgumentParser.
@@ -710,6 +943,21 @@ def get_options():
         and using the current trackid,
         "F" for opening a local file --
         e.g. "-C S:-15"''')
+    parser.add_argument('-B', '--batch', action='store_const',
+        const=True, dest='do_batch', default=False,
+        help='''read commands from standard input, one per line,
+        and run them over one connection: a method as for the
+        positional arguments, "query", "get <property> ...",
+        "set <property> <value>", or "sleep <seconds>"''')
+    parser.add_argument('-W', '--watch', action='store_const',
+        const=True, dest='do_watch', default=False,
+        help='''print property changes as the player signals them,
+        until interrupted''')
+    parser.add_argument('-A', '--bus-address', type=str,
+        dest='bus_addr', default='', metavar='address',
+        help='''connect to this D-Bus address rather than the
+        session bus, e.g. one given by a private
+        "dbus-daemon --session --print-address"''')
 
     args_obj = parser.parse_args(sys.argv[1:])
 
@@ -725,6 +973,15 @@ def mainproc():
     """
     parser = get_options()
 
+    if args_obj.bus_addr:
+        # before any connection is made, so that all use it
+        os.environ["DBUS_SESSION_BUS_ADDRESS"] = args_obj.bus_addr
+
+    if args_obj.do_watch:
+        # the main loop must be default before the bus is connected
+        from dbus.mainloop.glib import DBusGMainLoop
+        DBusGMainLoop(set_as_default=True)
+
     if args_obj.do_listplayers:
         return 0 if list_players() != 0 else 1
 
@@ -749,6 +1006,13 @@ def mainproc():
     if args_obj.do_wrquery:
         print_properties_wr()
 
+    if args_obj.do_batch:
+        if do_batch(sys.stdin) != 0:
+            return 1
+
+    if args_obj.do_watch:
+        return do_watch()
+
     return 0
 
 
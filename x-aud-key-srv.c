@@ -664,7 +664,16 @@ input_and_reply(Display *dpy, Window *pw,
     } else if ( imsg == GOT_SNAMEMSG ) {
         char  *pbuf = client_name.buf;
         size_t  bsz = sizeof(client_name.buf);
-        ssize_t res = input_read(client_in, pbuf, bsz, 1);
+        ssize_t res;
+
+        /* tell client we are ready for the name line, so
+         * it need not guess with a delay: the name must
+         * arrive in a read of its own (see input_read) */
+        if ( client_output_str(client_out, "R:" _SNAMEMSG "\n") < 0 ) {
+            return False;
+        }
+
+        res = input_read(client_in, pbuf, bsz, 1);
 
         if ( res < 0 ) {
             return False;